@@ -0,0 +1,109 @@
+# accounts/utils/fieldsets.py
+"""
+Sparse fieldsets (?fields=) and expansion (?expand=) for read endpoints.
+
+Serializers opt in with SparseFieldsetMixin and describe, in Meta, which
+output fields need a join, a prefetch or a heavy column:
+
+    class Meta:
+        expandable_fields = {'category': (CategorySerializer, {})}
+        select_related_fields = {'category': 'category'}
+        prefetch_related_fields = {'images': 'images'}
+        deferrable_fields = ['description']
+
+Fields that were not asked for are removed before serialization, so their
+method fields never run, and Fieldset.optimize() skips the matching joins,
+prefetches and columns.
+"""
+
+
+def _split(value):
+    return {part.strip() for part in (value or '').split(',') if part.strip()}
+
+
+class Fieldset:
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields or None
+        self.expand = expand or set()
+
+    @classmethod
+    def from_request(cls, request):
+        params = request.query_params
+        return cls(fields=_split(params.get('fields')), expand=_split(params.get('expand')))
+
+    @property
+    def signature(self):
+        """Stable text form, for cache keys"""
+        fields = ','.join(sorted(self.fields)) if self.fields is not None else '*'
+        return f"{fields};{','.join(sorted(self.expand))}"
+
+    def includes(self, name, serializer_class):
+        meta = serializer_class.Meta
+        if name in self.expand and name in getattr(meta, 'expandable_fields', {}):
+            return True
+        if self.fields is not None:
+            return name in self.fields
+        return name in meta.fields
+
+    def optimize(self, queryset, serializer_class):
+        """Join, prefetch and load only what the requested fields use"""
+        meta = serializer_class.Meta
+        related = {
+            path for name, path in getattr(meta, 'select_related_fields', {}).items()
+            if self.includes(name, serializer_class)
+        }
+        if related:
+            queryset = queryset.select_related(*sorted(related))
+        prefetch = {
+            path for name, path in getattr(meta, 'prefetch_related_fields', {}).items()
+            if self.includes(name, serializer_class)
+        }
+        if prefetch:
+            queryset = queryset.prefetch_related(*sorted(prefetch))
+        deferred = [
+            column for column in getattr(meta, 'deferrable_fields', ())
+            if not self.includes(column, serializer_class)
+        ]
+        if deferred:
+            queryset = queryset.defer(*deferred)
+        return queryset
+
+
+class SparseFieldsetMixin:
+    """Accepts fieldset=Fieldset(...) and trims/expands the top-level fields"""
+
+    def __init__(self, *args, fieldset=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fieldset is None:
+            return
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name in fieldset.expand & set(expandable):
+            serializer_class, options = expandable[name]
+            self.fields[name] = serializer_class(read_only=True, **options)
+        if fieldset.fields is not None:
+            keep = fieldset.fields | (fieldset.expand & set(expandable))
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
+
+
+class SparseFieldsetViewMixin:
+    """ViewSet side: optimizes the queryset and passes the fieldset on list/retrieve"""
+    sparse_fieldset_actions = ('list', 'retrieve')
+
+    def get_fieldset(self):
+        if getattr(self, 'action', None) in self.sparse_fieldset_actions:
+            return Fieldset.from_request(self.request)
+        return None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            queryset = fieldset.optimize(queryset, self.get_serializer_class())
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            kwargs['fieldset'] = fieldset
+        return super().get_serializer(*args, **kwargs)
@@ -0,0 +1,122 @@
+# accounts/utils/models.py
+from django.db import models
+
+
+class MaintainedFieldsMixin:
+    """
+    Keep denormalized columns out of regular saves.
+
+    Fields listed in MAINTAINED_FIELDS are written with targeted F()/update()
+    calls elsewhere; saving a stale in-memory instance must not overwrite them.
+
+    Only updates of an existing row are restricted. A clone
+    (`obj.pk = None; obj.save()`) inserts every column, copying the
+    maintained values as they are in memory: a cloned Product keeps the
+    source's cover_image until refresh_cover_image() runs for its own images,
+    and its stock_quantity is booked as the clone's opening stock. Conversely
+    a plain save() on a loaded instance never writes cover_image or
+    stock_quantity - use refresh_cover_image() and products.stock.
+    """
+    MAINTAINED_FIELDS = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            self.pk is not None and not self._state.adding
+            and kwargs.get('update_fields') is None and not kwargs.get('force_insert')
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.MAINTAINED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
+# ============= SEO SCORE =============
+
+# Bit flag -> (source field, label shown on dashboards, score penalty)
+SEO_META_DESCRIPTION = 1
+SEO_META_KEYWORDS = 2
+SEO_DESCRIPTION = 4
+SEO_THIN_CONTENT = 8
+
+SEO_CHECKS = {
+    SEO_META_DESCRIPTION: ('meta_description', "Meta Description", 25),
+    SEO_META_KEYWORDS: ('meta_keywords', "Meta Keywords", 15),
+    SEO_DESCRIPTION: ('description', "Description", 35),
+    SEO_THIN_CONTENT: ('description', "Deep Content", 20),
+}
+SEO_MIN_DESCRIPTION_LENGTH = 100
+SEO_SOURCE_FIELDS = frozenset(field for field, _, _ in SEO_CHECKS.values())
+
+
+def evaluate_seo(obj):
+    """
+    Return (score 0-100, missing bitmask) for any object with the SEO fields.
+    Checks for fields the model does not have are skipped. Migrations keep
+    their own frozen copy rather than calling this.
+    """
+    field_names = {field.name for field in obj._meta.concrete_fields}
+    missing = 0
+    for flag, (field, _, _) in SEO_CHECKS.items():
+        if field not in field_names:
+            continue
+        value = (getattr(obj, field) or '').strip()
+        if flag == SEO_THIN_CONTENT:
+            if value and len(value) < SEO_MIN_DESCRIPTION_LENGTH:
+                missing |= flag
+        elif not value:
+            missing |= flag
+    score = 100 - sum(penalty for flag, (_, _, penalty) in SEO_CHECKS.items() if missing & flag)
+    return max(score, 0), missing
+
+
+def seo_missing_labels(missing):
+    return [label for flag, (_, label, _) in SEO_CHECKS.items() if missing & flag]
+
+
+def bulk_refresh_seo(queryset, batch_size=500):
+    """Recompute stored SEO scores for a queryset in batches; returns rows changed"""
+    model = queryset.model
+    field_names = {field.name for field in model._meta.concrete_fields}
+    sources = [field for field in SEO_SOURCE_FIELDS if field in field_names]
+    rows = queryset.only('pk', 'seo_score', 'seo_missing', *sources).order_by('pk')
+
+    changed, batch = 0, []
+    for obj in rows.iterator(chunk_size=batch_size):
+        score, missing = evaluate_seo(obj)
+        if (score, missing) != (obj.seo_score, obj.seo_missing):
+            obj.seo_score, obj.seo_missing = score, missing
+            batch.append(obj)
+        if len(batch) >= batch_size:
+            model.objects.bulk_update(batch, ['seo_score', 'seo_missing'])
+            changed, batch = changed + len(batch), []
+    if batch:
+        model.objects.bulk_update(batch, ['seo_score', 'seo_missing'])
+        changed += len(batch)
+    return changed
+
+
+class SeoScoreMixin(models.Model):
+    """
+    Stores an SEO score and a bitmask of missing fields, recomputed on save,
+    so dashboards can read the worst offenders through an index.
+    """
+    seo_score = models.PositiveSmallIntegerField(default=0, db_index=True, editable=False)
+    seo_missing = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def refresh_seo(self):
+        self.seo_score, self.seo_missing = evaluate_seo(self)
+
+    @property
+    def seo_missing_labels(self):
+        return seo_missing_labels(self.seo_missing)
+
+    def save(self, *args, **kwargs):
+        self.refresh_seo()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and SEO_SOURCE_FIELDS.intersection(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'seo_score', 'seo_missing'}
+        super().save(*args, **kwargs)
@@ -0,0 +1,91 @@
+# accounts/utils/renderers.py
+"""
+Renderers and parsers used by REST_FRAMEWORK.
+
+FastJSONRenderer encodes with orjson when it is installed (Decimal,
+datetime, UUID and lazy strings handled natively or by a small default
+hook, straight to bytes) and falls back to DRF's JSONRenderer otherwise.
+MessagePackRenderer/Parser serve `application/msgpack` for internal
+consumers when the msgpack package is installed; map keys are sent as
+strings, as in JSON, so default unpackers (strict_map_key) accept them.
+"""
+import datetime
+import decimal
+import uuid
+
+from django.utils.functional import Promise
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional format
+    msgpack = None
+
+
+def encode_default(obj):
+    """Fallback for types neither encoder handles natively (mirrors DRF's JSONEncoder)"""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, Promise):
+        return str(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, '__iter__'):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+def string_keys(data):
+    """Copy of data with every dict key a string, as JSON clients see them (e.g. rating_histogram)"""
+    if isinstance(data, dict):
+        return {key if isinstance(key, str) else str(key): string_keys(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [string_keys(item) for item in data]
+    return data
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Drop-in JSONRenderer that uses orjson when available"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=encode_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(string_keys(data), default=encode_default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, strict_map_key=False)
+        except Exception as exc:
+            raise ParseError(f"MessagePack parse error - {exc}")
+
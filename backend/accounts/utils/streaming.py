@@ -0,0 +1,83 @@
+# accounts/utils/streaming.py
+"""
+Streaming JSON responses for large listings.
+
+Rows are read with queryset.iterator(chunk_size=...) (prefetch_related
+lookups run once per chunk), serialized a chunk at a time and written out
+as JSON array elements, so peak memory is one chunk whatever the size of
+the table.
+"""
+from django.http import StreamingHttpResponse
+
+from .renderers import FastJSONRenderer
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def wants_streaming(request):
+    """
+    Streaming is opt-in with `?stream=true`, and only for JSON; other
+    negotiated formats use the regular response.
+    """
+    if request.query_params.get('stream', '').lower() != 'true':
+        return False
+    renderer = getattr(request, 'accepted_renderer', None)
+    return renderer is None or renderer.format == 'json'
+
+
+def iter_chunks(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Lists of at most chunk_size model instances, prefetches applied per chunk"""
+    chunk = []
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(obj)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_serialized(queryset, serializer_class, context=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield encoded JSON array elements (with separators) for every row"""
+    encode = FastJSONRenderer().render
+    separator = b''
+    for chunk in iter_chunks(queryset, chunk_size):
+        for item in serializer_class(chunk, many=True, context=context).data:
+            yield separator + encode(item)
+            separator = b','
+
+
+def stream_array(queryset, serializer_class, context=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Plain JSON array, as returned by unpaginated DRF list views"""
+    def body():
+        yield b'['
+        yield from iter_serialized(queryset, serializer_class, context, chunk_size)
+        yield b']'
+    return StreamingHttpResponse(body(), content_type='application/json')
+
+
+def stream_success_response(message, queryset, serializer_class, context=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Streaming equivalent of success_response(message, {'results': [...]})"""
+    encode = FastJSONRenderer().render
+
+    def body():
+        yield b'{"status":"success","message":' + encode(message) + b',"data":{"results":['
+        yield from iter_serialized(queryset, serializer_class, context, chunk_size)
+        yield b']}}'
+    return StreamingHttpResponse(body(), content_type='application/json')
+
+
+class StreamingListMixin:
+    """
+    ViewSet mixin: `?stream=true` on list returns every row as a streamed
+    JSON array instead of a page.
+    """
+    stream_chunk_size = DEFAULT_CHUNK_SIZE
+
+    def list(self, request, *args, **kwargs):
+        if wants_streaming(request):
+            queryset = self.filter_queryset(self.get_queryset())
+            return stream_array(
+                queryset, self.get_serializer_class(), self.get_serializer_context(), self.stream_chunk_size
+            )
+        return super().list(request, *args, **kwargs)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
 import os
 
@@ -97,6 +98,19 @@ DATABASES = {
 }
 
 
+# Cache
+# Per-process memory cache for development. Use a shared backend (Redis or
+# Memcached) in production so catalog versions and cached payloads are
+# visible to every worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bhattarai-metal-works',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -125,9 +139,18 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
+    # orjson-backed JSON, MessagePack for internal consumers (when msgpack is installed),
+    # browsable API only while DEBUG is on
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',  # Remove in production for security
+        'accounts.utils.renderers.FastJSONRenderer',
+        *(['accounts.utils.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+        *(['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        *(['accounts.utils.renderers.MessagePackParser'] if find_spec('msgpack') else []),
     ],
 }
 
@@ -1,5 +1,6 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
+from accounts.utils.streaming import StreamingListMixin
 from .models import StaffProfile, Attendance, Payroll
 from .serializers import StaffProfileSerializer, AttendanceSerializer, PayrollSerializer, StaffCreateSerializer, StaffUpdateSerializer
 
@@ -7,8 +8,8 @@ class IsAdminOrStaff(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user.is_authenticated and (request.user.is_staff or request.user.role in ['admin', 'staff'])
 
-class StaffProfileViewSet(viewsets.ModelViewSet):
-    queryset = StaffProfile.objects.all()
+class StaffProfileViewSet(StreamingListMixin, viewsets.ModelViewSet):
+    queryset = StaffProfile.objects.select_related('user')
     serializer_class = StaffProfileSerializer
     permission_classes = [IsAdminOrStaff]
 
@@ -25,8 +26,8 @@ class StaffProfileViewSet(viewsets.ModelViewSet):
         else:
             instance.delete()
 
-class AttendanceViewSet(viewsets.ModelViewSet):
-    queryset = Attendance.objects.all()
+class AttendanceViewSet(StreamingListMixin, viewsets.ModelViewSet):
+    queryset = Attendance.objects.select_related('staff__user')
     serializer_class = AttendanceSerializer
     permission_classes = [IsAdminOrStaff]
 
@@ -34,7 +35,7 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         # Automatically set staff if not provided (optionally)
         serializer.save()
 
-class PayrollViewSet(viewsets.ModelViewSet):
-    queryset = Payroll.objects.all()
+class PayrollViewSet(StreamingListMixin, viewsets.ModelViewSet):
+    queryset = Payroll.objects.select_related('staff__user')
     serializer_class = PayrollSerializer
     permission_classes = [IsAdminOrStaff]
@@ -10,9 +10,6 @@ class PortfolioCategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'slug', 'project_count')
     prepopulated_fields = {'slug': ('name',)}
 
-    def project_count(self, obj):
-        return obj.projects.count()
-
 @admin.register(PortfolioProject)
 class PortfolioProjectAdmin(admin.ModelAdmin):
     list_display = ('title', 'category', 'client_name', 'client_logo', 'completion_date', 'is_featured', 'order')
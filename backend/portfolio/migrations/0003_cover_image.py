@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_cover_images(apps, schema_editor):
+    PortfolioProject = apps.get_model('portfolio', 'PortfolioProject')
+    PortfolioProjectImage = apps.get_model('portfolio', 'PortfolioProjectImage')
+    for project in PortfolioProject.objects.all():
+        cover = PortfolioProjectImage.objects.filter(project=project).order_by('-is_primary', 'order', 'id').first()
+        if cover:
+            PortfolioProject.objects.filter(pk=project.pk).update(cover_image=cover)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0002_portfolioproject_client_logo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='portfolioproject',
+            name='cover_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='portfolio.portfolioprojectimage'),
+        ),
+        migrations.RunPython(backfill_cover_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:46
+
+from django.db import migrations, models
+
+
+def backfill_project_counts(apps, schema_editor):
+    PortfolioCategory = apps.get_model('portfolio', 'PortfolioCategory')
+    for pk, total in PortfolioCategory.objects.annotate(total=models.Count('projects')).values_list('pk', 'total'):
+        PortfolioCategory.objects.filter(pk=pk).update(project_count=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0003_cover_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='portfoliocategory',
+            name='project_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_project_counts, migrations.RunPython.noop),
+    ]
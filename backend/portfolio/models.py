@@ -2,10 +2,15 @@ from django.db import models
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator
 
-class PortfolioCategory(models.Model):
+from accounts.utils.models import MaintainedFieldsMixin, SeoScoreMixin
+
+class PortfolioCategory(MaintainedFieldsMixin, models.Model):
+    MAINTAINED_FIELDS = ('project_count',)
+
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True, blank=True)
     description = models.TextField(blank=True)
+    project_count = models.PositiveIntegerField(default=0, editable=False)  # maintained by PortfolioProject signals
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -17,10 +22,25 @@ class PortfolioCategory(models.Model):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
+    @classmethod
+    def adjust_project_count(cls, category_id, delta):
+        if category_id:
+            cls.objects.filter(pk=category_id).update(project_count=models.F('project_count') + delta)
+
+    @classmethod
+    def refresh_project_counts(cls, category_ids=None):
+        categories = cls.objects.all()
+        if category_ids is not None:
+            categories = categories.filter(pk__in=category_ids)
+        for pk, total in categories.annotate(total=models.Count('projects')).values_list('pk', 'total'):
+            cls.objects.filter(pk=pk).update(project_count=total)
+
     def __str__(self):
         return self.name
 
-class PortfolioProject(models.Model):
+class PortfolioProject(MaintainedFieldsMixin, SeoScoreMixin, models.Model):
+    MAINTAINED_FIELDS = ('cover_image',)
+
     title = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, unique=True, blank=True)
     category = models.ForeignKey(PortfolioCategory, related_name='projects', on_delete=models.SET_NULL, null=True, blank=True)
@@ -39,6 +59,9 @@ class PortfolioProject(models.Model):
     meta_description = models.CharField(max_length=160, blank=True)
     meta_keywords = models.CharField(max_length=200, blank=True)
     
+    # Card image (primary image, else first by order) - maintained by PortfolioProjectImage
+    cover_image = models.ForeignKey('PortfolioProjectImage', related_name='+', on_delete=models.SET_NULL, null=True, blank=True, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -50,6 +73,11 @@ class PortfolioProject(models.Model):
             self.slug = slugify(self.title)
         super().save(*args, **kwargs)
 
+    def refresh_cover_image(self):
+        cover = self.images.order_by('-is_primary', 'order', 'id').first()
+        PortfolioProject.objects.filter(pk=self.pk).update(cover_image=cover)
+        self.cover_image = cover
+
     def __str__(self):
         return self.title
 
@@ -67,6 +95,7 @@ class PortfolioProjectImage(models.Model):
         if self.is_primary:
             PortfolioProjectImage.objects.filter(project=self.project, is_primary=True).update(is_primary=False)
         super().save(*args, **kwargs)
+        self.project.refresh_cover_image()
 
     def __str__(self):
         return f"Image for {self.project.title}"
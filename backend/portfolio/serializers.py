@@ -1,4 +1,6 @@
 from rest_framework import serializers
+
+from accounts.utils.fieldsets import SparseFieldsetMixin
 from .models import PortfolioCategory, PortfolioProject, PortfolioProjectImage
 
 class PortfolioProjectImageSerializer(serializers.ModelSerializer):
@@ -6,14 +8,14 @@ class PortfolioProjectImageSerializer(serializers.ModelSerializer):
         model = PortfolioProjectImage
         fields = ['id', 'image', 'alt_text', 'is_primary', 'order']
 
-class PortfolioCategorySerializer(serializers.ModelSerializer):
-    project_count = serializers.IntegerField(source='projects.count', read_only=True)
-
+class PortfolioCategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = PortfolioCategory
         fields = ['id', 'name', 'slug', 'description', 'project_count']
+        read_only_fields = ['project_count']
+        deferrable_fields = ['description']
 
-class PortfolioProjectSerializer(serializers.ModelSerializer):
+class PortfolioProjectSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     images = PortfolioProjectImageSerializer(many=True, read_only=True)
     category_detail = PortfolioCategorySerializer(source='category', read_only=True)
     primary_image = serializers.SerializerMethodField()
@@ -26,11 +28,13 @@ class PortfolioProjectSerializer(serializers.ModelSerializer):
             'order', 'images', 'primary_image', 'meta_title', 'meta_description', 
             'meta_keywords', 'created_at', 'updated_at'
         ]
+        select_related_fields = {'category_detail': 'category', 'primary_image': 'cover_image'}
+        prefetch_related_fields = {'images': 'images'}
+        deferrable_fields = ['description', 'meta_title', 'meta_description', 'meta_keywords']
 
     def get_primary_image(self, obj):
-        primary = obj.images.filter(is_primary=True).first()
-        if not primary:
-            primary = obj.images.first()
+        # cover_image is maintained by PortfolioProjectImage.save (select_related it)
+        primary = obj.cover_image
         if primary:
             return PortfolioProjectImageSerializer(primary, context=self.context).data
         return None
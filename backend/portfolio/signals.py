@@ -0,0 +1,38 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import PortfolioCategory, PortfolioProject, PortfolioProjectImage
+
+
+# ============= CATEGORY COUNTERS =============
+
+@receiver(pre_save, sender=PortfolioProject)
+def remember_previous_category(sender, instance, **kwargs):
+    instance._previous_category_id = None
+    if instance.pk:
+        instance._previous_category_id = PortfolioProject.objects.filter(pk=instance.pk).values_list(
+            'category_id', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=PortfolioProject)
+def update_project_count_on_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_category_id', None)
+    if not created and previous == instance.category_id:
+        return
+    PortfolioCategory.adjust_project_count(previous, -1)
+    PortfolioCategory.adjust_project_count(instance.category_id, 1)
+
+
+@receiver(post_delete, sender=PortfolioProject)
+def update_project_count_on_delete(sender, instance, **kwargs):
+    PortfolioCategory.adjust_project_count(instance.category_id, -1)
+
+
+# ============= COVER IMAGES =============
+
+@receiver(post_delete, sender=PortfolioProjectImage)
+def refresh_project_cover_on_delete(sender, instance, **kwargs):
+    project = PortfolioProject.objects.filter(pk=instance.project_id).first()
+    if project:
+        project.refresh_cover_image()
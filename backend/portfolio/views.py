@@ -1,5 +1,7 @@
 from rest_framework import viewsets, permissions, filters
 from django_filters.rest_framework import DjangoFilterBackend
+
+from accounts.utils.fieldsets import SparseFieldsetViewMixin
 from .models import PortfolioCategory, PortfolioProject, PortfolioProjectImage
 from .serializers import (
     PortfolioCategorySerializer, 
@@ -7,7 +9,7 @@ from .serializers import (
     PortfolioProjectImageSerializer
 )
 
-class PortfolioCategoryViewSet(viewsets.ModelViewSet):
+class PortfolioCategoryViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = PortfolioCategory.objects.all()
     serializer_class = PortfolioCategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -15,7 +17,8 @@ class PortfolioCategoryViewSet(viewsets.ModelViewSet):
     filter_backends = [filters.SearchFilter]
     search_fields = ['name']
 
-class PortfolioProjectViewSet(viewsets.ModelViewSet):
+class PortfolioProjectViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
+    # Joins and prefetches are added per request for the fields asked for
     queryset = PortfolioProject.objects.all()
     serializer_class = PortfolioProjectSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
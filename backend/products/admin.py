@@ -1,9 +1,12 @@
 from django.contrib import admin
+from django.db import transaction
 from django.utils.html import format_html
 from .models import (
     Category, Material, Product, ProductImage, Specification,
-    Review, QuotationRequest, QuotationAttachment, ServiceBooking
+    Review, QuotationRequest, QuotationAttachment, ServiceBooking, ProductRatingSummary, StockMovement
 )
+from . import detail_cache, kpis, stock
+from .versioning import bump_catalog_version
 
 
 class ProductImageInline(admin.TabularInline):
@@ -20,14 +23,10 @@ class SpecificationInline(admin.TabularInline):
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ['name', 'slug', 'is_active', 'product_count', 'created_at']
+    list_display = ['name', 'slug', 'is_active', 'product_count', 'active_product_count', 'created_at']
     list_filter = ['is_active', 'created_at']
     search_fields = ['name', 'description']
     prepopulated_fields = {'slug': ('name',)}
-    
-    def product_count(self, obj):
-        return obj.products.count()
-    product_count.short_description = 'Products'
 
 
 @admin.register(Material)
@@ -84,6 +83,29 @@ class ProductAdmin(admin.ModelAdmin):
         return format_html('<span style="color: {};">{}</span>', color, text)
     stock_status.short_description = 'Stock Status'
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # save() leaves stock_quantity alone on updates; record the edit in the ledger
+        if change and 'stock_quantity' in form.changed_data:
+            stock.set_quantity(obj.pk, form.cleaned_data['stock_quantity'], note="Admin edit", user=request.user)
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ['product', 'kind', 'quantity', 'reference', 'created_by', 'created_at']
+    list_filter = ['kind', 'created_at']
+    search_fields = ['product__name', 'reference']
+
+    # Read-only history; movements are recorded through the stock API so they are applied
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
 
 @admin.register(ProductImage)
 class ProductImageAdmin(admin.ModelAdmin):
@@ -104,12 +126,23 @@ class ReviewAdmin(admin.ModelAdmin):
     search_fields = ['product__name', 'user__username', 'comment']
     actions = ['approve_reviews', 'reject_reviews']
     
+    def _set_approval(self, queryset, approved):
+        product_ids = set(queryset.values_list('product_id', flat=True))
+        queryset.update(is_approved=approved)
+        # Bulk update bypasses the review signals
+        ProductRatingSummary.rebuild(product_ids)
+
+        def after_commit():
+            detail_cache.invalidate_products(product_ids)
+            bump_catalog_version()
+        transaction.on_commit(after_commit)
+
     def approve_reviews(self, request, queryset):
-        queryset.update(is_approved=True)
+        self._set_approval(queryset, True)
     approve_reviews.short_description = 'Approve selected reviews'
     
     def reject_reviews(self, request, queryset):
-        queryset.update(is_approved=False)
+        self._set_approval(queryset, False)
     reject_reviews.short_description = 'Reject selected reviews'
 
 
@@ -188,6 +221,8 @@ class QuotationRequestAdmin(admin.ModelAdmin):
     
     def mark_as_reviewing(self, request, queryset):
         queryset.update(status='reviewing')
+        # Bulk update bypasses the KPI signals
+        kpis.rebuild(['pending_quotations'])
     mark_as_reviewing.short_description = 'Mark as Under Review'
     
     def mark_as_quoted(self, request, queryset):
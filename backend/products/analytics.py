@@ -0,0 +1,354 @@
+"""
+Write-behind buffers for analytics events.
+
+Request handlers only append to an in-process buffer; a daemon thread
+flushes it every few seconds (or sooner when it fills up) with a handful of
+bulk statements, so tracking never adds a database write to the request.
+Events still buffered when a worker is killed are lost, which is acceptable
+for analytics.
+"""
+import atexit
+import logging
+import re
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import trending
+from .hll import HyperLogLog, merged
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Collects events in memory and hands them to write() in batches"""
+    flush_interval_setting = None
+    default_flush_interval = 10  # seconds
+    max_pending = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = self.empty()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    # ---- hooks for subclasses ----
+
+    def empty(self):
+        raise NotImplementedError
+
+    def collect(self, pending, *args, **kwargs):
+        """Merge one event into the pending batch"""
+        raise NotImplementedError
+
+    def write(self, batch):
+        raise NotImplementedError
+
+    # ---- buffering ----
+
+    @property
+    def flush_interval(self):
+        if not self.flush_interval_setting:
+            return self.default_flush_interval
+        return getattr(settings, self.flush_interval_setting, self.default_flush_interval)
+
+    def add(self, *args, **kwargs):
+        with self._lock:
+            self.collect(self._pending, *args, **kwargs)
+            full = len(self._pending) >= self.max_pending
+        self._ensure_worker()
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of entries written"""
+        with self._lock:
+            batch, self._pending = self._pending, self.empty()
+        if not batch:
+            return 0
+        try:
+            with transaction.atomic():
+                self.write(batch)
+        except Exception:
+            logger.exception("Failed to flush %s (%d entries dropped)", type(self).__name__, len(batch))
+            return 0
+        return len(batch)
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name=f'{type(self).__name__}-flusher', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                # The flusher thread owns its own connection; don't keep it open between runs
+                connection.close()
+
+
+def normalize_query(query):
+    return ' '.join(query.lower().split())[:255]
+
+
+class SearchQueryBuffer(WriteBehindBuffer):
+    """
+    Aggregates searches per normalized query within a flush window and
+    upserts them into SearchQuery, incrementing count.
+    """
+    flush_interval_setting = 'SEARCH_ANALYTICS_FLUSH_INTERVAL'
+
+    def empty(self):
+        return {}
+
+    def collect(self, pending, query):
+        query = normalize_query(query)
+        if len(query) < 2:
+            return
+        pending[query] = pending.get(query, 0) + 1
+
+    def write(self, batch):
+        from .models import SearchQuery
+
+        now = timezone.now()
+        if connection.vendor in ('sqlite', 'postgresql'):
+            table = SearchQuery._meta.db_table
+            stamp = connection.ops.adapt_datetimefield_value(now)
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f"INSERT INTO {table} (query, count, last_searched, created_at) VALUES (%s, %s, %s, %s) "
+                    f"ON CONFLICT (query) DO UPDATE SET count = {table}.count + excluded.count, "
+                    f"last_searched = excluded.last_searched",
+                    [(query, count, stamp, stamp) for query, count in batch.items()]
+                )
+            return
+
+        existing = set(SearchQuery.objects.filter(query__in=batch).values_list('query', flat=True))
+        for query in existing:
+            SearchQuery.objects.filter(query=query).update(count=F('count') + batch[query], last_searched=now)
+        SearchQuery.objects.bulk_create([
+            SearchQuery(query=query, count=count) for query, count in batch.items() if query not in existing
+        ])
+
+
+BOT_USER_AGENT_RE = re.compile(
+    r'bot|crawl|spider|slurp|preview|facebookexternalhit|headless|lighthouse|'
+    r'curl|wget|python-requests|httpclient|scrapy|monitor|uptime',
+    re.IGNORECASE
+)
+
+
+def is_bot(request):
+    user_agent = request.META.get('HTTP_USER_AGENT', '')
+    return not user_agent or bool(BOT_USER_AGENT_RE.search(user_agent))
+
+
+def client_ip(request):
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded:
+        return forwarded.split(',')[0].strip() or None
+    return request.META.get('REMOTE_ADDR') or None
+
+
+class ProductViewBuffer(WriteBehindBuffer):
+    """
+    Buffers product detail views. Each flush bulk-inserts the raw events and
+    bumps the daily rollup and trending scores in the same transaction.
+    """
+    flush_interval_setting = 'VIEW_ANALYTICS_FLUSH_INTERVAL'
+    max_pending = 5000
+
+    def empty(self):
+        return []
+
+    def collect(self, pending, product_id, user_id=None, ip_address=None):
+        pending.append((product_id, user_id, ip_address, timezone.now()))
+
+    def track(self, request, product_id):
+        """Record a view from a request unless it comes from a crawler or staff"""
+        user = request.user
+        if is_bot(request) or (user.is_authenticated and (user.is_staff or user.is_superuser)):
+            return
+        self.add(product_id, user.pk if user.is_authenticated else None, client_ip(request))
+
+    def write(self, batch):
+        from .models import Product, ProductView
+
+        # Products deleted since the view was buffered would violate the FK
+        live = set(Product.objects.filter(id__in={e[0] for e in batch}).values_list('id', flat=True))
+        batch = [e for e in batch if e[0] in live]
+        ProductView.objects.bulk_create([
+            ProductView(product_id=product_id, user_id=user_id, ip_address=ip, viewed_at=viewed_at)
+            for product_id, user_id, ip, viewed_at in batch
+        ], batch_size=1000)
+
+        daily = Counter((e[0], timezone.localtime(e[3]).date()) for e in batch)
+        increment_daily_views(daily)
+        merge_visitor_sketches(batch)
+        trending.record((e[0], trending.VIEW_WEIGHT, e[3]) for e in batch)
+
+
+def visitor_key(user_id, ip_address):
+    """Identity used for unique-visitor counting (account first, then IP)"""
+    if user_id:
+        return f'u:{user_id}'
+    if ip_address:
+        return f'ip:{ip_address}'
+    return None
+
+
+def merge_visitor_sketches(events):
+    """Fold (product_id, user_id, ip, viewed_at) events into the daily HyperLogLog sketches"""
+    from .models import ProductViewDaily, SiteVisitorDaily
+
+    per_product = defaultdict(HyperLogLog)
+    per_site = defaultdict(HyperLogLog)
+    for product_id, user_id, ip_address, viewed_at in events:
+        key = visitor_key(user_id, ip_address)
+        if key is None:
+            continue
+        day = timezone.localtime(viewed_at).date()
+        per_product[(product_id, day)].add(key)
+        per_site[day].add(key)
+    if not per_product:
+        return
+
+    # Rows were created by increment_daily_views; lock them while merging
+    rows = ProductViewDaily.objects.select_for_update().filter(
+        product_id__in={product_id for product_id, _ in per_product},
+        date__in={day for _, day in per_product},
+    )
+    changed = []
+    for row in rows:
+        sketch = per_product.get((row.product_id, row.date))
+        if sketch is not None:
+            row.visitor_sketch = HyperLogLog.from_bytes(row.visitor_sketch).merge(sketch).to_bytes()
+            changed.append(row)
+    ProductViewDaily.objects.bulk_update(changed, ['visitor_sketch'], batch_size=500)
+
+    for day, sketch in per_site.items():
+        SiteVisitorDaily.objects.get_or_create(date=day)
+        row = SiteVisitorDaily.objects.select_for_update().get(date=day)
+        row.visitor_sketch = HyperLogLog.from_bytes(row.visitor_sketch).merge(sketch).to_bytes()
+        row.save(update_fields=['visitor_sketch'])
+
+
+def unique_visitors(start, end, product_id=None):
+    """
+    Estimated distinct visitors between two dates (inclusive), merged from
+    the daily sketches. Memory use is one sketch regardless of traffic.
+    """
+    from .models import ProductViewDaily, SiteVisitorDaily
+
+    if product_id is None:
+        rows = SiteVisitorDaily.objects.filter(date__range=(start, end))
+    else:
+        rows = ProductViewDaily.objects.filter(product_id=product_id, date__range=(start, end))
+    return merged(rows.values_list('visitor_sketch', flat=True).iterator()).count()
+
+
+def increment_daily_views(daily):
+    """Add {(product_id, date): views} to the rollup table"""
+    from .models import ProductViewDaily
+
+    if not daily:
+        return
+    if connection.vendor in ('sqlite', 'postgresql'):
+        table = ProductViewDaily._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {table} (product_id, date, views, visitor_sketch) VALUES (%s, %s, %s, %s) "
+                f"ON CONFLICT (product_id, date) DO UPDATE SET views = {table}.views + excluded.views",
+                [(product_id, connection.ops.adapt_datefield_value(day), views, b'')
+                 for (product_id, day), views in daily.items()]
+            )
+        return
+
+    for (product_id, day), views in daily.items():
+        row, created = ProductViewDaily.objects.get_or_create(
+            product_id=product_id, date=day, defaults={'views': views}
+        )
+        if not created:
+            ProductViewDaily.objects.filter(pk=row.pk).update(views=F('views') + views)
+
+
+def rollup_product_views(since):
+    """
+    Recompute daily rollups from raw ProductView rows viewed at or after
+    `since` (a date). Idempotent, so it can repair counts after a crash.
+    """
+    from .models import ProductView, ProductViewDaily
+
+    start = timezone.make_aware(datetime.combine(since, time.min))
+    rows = ProductView.objects.filter(viewed_at__gte=start).annotate(
+        day=TruncDate('viewed_at')
+    ).values('product_id', 'day').annotate(views=Count('id'))
+    rollups = [ProductViewDaily(product_id=r['product_id'], date=r['day'], views=r['views']) for r in rows]
+    ProductViewDaily.objects.bulk_create(
+        rollups, batch_size=1000,
+        update_conflicts=True, unique_fields=['product', 'date'], update_fields=['views'],
+    )
+    rebuild_visitor_sketches(since)
+    return len(rollups)
+
+
+def rebuild_visitor_sketches(since):
+    """Recompute sketches from raw events one day and one product at a time"""
+    from .models import ProductView, ProductViewDaily, SiteVisitorDaily
+
+    day = since
+    today = timezone.localdate()
+    while day <= today:
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        events = ProductView.objects.filter(
+            viewed_at__gte=start, viewed_at__lt=start + timedelta(days=1)
+        ).order_by('product_id').values_list('product_id', 'user_id', 'ip_address')
+
+        site = HyperLogLog()
+        current_id, current = None, None
+        for product_id, user_id, ip_address in events.iterator(chunk_size=5000):
+            if product_id != current_id:
+                if current_id is not None:
+                    ProductViewDaily.objects.filter(product_id=current_id, date=day).update(visitor_sketch=current.to_bytes())
+                current_id, current = product_id, HyperLogLog()
+            key = visitor_key(user_id, ip_address)
+            if key is not None:
+                current.add(key)
+                site.add(key)
+        if current_id is not None:
+            ProductViewDaily.objects.filter(product_id=current_id, date=day).update(visitor_sketch=current.to_bytes())
+        SiteVisitorDaily.objects.update_or_create(date=day, defaults={'visitor_sketch': site.to_bytes()})
+        day += timedelta(days=1)
+
+
+def prune_product_views(before):
+    """Delete raw view events older than `before` (a date); rollups are kept"""
+    from .models import ProductView
+
+    cutoff = timezone.make_aware(datetime.combine(before, time.min))
+    deleted, _ = ProductView.objects.filter(viewed_at__lt=cutoff).delete()
+    return deleted
+
+
+search_queries = SearchQueryBuffer()
+product_views = ProductViewBuffer()
+
+
+@atexit.register
+def flush_on_exit():
+    for buffer in (search_queries, product_views):
+        buffer.flush()
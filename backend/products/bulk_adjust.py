@@ -0,0 +1,140 @@
+"""
+Set-based price and stock adjustments.
+
+A filter (IDs, category, materials, product type) selects the products and
+the change is applied as a single UPDATE with F() expressions, e.g.
+`base_price = ROUND(MAX(base_price * 1.05, 0), 2)`, instead of one
+validated save per product. A dry run annotates the same expressions onto
+the selection and returns a preview without writing.
+
+Stock deltas are written to the stock ledger (products.stock) with one
+INSERT ... SELECT over the same selection (locked FOR UPDATE where the
+database supports it) before the UPDATE, so no product rows are loaded.
+
+queryset.update() skips signals: the touched products' detail-cache
+entries are invalidated and the catalog version is bumped (listing
+ETags) after commit. The search index holds no prices, so it is untouched.
+"""
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, DateTimeField, DecimalField, ExpressionWrapper, F, IntegerField, Q, Sum, Value
+from django.db.models.functions import Greatest, Round
+from django.utils import timezone
+
+from . import detail_cache
+from .filters import filter_by_materials
+from .models import Product, StockMovement
+from .versioning import bump_catalog_version
+
+PREVIEW_LIMIT = 20
+CENT = Decimal('0.01')
+
+
+def target_queryset(data):
+    """Products selected by the validated BulkAdjustSerializer data"""
+    queryset = Product.objects.all()
+    if data.get('ids'):
+        queryset = queryset.filter(pk__in=data['ids'])
+    category = data.get('category')
+    if category:
+        queryset = queryset.filter(Q(category_id=int(category)) if category.isdigit() else Q(category__slug=category))
+    if data.get('materials'):
+        queryset = filter_by_materials(queryset, data['materials'], data.get('materials_match', 'any'))
+    if data.get('product_type'):
+        queryset = queryset.filter(product_type=data['product_type'])
+    if data.get('active_only'):
+        queryset = queryset.filter(is_active=True)
+    return queryset
+
+
+def price_expression(data):
+    """New base_price as a DB expression, or None when the price is not changing"""
+    if data.get('price_percent') is not None:
+        factor = Decimal(1) + data['price_percent'] / Decimal(100)
+        price = F('base_price') * Value(factor, output_field=DecimalField(max_digits=12, decimal_places=5))
+    elif data.get('price_delta') is not None:
+        price = F('base_price') + Value(data['price_delta'], output_field=DecimalField(max_digits=10, decimal_places=2))
+    else:
+        return None
+    zero = Value(Decimal('0.00'), output_field=DecimalField(max_digits=10, decimal_places=2))
+    return Round(Greatest(price, zero), 2, output_field=DecimalField(max_digits=10, decimal_places=2))
+
+
+def stock_expression(data):
+    """New stock_quantity as a DB expression (never below zero), or None"""
+    if not data.get('stock_delta'):
+        return None
+    return Greatest(F('stock_quantity') + Value(data['stock_delta']), Value(0), output_field=IntegerField())
+
+
+def updates_for(data):
+    updates = {}
+    price = price_expression(data)
+    if price is not None:
+        updates['base_price'] = price
+    stock = stock_expression(data)
+    if stock is not None:
+        updates['stock_quantity'] = stock
+    return updates
+
+
+def preview(queryset, data, limit=PREVIEW_LIMIT):
+    """What apply() would do: match count, before/after totals and a sample of rows"""
+    updates = updates_for(data)
+    annotated = queryset.annotate(**{f'new_{field}': expression for field, expression in updates.items()})
+    totals = annotated.aggregate(
+        matched=Count('pk'),
+        **{f'{field}_before': Sum(field) for field in updates},
+        **{f'{field}_after': Sum(f'new_{field}') for field in updates},
+    )
+    sample = list(annotated.order_by('pk').values(
+        'id', 'name', 'slug', *updates, *(f'new_{field}' for field in updates)
+    )[:limit])
+    # SQLite hands computed decimals back unscaled
+    for row in [totals, *sample]:
+        for key, value in row.items():
+            if isinstance(value, Decimal):
+                row[key] = value.quantize(CENT)
+    return {'totals': totals, 'sample': sample}
+
+
+def record_movements(queryset, data, user=None):
+    """Ledger rows for a stock delta, written by the database from the selection"""
+    # The change actually applied - stock is clamped at zero
+    change = ExpressionWrapper(stock_expression(data) - F('stock_quantity'), output_field=IntegerField())
+    rows = queryset.select_for_update().annotate(
+        movement_kind=Value('adjustment'),
+        movement_quantity=change,
+        movement_reference=Value('bulk-adjust'),
+        movement_note=Value(''),
+        movement_user=Value(user.pk if user else None, output_field=IntegerField()),
+        movement_created_at=Value(timezone.now(), output_field=DateTimeField()),
+    ).exclude(movement_quantity=0).order_by().values_list(
+        'pk', 'movement_kind', 'movement_quantity', 'movement_reference', 'movement_note',
+        'movement_user', 'movement_created_at',
+    )
+    select_sql, params = rows.query.sql_with_params()
+    table = connection.ops.quote_name(StockMovement._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (product_id, kind, quantity, reference, note, created_by_id, created_at) "
+            f"{select_sql}",
+            params,
+        )
+
+
+def apply(queryset, data, user=None):
+    """Run the adjustment as one UPDATE; returns the number of products changed"""
+    updates = updates_for(data)
+    with transaction.atomic():
+        if 'stock_quantity' in updates:
+            record_movements(queryset, data, user)
+        updated = queryset.update(updated_at=timezone.now(), **updates)
+
+        def after_commit():
+            detail_cache.invalidate_slugs(queryset.order_by().values_list('slug', flat=True).iterator())
+            bump_catalog_version()
+        if updated:
+            transaction.on_commit(after_commit)
+    return updated
@@ -0,0 +1,130 @@
+"""
+Streaming catalog export.
+
+Products are read with queryset.iterator(chunk_size=...) - a server-side
+cursor on PostgreSQL, chunked fetches elsewhere - with category joined and
+materials/specifications prefetched once per chunk. Each chunk is
+flattened, encoded and (optionally) pushed through an incremental gzip
+compressor before the next one is read, so memory stays constant whatever
+the catalog size.
+
+Formats:
+
+* csv     - one row per product; materials and specifications use the
+            `|`-separated form that `import_catalog` reads back
+* jsonl   - one JSON object per product
+* columns - columnar JSON Lines: one row group per chunk, each holding a
+            list per column (Parquet-style layout without the dependency)
+"""
+import csv
+import io
+import zlib
+
+from accounts.utils.renderers import FastJSONRenderer
+from accounts.utils.streaming import DEFAULT_CHUNK_SIZE, iter_chunks
+from .catalog_import import LIST_SEPARATOR
+from .models import Product
+
+FORMATS = ('csv', 'jsonl', 'columns')
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'columns': 'application/x-ndjson',
+}
+EXTENSIONS = {'csv': 'csv', 'jsonl': 'jsonl', 'columns': 'columns.jsonl'}
+
+COLUMNS = [
+    'id', 'name', 'slug', 'category', 'category_name', 'description', 'product_type',
+    'base_price', 'is_price_visible', 'materials', 'length', 'width', 'height', 'weight',
+    'is_customizable', 'customization_note', 'stock_quantity', 'low_stock_threshold',
+    'is_active', 'is_featured', 'meta_title', 'meta_description', 'meta_keywords', 'focus_keyword',
+    'specifications', 'seo_score', 'created_at', 'updated_at',
+]
+MODEL_COLUMNS = [
+    column for column in COLUMNS
+    if column not in ('category', 'category_name', 'materials', 'specifications')
+]
+
+
+def export_queryset(active_only=False, category=None):
+    queryset = Product.objects.select_related('category').prefetch_related(
+        'materials', 'specifications'
+    ).only(*MODEL_COLUMNS, 'category__name', 'category__slug').order_by('pk')
+    if active_only:
+        queryset = queryset.filter(is_active=True)
+    if category:
+        queryset = queryset.filter(category__slug=category)
+    return queryset
+
+
+def flatten(product, structured=False):
+    """One export row; structured keeps materials/specifications as lists (JSON formats)"""
+    row = {column: getattr(product, column) for column in MODEL_COLUMNS}
+    row['category'] = product.category.slug
+    row['category_name'] = product.category.name
+    materials = [material.slug for material in product.materials.all()]
+    specifications = [{'name': spec.name, 'value': spec.value} for spec in product.specifications.all()]
+    if structured:
+        row['materials'] = materials
+        row['specifications'] = specifications
+    else:
+        row['materials'] = LIST_SEPARATOR.join(materials)
+        row['specifications'] = LIST_SEPARATOR.join(f"{s['name']}: {s['value']}" for s in specifications)
+    return row
+
+
+# ============= ENCODERS =============
+
+def encode_csv(chunks):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNS)
+    writer.writeheader()
+    for chunk in chunks:
+        for product in chunk:
+            writer.writerow(flatten(product))
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def encode_jsonl(chunks):
+    encode = FastJSONRenderer().render
+    for chunk in chunks:
+        yield b''.join(encode(flatten(product, structured=True)) + b'\n' for product in chunk)
+
+
+def encode_columns(chunks):
+    encode = FastJSONRenderer().render
+    for chunk in chunks:
+        rows = [flatten(product, structured=True) for product in chunk]
+        yield encode({
+            'rows': len(rows),
+            'columns': {column: [row[column] for row in rows] for column in COLUMNS},
+        }) + b'\n'
+
+
+ENCODERS = {'csv': encode_csv, 'jsonl': encode_jsonl, 'columns': encode_columns}
+
+
+def gzip_stream(pieces, level=6):
+    """Compress an iterable of byte strings incrementally into a gzip stream"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for piece in pieces:
+        compressed = compressor.compress(piece)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_catalog(fmt, queryset=None, compress=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the export as byte strings, one or so per chunk of products"""
+    queryset = export_queryset() if queryset is None else queryset
+    pieces = ENCODERS[fmt](iter_chunks(queryset, chunk_size))
+    return gzip_stream(pieces) if compress else pieces
+
+
+def filename(fmt, compress=False):
+    name = f"catalog.{EXTENSIONS[fmt]}"
+    return f"{name}.gz" if compress else name
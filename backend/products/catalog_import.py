@@ -0,0 +1,265 @@
+"""
+Bulk catalog import from CSV or JSON Lines.
+
+Input is read a row at a time and validated with CatalogImportRowSerializer
+(category and materials are resolved against maps loaded once up front).
+Valid rows are written a batch at a time with bulk_create - products,
+specifications, material links and rating summaries - in one transaction
+per batch, with slugs allocated in memory against the slugs already taken.
+
+bulk_create skips the model signals, so the importer does their work
+itself: SEO scores are computed before insert, each batch is indexed for
+search and gets its opening stock ledger rows, and once the import is done
+category counters, KPI counters, detail-cache category generations, the
+typeahead generation and the catalog version are refreshed.
+
+CSV columns are the serializer fields; `materials` is a `|`-separated list
+and `specifications` is `Name: value|Name: value`. JSONL rows use lists
+(specifications as [{"name": ..., "value": ...}] or a {name: value} object).
+"""
+import csv
+import json
+
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+from rest_framework import serializers
+
+from accounts.utils.models import evaluate_seo
+from . import detail_cache, kpis, search, stock, suggest
+from .models import Category, Material, Product, ProductRatingSummary, Specification
+from .serializers import CatalogImportRowSerializer
+from .versioning import bump_catalog_version
+
+FORMATS = ('csv', 'jsonl')
+DEFAULT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 200
+LIST_SEPARATOR = '|'
+
+
+def detect_format(filename):
+    name = (filename or '').lower()
+    if name.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    if name.endswith('.csv'):
+        return 'csv'
+    return None
+
+
+# ============= READERS =============
+
+def read_csv(stream):
+    """Yield (line number, row dict) from a text stream; empty cells are dropped"""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        values = {
+            key.strip(): value.strip() for key, value in row.items()
+            if key and isinstance(value, str) and value.strip()
+        }
+        if 'materials' in values:
+            values['materials'] = [m.strip() for m in values['materials'].split(LIST_SEPARATOR) if m.strip()]
+        if 'specifications' in values:
+            specs = []
+            for pair in values['specifications'].split(LIST_SEPARATOR):
+                name, _, value = pair.partition(':')
+                if name.strip():
+                    specs.append({'name': name, 'value': value})
+            values['specifications'] = specs
+        yield reader.line_num, values
+
+
+def read_jsonl(stream):
+    """Yield (line number, row dict), or (line number, ValueError) for lines that do not parse"""
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, ValueError(f"Invalid JSON - {exc}")
+            continue
+        if not isinstance(row, dict):
+            yield line_number, ValueError("Expected a JSON object")
+            continue
+        if isinstance(row.get('specifications'), dict):
+            row['specifications'] = [{'name': k, 'value': v} for k, v in row['specifications'].items()]
+        if isinstance(row.get('materials'), (str, int)):
+            row['materials'] = [row['materials']]
+        if isinstance(row.get('category'), int):
+            row['category'] = str(row['category'])
+        if isinstance(row.get('materials'), list):
+            row['materials'] = [str(m) for m in row['materials']]
+        yield line_number, row
+
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl}
+
+
+# ============= IMPORTER =============
+
+class ImportReport:
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.rows = 0
+        self.valid = 0
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'dry_run': self.dry_run,
+            'rows': self.rows,
+            'valid': self.valid,
+            'created': self.created,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'errors_truncated': self.error_count > len(self.errors),
+        }
+
+
+def _lookup(queryset):
+    """Map str(id), slug and lower-cased name to the id (slugs are already lower case)"""
+    lookup = {}
+    for pk, slug, name in queryset.values_list('pk', 'slug', 'name'):
+        lookup[name.lower()] = pk
+        lookup[slug] = pk
+        lookup[str(pk)] = pk
+    return lookup
+
+
+class CatalogImporter:
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, progress=None):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.progress = progress
+        self.report = ImportReport(dry_run)
+        self.categories = _lookup(Category.objects.all())
+        self.materials = _lookup(Material.objects.all())
+        self.taken_slugs = set(Product.objects.values_list('slug', flat=True))
+        self.touched_categories = set()
+        self.validator = CatalogImportRowSerializer()
+
+    def run(self, rows):
+        """rows: iterable of (line number, row dict or exception); returns the ImportReport"""
+        pending = []
+        for line, row in rows:
+            self.report.rows += 1
+            if isinstance(row, Exception):
+                self.report.add_error(line, {'row': [str(row)]})
+                continue
+            item = self.prepare(line, row)
+            if item is None:
+                continue
+            self.report.valid += 1
+            pending.append(item)
+            if len(pending) >= self.batch_size:
+                self.flush(pending)
+                pending = []
+        if pending:
+            self.flush(pending)
+        if self.report.created:
+            self.finish()
+        return self.report
+
+    def prepare(self, line, row):
+        """Validate one row; returns (line, product, material ids, specifications) or None"""
+        try:
+            data = self.validator.run_validation(row)
+        except serializers.ValidationError as exc:
+            self.report.add_error(line, exc.detail)
+            return None
+
+        category_id = self.categories.get(data['category'].strip().lower())
+        if category_id is None:
+            self.report.add_error(line, {'category': [f'Unknown category "{data["category"]}"']})
+            return None
+        material_ids, unknown = set(), []
+        for value in data.pop('materials', []):
+            material_id = self.materials.get(value.strip().lower())
+            if material_id is None:
+                unknown.append(value)
+            else:
+                material_ids.add(material_id)
+        if unknown:
+            self.report.add_error(line, {'materials': [f'Unknown materials: {", ".join(unknown)}']})
+            return None
+
+        specifications = data.pop('specifications', [])
+        data.pop('category')
+        slug = self.allocate_slug(data.pop('slug', '') or data['name'])
+        if not slug:
+            self.report.add_error(line, {'name': ["Name does not produce a usable slug"]})
+            return None
+
+        product = Product(category_id=category_id, slug=slug, **data)
+        product.seo_score, product.seo_missing = evaluate_seo(product)
+        return line, product, material_ids, specifications
+
+    def allocate_slug(self, text):
+        base = slugify(text)[:200].strip('-')
+        if not base:
+            return None
+        slug, suffix = base, 2
+        while slug in self.taken_slugs:
+            tail = f'-{suffix}'
+            slug = base[:200 - len(tail)] + tail
+            suffix += 1
+        self.taken_slugs.add(slug)
+        return slug
+
+    def flush(self, pending):
+        if not self.dry_run:
+            try:
+                self.write(pending)
+            except IntegrityError as exc:
+                # Usually a slug taken by a concurrent write; the whole batch rolled back
+                for line, product, _, _ in pending:
+                    self.report.add_error(line, {'row': [f"Batch not written - {exc}"]})
+                    self.taken_slugs.discard(product.slug)
+                self.report.valid -= len(pending)
+            else:
+                self.report.created += len(pending)
+        if self.progress:
+            self.progress(self.report)
+
+    def write(self, pending):
+        products = [product for _, product, _, _ in pending]
+        with transaction.atomic():
+            Product.objects.bulk_create(products)
+            Specification.objects.bulk_create([
+                Specification(product_id=product.pk, name=spec['name'], value=spec['value'], order=order)
+                for _, product, _, specs in pending
+                for order, spec in enumerate(specs)
+            ], batch_size=self.batch_size)
+            Product.materials.through.objects.bulk_create([
+                Product.materials.through(product_id=product.pk, material_id=material_id)
+                for _, product, material_ids, _ in pending
+                for material_id in material_ids
+            ], batch_size=self.batch_size)
+            ProductRatingSummary.objects.bulk_create(
+                [ProductRatingSummary(product_id=product.pk) for product in products]
+            )
+            stock.record_opening_balances(products)
+            search.index_products([product.pk for product in products])
+        self.touched_categories.update(product.category_id for product in products)
+
+    def finish(self):
+        """What the per-row signals would have done"""
+        Category.refresh_product_counts(self.touched_categories)
+        for category_id in self.touched_categories:
+            detail_cache.invalidate_category(category_id)
+        kpis.rebuild(['total_products', 'active_products'])
+        suggest.bump_generation()
+        bump_catalog_version()
+
+
+def import_catalog(stream, fmt, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, progress=None):
+    """Import a text stream in the given format; returns the ImportReport"""
+    importer = CatalogImporter(batch_size=batch_size, dry_run=dry_run, progress=progress)
+    return importer.run(READERS[fmt](stream))
@@ -0,0 +1,135 @@
+"""
+Admin dashboard payloads served from cache with stale-while-revalidate.
+
+A payload older than its TTL is still returned immediately while a single
+background thread recomputes it, so admins never wait on the aggregate
+queries except on a cold cache. Concurrent cold misses in a process share
+one recompute; background refreshes are claimed with cache.add() so only
+one worker refreshes at a time when CACHES points at a shared backend.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, models
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class StaleWhileRevalidate:
+    def __init__(self, key, compute, ttl_setting, default_ttl=60, lock_timeout=300):
+        self.key = key
+        self.lock_key = f'{key}:refreshing'
+        self.compute = compute
+        self.ttl_setting = ttl_setting
+        self.default_ttl = default_ttl
+        self.lock_timeout = lock_timeout
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, self.ttl_setting, self.default_ttl)
+
+    def is_stale(self, entry):
+        return timezone.now() - entry['computed_at'] > timedelta(seconds=self.ttl)
+
+    def get(self, revalidate=False):
+        """
+        Return {'data', 'computed_at'}, recomputing only on a cold cache.
+        revalidate=True queues a background refresh even when the entry is fresh.
+        """
+        entry = cache.get(self.key)
+        if entry is None:
+            with self._lock:
+                # Whoever got the lock first has filled the cache for the rest
+                entry = cache.get(self.key)
+                if entry is None:
+                    entry = self.refresh()
+        elif revalidate or self.is_stale(entry):
+            self.refresh_in_background()
+        return entry
+
+    def refresh(self):
+        entry = {'data': self.compute(), 'computed_at': timezone.now()}
+        # No expiry: a stale payload is still better than a blocking recompute
+        cache.set(self.key, entry, timeout=None)
+        return entry
+
+    def refresh_in_background(self):
+        if not cache.add(self.lock_key, True, timeout=self.lock_timeout):
+            return False
+        threading.Thread(target=self._run_refresh, name=f'{self.key}-refresh', daemon=True).start()
+        return True
+
+    def _run_refresh(self):
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Failed to refresh %s", self.key)
+        finally:
+            cache.delete(self.lock_key)
+            connection.close()
+
+
+def compute_analytics():
+    """Aggregate the analytics dashboard payload"""
+    from . import analytics, kpis
+    from .models import Product, ProductViewDaily, SearchQuery
+
+    # Most searched queries
+    top_searches = list(SearchQuery.objects.values('query').annotate(
+        search_count=models.Sum('count')
+    ).order_by('-search_count')[:10])
+
+    # Most viewed products (all for diagnostic), from the daily rollup
+    top_views = list(ProductViewDaily.objects.values('product', 'product__name').annotate(
+        view_count=models.Sum('views')
+    ).order_by('-view_count')[:10])
+
+    # Unique reach from the daily HyperLogLog sketches
+    today = timezone.localdate()
+    month_start = today - timedelta(days=29)
+    for row in top_views:
+        row['unique_visitors_30d'] = analytics.unique_visitors(month_start, today, product_id=row['product'])
+    unique_reach = {
+        'last_7_days': analytics.unique_visitors(today - timedelta(days=6), today),
+        'last_30_days': analytics.unique_visitors(month_start, today),
+    }
+
+    # SEO Suggestions (Only for active products), worst stored scores first
+    seo_suggestions = []
+    low_seo_products = Product.objects.filter(is_active=True, seo_score__lt=100).order_by(
+        'seo_score', 'id'
+    ).only('id', 'name', 'slug', 'seo_score', 'seo_missing')[:10]
+
+    for p in low_seo_products:
+        missing = p.seo_missing_labels
+        seo_suggestions.append({
+            "id": p.id,
+            "name": p.name,
+            "slug": p.slug,
+            "seo_score": p.seo_score,
+            "missing": missing,
+            "suggestion": f"Enhance {', '.join(missing)} to improve organic discoverability."
+        })
+
+    counters = kpis.read()
+    return {
+        "top_searches": top_searches,
+        "top_views": top_views,
+        "unique_reach": unique_reach,
+        "seo_suggestions": seo_suggestions,
+        "summary": {
+            "total_products": counters['total_products'],
+            "total_services": counters['total_services'],
+            "total_queries": SearchQuery.objects.aggregate(total=models.Sum('count'))['total'] or 0
+        }
+    }
+
+
+analytics_dashboard = StaleWhileRevalidate(
+    'products:analytics_dashboard', compute_analytics, ttl_setting='ANALYTICS_DASHBOARD_TTL'
+)
@@ -0,0 +1,122 @@
+"""
+Rendered product detail payloads cached per slug.
+
+Keys carry a per-slug generation, so invalidating a product is a single
+cache.incr() no matter how many hosts or audiences (public/staff) have a
+cached copy. The embedded category (with its product counts) is checked
+against a per-category generation on every read. Signals in
+products.signals invalidate on product, image, specification, material,
+category and review changes; code that writes with queryset.update()
+must call invalidate_products() itself. Invalidations take effect when the
+surrounding transaction commits.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+DEFAULT_TIMEOUT = 3600
+
+
+def _fresh_generation():
+    # Clock-based start so an evicted generation never restarts below an old one
+    return time.time_ns() // 1000
+
+
+def _generation(key):
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _fresh_generation(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _fresh_generation(), timeout=None)
+
+
+def slug_generation_key(slug):
+    return f'products:detail_generation:{slug}'
+
+
+def category_generation_key(category_id):
+    return f'products:category_generation:{category_id}'
+
+
+def category_hint_key(slug):
+    return f'products:detail_category:{slug}'
+
+
+def payload_key(request, slug, staff, variant=''):
+    # Image URLs are absolute, so the host is part of the payload
+    audience = 'staff' if staff else 'public'
+    generation = _generation(slug_generation_key(slug))
+    variant = hashlib.blake2b(variant.encode(), digest_size=8).hexdigest()
+    return f'products:detail:{slug}:{generation}:{audience}:{request.get_host()}:{variant}'
+
+
+class Lookup:
+    """
+    Key and generations for one detail request, read before the database.
+    A write that commits while the product is being read bumps a generation
+    past the one captured here, so the entry stored afterwards is never
+    served. The category comes from a per-slug hint; until the hint is
+    known (or after the product changes category) nothing is stored.
+    """
+
+    def __init__(self, request, slug, staff, variant=''):
+        self.key = payload_key(request, slug, staff, variant)
+        self.hint_key = category_hint_key(slug)
+        self.category_id = cache.get(self.hint_key)
+        self.category_generation = None
+        if self.category_id is not None:
+            self.category_generation = _generation(category_generation_key(self.category_id))
+
+    def get(self):
+        """(product id, data) from cache, or None"""
+        if self.category_id is None:
+            return None
+        entry = cache.get(self.key)
+        if entry is None:
+            return None
+        if (entry['category_id'], entry['category_generation']) != (self.category_id, self.category_generation):
+            return None
+        return entry['product_id'], entry['data']
+
+    def store(self, product, data):
+        if product.category_id != self.category_id:
+            cache.set(self.hint_key, product.category_id, timeout=None)
+            return
+        cache.set(self.key, {
+            'product_id': product.pk,
+            'category_id': self.category_id,
+            'category_generation': self.category_generation,
+            'data': data,
+        }, timeout=getattr(settings, 'PRODUCT_DETAIL_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+
+
+# Bumps wait for commit: bumping earlier would let a reader cache pre-commit
+# rows under the new generation.
+
+def invalidate_slugs(slugs):
+    slugs = {slug for slug in slugs if slug}
+    if slugs:
+        transaction.on_commit(lambda: [_bump(slug_generation_key(slug)) for slug in slugs])
+
+
+def invalidate_products(product_ids):
+    from .models import Product
+
+    product_ids = list(product_ids)
+    if product_ids:
+        invalidate_slugs(Product.objects.filter(pk__in=product_ids).values_list('slug', flat=True))
+
+
+def invalidate_category(category_id):
+    if category_id:
+        transaction.on_commit(lambda: _bump(category_generation_key(category_id)))
@@ -0,0 +1,110 @@
+"""
+Facet counts for the product catalog.
+
+Every facet (category, materials, type, stock flag, price) is a grouped
+select over the current filter set, used as an id subquery so
+multi-valued joins in the filters cannot count a product twice. The
+selects are tagged with their facet name and sent as one UNION ALL, so a
+faceted listing costs a single extra round trip however many facets
+there are. Nothing is cached, so unrelated catalog writes (reviews, stock
+movements) cost nothing here.
+"""
+from decimal import Decimal
+
+from django.db.models import Case, CharField, Count, F, Value, When
+from django.db.models.functions import Cast
+
+# Lower bounds of the price buckets; the last bucket is open-ended
+PRICE_BUCKET_EDGES = [Decimal(edge) for edge in (0, 1000, 5000, 10000, 25000, 50000, 100000)]
+
+# Prefixed so the aliases never clash with model fields (Product.slug, Product.name)
+ROW_FIELDS = ('facet_name', 'facet_key', 'facet_slug', 'facet_label', 'facet_count')
+
+
+def text(value=''):
+    return Value(value, output_field=CharField())
+
+
+def price_bucket_expression():
+    """Bucket index as text; anything below the first edge falls into the first bucket"""
+    whens = [
+        When(base_price__gte=edge, then=text(str(i)))
+        for i, edge in reversed(list(enumerate(PRICE_BUCKET_EDGES))) if i
+    ]
+    return Case(*whens, default=text('0'), output_field=CharField())
+
+
+def grouped(queryset, facet, key, slug=None, name=None, counted='pk'):
+    """One facet as (facet, key, slug, name, count) rows"""
+    return queryset.order_by().values(
+        facet_name=text(facet),
+        facet_key=Cast(key, CharField()),
+        facet_slug=slug if slug is not None else text(),
+        facet_label=name if name is not None else text(),
+    ).annotate(facet_count=Count(counted)).values_list(*ROW_FIELDS)
+
+
+class FacetEngine:
+    """Facet counts for a filtered product queryset in one statement"""
+
+    def selects(self, matched):
+        from .models import Product
+
+        memberships = Product.materials.through.objects.filter(product__in=matched)
+        in_stock = Case(When(stock_quantity__gt=0, then=text('true')), default=text('false'), output_field=CharField())
+        return [
+            grouped(matched, 'category', F('category_id'), F('category__slug'), F('category__name')),
+            grouped(memberships, 'material', F('material_id'), F('material__slug'), F('material__name'),
+                    counted='product_id'),
+            grouped(matched, 'product_type', F('product_type')),
+            grouped(matched, 'in_stock', in_stock),
+            grouped(matched, 'price', price_bucket_expression()),
+        ]
+
+    def count(self, queryset):
+        from .models import Product
+
+        matched = Product.objects.filter(pk__in=queryset.order_by().values('pk'))
+        first, *rest = self.selects(matched)
+        rows = {}
+        for facet, key, slug, name, count in first.union(*rest, all=True):
+            rows.setdefault(facet, []).append((key, slug, name, count))
+        return self.render(rows)
+
+    def render(self, rows):
+        from .models import Product
+
+        type_labels = dict(Product.PRODUCT_TYPE_CHOICES)
+        # Largest first, ties in key order
+        ordered = {
+            facet: sorted(facet_rows, key=lambda row: (-row[3], int(row[0]) if row[0].isdigit() else row[0]))
+            for facet, facet_rows in rows.items()
+        }
+        stock = {key: count for key, _, _, count in rows.get('in_stock', ())}
+        prices = {int(key): count for key, _, _, count in rows.get('price', ())}
+        return {
+            'category': [
+                {'id': int(key), 'slug': slug, 'name': name, 'count': count}
+                for key, slug, name, count in ordered.get('category', ())
+            ],
+            'material': [
+                {'id': int(key), 'slug': slug, 'name': name, 'count': count}
+                for key, slug, name, count in ordered.get('material', ())
+            ],
+            'product_type': [
+                {'value': key, 'label': type_labels.get(key, key), 'count': count}
+                for key, _, _, count in ordered.get('product_type', ())
+            ],
+            'in_stock': {'true': stock.get('true', 0), 'false': stock.get('false', 0)},
+            'price': [
+                {
+                    'min': PRICE_BUCKET_EDGES[i],
+                    'max': PRICE_BUCKET_EDGES[i + 1] if i + 1 < len(PRICE_BUCKET_EDGES) else None,
+                    'count': prices[i],
+                }
+                for i in range(len(PRICE_BUCKET_EDGES)) if prices.get(i)
+            ],
+        }
+
+
+engine = FacetEngine()
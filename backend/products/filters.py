@@ -1,23 +1,72 @@
 import django_filters
+from django.db.models import Exists, OuterRef, Q
+
 from .models import Product
 
 
+def material_exists(*conditions, **lookups):
+    """EXISTS over the product/material link table; one index probe per product, no duplicate rows"""
+    return Exists(Product.materials.through.objects.filter(*conditions, product_id=OuterRef('pk'), **lookups))
+
+
+def material_match(values):
+    """Q for any of the values on the link table; a numeric value matches an ID or a slug (e.g. 304)"""
+    ids = [int(value) for value in values if value.isdigit()]
+    condition = Q(material__slug__in=values)
+    return condition | Q(material_id__in=ids) if ids else condition
+
+
+def filter_by_materials(queryset, values, match='any'):
+    """
+    Filter by material IDs and/or slugs. match='any' keeps products having at
+    least one of them; match='all' keeps products having every one.
+    """
+    values = list(values)
+    if not values:
+        return queryset
+    if match == 'all':
+        for value in values:
+            queryset = queryset.filter(material_exists(material_match([value])))
+        return queryset
+    return queryset.filter(material_exists(material_match(values)))
+
+
+def filter_by_material_name(queryset, text):
+    """Free-text fallback on material names"""
+    return queryset.filter(material_exists(material__name__icontains=text))
+
+
 class ProductFilter(django_filters.FilterSet):
     """Advanced filtering for products"""
-    
+
     min_price = django_filters.NumberFilter(field_name='base_price', lookup_expr='gte')
     max_price = django_filters.NumberFilter(field_name='base_price', lookup_expr='lte')
     category = django_filters.CharFilter(field_name='category__slug', lookup_expr='iexact')
-    material = django_filters.CharFilter(field_name='materials__name', lookup_expr='icontains')
+    material = django_filters.CharFilter(method='filter_material_name')
+    materials = django_filters.CharFilter(method='filter_materials')
+    materials_match = django_filters.ChoiceFilter(
+        choices=[('any', 'Any'), ('all', 'All')], method='filter_noop'
+    )
     in_stock = django_filters.BooleanFilter(method='filter_in_stock')
     is_customizable = django_filters.BooleanFilter(field_name='is_customizable')
     product_type = django_filters.ChoiceFilter(choices=Product.PRODUCT_TYPE_CHOICES)
-    
+
     class Meta:
         model = Product
         fields = ['category', 'product_type', 'is_customizable', 'is_featured']
-    
+
     def filter_in_stock(self, queryset, name, value):
         if value:
-            return queryset.filter(stock_quantity__gt=0)
-        return queryset
\ No newline at end of file
+            return queryset.in_stock()
+        return queryset
+
+    def filter_material_name(self, queryset, name, value):
+        return filter_by_material_name(queryset, value)
+
+    def filter_materials(self, queryset, name, value):
+        values = [v.strip() for v in value.split(',') if v.strip()]
+        return filter_by_materials(queryset, values, self.data.get('materials_match', 'any'))
+
+    def filter_noop(self, queryset, name, value):
+        # materials_match only modifies the materials filter
+        return queryset
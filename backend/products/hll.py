@@ -0,0 +1,83 @@
+"""
+HyperLogLog cardinality sketches for unique-visitor counts.
+
+A sketch is 2**PRECISION one-byte registers (4 KiB, ~1.6% standard error)
+no matter how many visitors it has seen, and two sketches merge by taking
+the register-wise maximum, so daily sketches roll up into weekly or monthly
+reach without touching raw events. Sketches with few visitors are stored
+sparsely as (register, rank) pairs.
+"""
+import struct
+from hashlib import blake2b
+from math import log
+
+PRECISION = 12
+REGISTERS = 1 << PRECISION
+HASH_BITS = 64
+
+SPARSE = b'\x01'
+DENSE = b'\x02'
+
+
+class HyperLogLog:
+    def __init__(self, registers=None):
+        self.registers = bytearray(registers) if registers is not None else bytearray(REGISTERS)
+
+    # ---- updating ----
+
+    def add(self, value):
+        digest = blake2b(str(value).encode(), digest_size=8).digest()
+        h = int.from_bytes(digest, 'big')
+        index = h >> (HASH_BITS - PRECISION)
+        remainder = h & ((1 << (HASH_BITS - PRECISION)) - 1)
+        rank = (HASH_BITS - PRECISION) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    # ---- estimating ----
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / REGISTERS)
+        estimate = alpha * REGISTERS * REGISTERS / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * REGISTERS and zeros:
+            # Small-range correction (linear counting)
+            estimate = REGISTERS * log(REGISTERS / zeros)
+        return int(round(estimate))
+
+    # ---- storage ----
+
+    def to_bytes(self):
+        pairs = [(i, r) for i, r in enumerate(self.registers) if r]
+        if len(pairs) * 3 < REGISTERS:
+            return SPARSE + b''.join(struct.pack('>HB', i, r) for i, r in pairs)
+        return DENSE + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = bytes(data or b'')
+        sketch = cls()
+        if not data:
+            return sketch
+        kind, body = data[:1], data[1:]
+        if kind == DENSE:
+            sketch.registers = bytearray(body)
+        elif kind == SPARSE:
+            for i, r in struct.iter_unpack('>HB', body):
+                sketch.registers[i] = r
+        else:
+            raise ValueError("Unknown sketch encoding")
+        return sketch
+
+
+def merged(sketches):
+    """Merge an iterable of stored sketches (bytes) into one HyperLogLog"""
+    result = HyperLogLog()
+    for data in sketches:
+        if data:
+            result.merge(HyperLogLog.from_bytes(data))
+    return result
@@ -0,0 +1,93 @@
+"""
+Incrementally maintained counters for the admin overview.
+
+Each counter counts the rows of one model matching simple field filters.
+Signals in products.signals adjust the stored value by +/-1 as rows are
+created, deleted or move in and out of the filter, so reading the overview
+is a single primary-key scan of DashboardCounter regardless of table size.
+Missing rows (fresh install, or after `manage.py rebuild_kpi_counters`
+cleared them) are recomputed on read with one conditional aggregate per
+model. Queryset.update()/delete() bypass signals; rebuild after bulk edits.
+"""
+from collections import defaultdict
+
+from django.apps import apps
+from django.db.models import Count, F, Q
+
+# counter name -> (model label, field filters)
+COUNTERS = {
+    'total_products': ('products.Product', {}),
+    'active_products': ('products.Product', {'is_active': True}),
+    'total_services': ('products.StoreService', {}),
+    'pending_quotations': ('products.QuotationRequest', {'status': 'pending'}),
+    'staff_count': ('hr.StaffProfile', {}),
+}
+
+
+def counted_models():
+    return {apps.get_model(label) for label, _ in COUNTERS.values()}
+
+
+def counters_for(model):
+    label = model._meta.label
+    return {name: filters for name, (counter_label, filters) in COUNTERS.items() if counter_label == label}
+
+
+def tracked_fields(model):
+    return sorted({field for filters in counters_for(model).values() for field in filters})
+
+
+def matches(values, filters):
+    return all(values.get(field) == expected for field, expected in filters.items())
+
+
+def adjust(deltas):
+    """Apply {counter name: delta}; counters without a row are left for the lazy rebuild"""
+    from .models import DashboardCounter
+
+    for name, delta in deltas.items():
+        if delta:
+            DashboardCounter.objects.filter(name=name).update(value=F('value') + delta)
+
+
+def deltas_for_change(model, before, after):
+    """Counter deltas when a row goes from `before` to `after` (dicts of tracked fields, None = absent)"""
+    deltas = {}
+    for name, filters in counters_for(model).items():
+        was = before is not None and matches(before, filters)
+        now = after is not None and matches(after, filters)
+        deltas[name] = int(now) - int(was)
+    return deltas
+
+
+def rebuild(names=None):
+    """Recompute counters with one conditional aggregate per model; returns {name: value}"""
+    from .models import DashboardCounter
+
+    names = list(names or COUNTERS)
+    by_model = defaultdict(list)
+    for name in names:
+        by_model[COUNTERS[name][0]].append(name)
+
+    values = {}
+    for label, model_counters in by_model.items():
+        values.update(apps.get_model(label).objects.aggregate(**{
+            name: Count('pk', filter=Q(**COUNTERS[name][1])) if COUNTERS[name][1] else Count('pk')
+            for name in model_counters
+        }))
+    DashboardCounter.objects.bulk_create(
+        [DashboardCounter(name=name, value=value) for name, value in values.items()],
+        update_conflicts=True, unique_fields=['name'], update_fields=['value'],
+    )
+    return values
+
+
+def read():
+    """Current value of every counter"""
+    from .models import DashboardCounter
+
+    values = dict(DashboardCounter.objects.filter(name__in=COUNTERS).values_list('name', 'value'))
+    missing = [name for name in COUNTERS if name not in values]
+    if missing:
+        values.update(rebuild(missing))
+    return {name: values[name] for name in COUNTERS}
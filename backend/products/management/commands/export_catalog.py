@@ -0,0 +1,43 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.utils.streaming import DEFAULT_CHUNK_SIZE
+from products import catalog_export
+
+
+class Command(BaseCommand):
+    help = "Export the product catalog as CSV, JSONL or columnar JSONL, streaming in constant memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Output file, or - for stdout")
+        parser.add_argument('--format', choices=catalog_export.FORMATS, default='csv')
+        parser.add_argument('--gzip', action='store_true', help="Gzip the output (implied by a .gz path)")
+        parser.add_argument('--active-only', action='store_true')
+        parser.add_argument('--category', help="Only products in this category slug")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        compress = options['gzip'] or path.endswith('.gz')
+        queryset = catalog_export.export_queryset(
+            active_only=options['active_only'], category=options['category']
+        )
+        pieces = catalog_export.export_catalog(
+            options['format'], queryset, compress=compress, chunk_size=options['chunk_size']
+        )
+
+        try:
+            output = sys.stdout.buffer if path == '-' else open(path, 'wb')
+        except OSError as exc:
+            raise CommandError(str(exc))
+        written = 0
+        try:
+            for piece in pieces:
+                output.write(piece)
+                written += len(piece)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+        if path != '-':
+            self.stdout.write(self.style.SUCCESS(f"Wrote {written} bytes to {path}"))
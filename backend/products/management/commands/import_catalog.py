@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.catalog_import import DEFAULT_BATCH_SIZE, FORMATS, detect_format, import_catalog
+
+
+class Command(BaseCommand):
+    help = "Bulk import products from a CSV or JSON Lines file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to the file extension")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Validate only, write nothing")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or detect_format(options['path'])
+        if fmt is None:
+            raise CommandError("Cannot tell the format from the file name; pass --format")
+
+        def progress(report):
+            self.stdout.write(f"{report.rows} rows read, {report.created} created, {report.error_count} errors")
+
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                report = import_catalog(
+                    stream, fmt, batch_size=options['batch_size'], dry_run=options['dry_run'], progress=progress
+                )
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        for error in report.errors:
+            self.stdout.write(self.style.WARNING(f"line {error['line']}: {json.dumps(error['errors'])}"))
+        if report.error_count > len(report.errors):
+            self.stdout.write(self.style.WARNING(f"... {report.error_count - len(report.errors)} more errors"))
+        if report.dry_run:
+            summary = f"{report.rows} rows: {report.valid} valid, {report.error_count} errors (dry run, nothing written)"
+        else:
+            summary = f"{report.rows} rows: {report.created} created, {report.error_count} errors"
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from products import kpis
+
+
+class Command(BaseCommand):
+    help = "Recompute the admin overview counters from the database to repair drift"
+
+    def handle(self, *args, **options):
+        for name, value in kpis.rebuild().items():
+            self.stdout.write(f"{name}: {value}")
+        self.stdout.write(self.style.SUCCESS("Rebuilt KPI counters"))
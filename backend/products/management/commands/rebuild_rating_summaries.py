@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from products.models import ProductRatingSummary
+
+
+class Command(BaseCommand):
+    help = "Recompute product rating summaries from approved reviews to repair drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--product', type=int, action='append', dest='product_ids',
+            help="Only rebuild the given product ID (repeatable)"
+        )
+
+    def handle(self, *args, **options):
+        written = ProductRatingSummary.rebuild(options['product_ids'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} rating summaries"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products import trending
+
+
+class Command(BaseCommand):
+    help = "Recompute trending scores from raw product views and quotation requests"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help="How much history to replay (default: 30)")
+
+    def handle(self, *args, **options):
+        written = trending.rebuild(days=options['days'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt trending scores for {written} products"))
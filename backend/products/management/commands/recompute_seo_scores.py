@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from accounts.utils.models import bulk_refresh_seo
+from portfolio.models import PortfolioProject
+from products.models import Product, StoreService
+
+MODELS = {
+    'product': Product,
+    'service': StoreService,
+    'portfolio': PortfolioProject,
+}
+
+
+class Command(BaseCommand):
+    help = "Recompute stored SEO scores and missing-field masks in bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', choices=sorted(MODELS), action='append', dest='models',
+            help="Only recompute the given model (repeatable)"
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for name in options['models'] or MODELS:
+            changed = bulk_refresh_seo(MODELS[name].objects.all(), batch_size=options['batch_size'])
+            self.stdout.write(f"{name}: {changed} updated")
+        self.stdout.write(self.style.SUCCESS("SEO scores recomputed"))
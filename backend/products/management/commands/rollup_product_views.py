@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from products import analytics
+
+
+class Command(BaseCommand):
+    help = "Flush buffered product views, recompute recent daily rollups and prune old raw view events"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2, help="Recompute rollups for the last N days")
+        parser.add_argument(
+            '--retention-days', type=int,
+            default=getattr(settings, 'PRODUCT_VIEW_RETENTION_DAYS', 90),
+            help="Delete raw ProductView rows older than this (0 keeps everything)"
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        analytics.product_views.flush()
+
+        written = analytics.rollup_product_views(today - timedelta(days=options['days']))
+        self.stdout.write(f"Recomputed {written} daily rollups")
+
+        retention = options['retention_days']
+        if retention:
+            # Never prune rows that the rollup window above still reads
+            cutoff = today - timedelta(days=max(retention, options['days'] + 1))
+            deleted = analytics.prune_product_views(cutoff)
+            self.stdout.write(f"Pruned {deleted} raw view events before {cutoff}")
+
+        self.stdout.write(self.style.SUCCESS("Product view rollup complete"))
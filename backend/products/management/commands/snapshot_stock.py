@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products import stock
+
+
+class Command(BaseCommand):
+    help = "Fold recent stock ledger movements into per-product snapshots (run daily from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        written = stock.take_snapshots(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} stock snapshots"))
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_rating_summaries(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductRatingSummary = apps.get_model('products', 'ProductRatingSummary')
+    approved = models.Q(reviews__is_approved=True)
+    stats = Product.objects.values('id').annotate(
+        review_count=models.Count('reviews', filter=approved),
+        rating_total=models.Sum('reviews__rating', filter=approved),
+        **{
+            f'star_{star}': models.Count('reviews', filter=approved & models.Q(reviews__rating=star))
+            for star in range(1, 6)
+        }
+    )
+    summaries = []
+    for row in stats:
+        product_id = row.pop('id')
+        row['rating_total'] = row['rating_total'] or 0
+        row['average_rating'] = row['rating_total'] / row['review_count'] if row['review_count'] else 0
+        summaries.append(ProductRatingSummary(product_id=product_id, **row))
+    ProductRatingSummary.objects.bulk_create(summaries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRatingSummary',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to='products.product')),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_total', models.PositiveIntegerField(default=0)),
+                ('average_rating', models.FloatField(db_index=True, default=0)),
+                ('star_1', models.PositiveIntegerField(default=0)),
+                ('star_2', models.PositiveIntegerField(default=0)),
+                ('star_3', models.PositiveIntegerField(default=0)),
+                ('star_4', models.PositiveIntegerField(default=0)),
+                ('star_5', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Product rating summaries',
+            },
+        ),
+        migrations.RunPython(backfill_rating_summaries, migrations.RunPython.noop),
+    ]
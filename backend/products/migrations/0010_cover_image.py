@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_cover_images(apps, schema_editor):
+    for model_name, image_model_name, fk in [('Product', 'ProductImage', 'product'), ('StoreService', 'StoreServiceImage', 'service')]:
+        Model = apps.get_model('products', model_name)
+        Image = apps.get_model('products', image_model_name)
+        for obj in Model.objects.all():
+            cover = Image.objects.filter(**{fk: obj}).order_by('-is_primary', 'order', 'id').first()
+            if cover:
+                Model.objects.filter(pk=obj.pk).update(cover_image=cover)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_productratingsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='cover_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='products.productimage'),
+        ),
+        migrations.AddField(
+            model_name='storeservice',
+            name='cover_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='products.storeserviceimage'),
+        ),
+        migrations.RunPython(backfill_cover_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:46
+
+from django.db import migrations, models
+
+
+def backfill_product_counts(apps, schema_editor):
+    Category = apps.get_model('products', 'Category')
+    counts = Category.objects.annotate(
+        total=models.Count('products'),
+        active=models.Count('products', filter=models.Q(products__is_active=True)),
+    ).values_list('pk', 'total', 'active')
+    for pk, total, active in counts:
+        Category.objects.filter(pk=pk).update(product_count=total, active_product_count=active)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_cover_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='active_product_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='product_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_product_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:50
+
+from django.db import migrations
+
+from products import search
+
+
+def create_search_index(apps, schema_editor):
+    search.create_index_table(schema_editor)
+    if not search.is_supported(schema_editor.connection.vendor):
+        return
+
+    Product = apps.get_model('products', 'Product')
+    products = Product.objects.filter(is_active=True).select_related('category').prefetch_related(
+        'materials', 'specifications'
+    )
+    search.write_documents([(p.id, search.build_document(p)) for p in products])
+
+
+def drop_search_index(apps, schema_editor):
+    search.drop_index_table(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_category_product_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
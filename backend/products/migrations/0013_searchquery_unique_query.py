@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:49
+
+from django.db import migrations, models
+
+
+def merge_duplicate_queries(apps, schema_editor):
+    """Fold rows into one per normalized query before adding the unique constraint"""
+    SearchQuery = apps.get_model('products', 'SearchQuery')
+    keep = {}
+    for row in SearchQuery.objects.order_by('-last_searched'):
+        query = ' '.join(row.query.lower().split())[:255]
+        if query in keep:
+            kept = keep[query]
+            kept.count += row.count
+            kept.created_at = min(kept.created_at, row.created_at)
+            row.delete()
+        else:
+            row.query = query
+            keep[query] = row
+    for row in keep.values():
+        SearchQuery.objects.filter(pk=row.pk).update(query=row.query, count=row.count, created_at=row.created_at)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_product_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_queries, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='searchquery',
+            name='query',
+            field=models.CharField(max_length=255, unique=True),
+        ),
+    ]
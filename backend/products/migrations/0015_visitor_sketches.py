@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0014_productviewdaily'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteVisitorDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('visitor_sketch', models.BinaryField(default=bytes)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddField(
+            model_name='productviewdaily',
+            name='visitor_sketch',
+            field=models.BinaryField(default=bytes, help_text='HyperLogLog of distinct visitors'),
+        ),
+    ]
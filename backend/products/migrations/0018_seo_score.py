@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:57
+
+from django.db import migrations, models
+
+
+# Frozen copy of the SEO checks at the time of this migration, so later
+# edits to accounts.utils.models.SEO_CHECKS never change what it computes.
+# (bit, source field, penalty, thin-content check)
+SEO_CHECKS = (
+    (1, 'meta_description', 25, False),
+    (2, 'meta_keywords', 15, False),
+    (4, 'description', 35, False),
+    (8, 'description', 20, True),
+)
+SEO_MIN_DESCRIPTION_LENGTH = 100
+
+
+def evaluate_seo(obj, field_names):
+    missing = 0
+    for flag, field, _, thin in SEO_CHECKS:
+        if field not in field_names:
+            continue
+        value = (getattr(obj, field) or '').strip()
+        if (value and len(value) < SEO_MIN_DESCRIPTION_LENGTH) if thin else not value:
+            missing |= flag
+    score = 100 - sum(penalty for flag, _, penalty, _ in SEO_CHECKS if missing & flag)
+    return max(score, 0), missing
+
+
+def backfill(model, batch_size=500):
+    field_names = {field.name for field in model._meta.concrete_fields}
+    sources = {field for _, field, _, _ in SEO_CHECKS if field in field_names}
+    batch = []
+    for obj in model.objects.only('pk', *sources).order_by('pk').iterator(chunk_size=batch_size):
+        obj.seo_score, obj.seo_missing = evaluate_seo(obj, field_names)
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            model.objects.bulk_update(batch, ['seo_score', 'seo_missing'])
+            batch = []
+    if batch:
+        model.objects.bulk_update(batch, ['seo_score', 'seo_missing'])
+
+
+def backfill_seo_scores(apps, schema_editor):
+    backfill(apps.get_model('products', 'Product'))
+    backfill(apps.get_model('products', 'StoreService'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0017_dashboardcounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='seo_missing',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='seo_score',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='storeservice',
+            name='seo_missing',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='storeservice',
+            name='seo_score',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'seo_score', 'id'], name='product_active_seo_idx'),
+        ),
+        migrations.RunPython(backfill_seo_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:58
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def populate_material_slugs(apps, schema_editor):
+    Material = apps.get_model('products', 'Material')
+    taken = set()
+    for material in Material.objects.order_by('id'):
+        base = slugify(material.name) or f'material-{material.pk}'
+        slug, n = base, 2
+        while slug in taken:
+            slug, n = f'{base}-{n}', n + 1
+        taken.add(slug)
+        Material.objects.filter(pk=material.pk).update(slug=slug)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0018_seo_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='material',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=100),
+        ),
+        migrations.RunPython(populate_material_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='material',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=100, unique=True),
+        ),
+    ]
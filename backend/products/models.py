@@ -1,16 +1,27 @@
 from django.db import models
+from django.db.models.functions import Cast, Coalesce, NullIf
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 from django.utils.text import slugify
 
+from accounts.utils.models import MaintainedFieldsMixin, SeoScoreMixin
 
-class Category(models.Model):
+
+class Category(MaintainedFieldsMixin, models.Model):
     """Product/Service categories"""
+    MAINTAINED_FIELDS = ('product_count', 'active_product_count')
+
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True, blank=True)
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to='categories/', blank=True, null=True)
     is_active = models.BooleanField(default=True)
+    
+    # Product counters - maintained by Product signals
+    product_count = models.PositiveIntegerField(default=0, editable=False)
+    active_product_count = models.PositiveIntegerField(default=0, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -23,6 +34,26 @@ class Category(models.Model):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
+    @classmethod
+    def adjust_product_counts(cls, category_id, total=0, active=0):
+        cls.objects.filter(pk=category_id).update(
+            product_count=models.F('product_count') + total,
+            active_product_count=models.F('active_product_count') + active,
+        )
+
+    @classmethod
+    def refresh_product_counts(cls, category_ids=None):
+        """Recount from the products table (for bulk writes that skip signals)"""
+        categories = cls.objects.all()
+        if category_ids is not None:
+            categories = categories.filter(pk__in=category_ids)
+        counts = categories.annotate(
+            total=models.Count('products'),
+            active=models.Count('products', filter=models.Q(products__is_active=True)),
+        ).values_list('pk', 'total', 'active')
+        for pk, total, active in counts:
+            cls.objects.filter(pk=pk).update(product_count=total, active_product_count=active)
+
     def __str__(self):
         return self.name
 
@@ -30,6 +61,7 @@ class Category(models.Model):
 class Material(models.Model):
     """Materials used in fabrication"""
     name = models.CharField(max_length=100, unique=True)
+    slug = models.SlugField(max_length=100, unique=True, blank=True)
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to='materials/', blank=True, null=True)
     is_active = models.BooleanField(default=True)
@@ -39,11 +71,46 @@ class Material(models.Model):
     class Meta:
         ordering = ['name']
     
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = slugify(self.name)
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return self.name
 
-class Product(models.Model):
+class ProductQuerySet(models.QuerySet):
+    """Stock states as SQL, matching the is_in_stock / is_low_stock properties"""
+
+    def in_stock(self):
+        return self.filter(stock_quantity__gt=0)
+
+    def out_of_stock(self):
+        return self.filter(stock_quantity__lte=0)
+
+    def low_stock(self):
+        return self.filter(stock_quantity__gt=0, stock_quantity__lte=models.F('low_stock_threshold'))
+
+    def needs_restock(self):
+        """Low or out of stock; active rows are covered by the product_restock_idx partial index"""
+        return self.filter(stock_quantity__lte=models.F('low_stock_threshold'))
+
+    def with_stock_status(self):
+        return self.annotate(
+            stock_status=models.Case(
+                models.When(stock_quantity__lte=0, then=models.Value('out_of_stock')),
+                models.When(stock_quantity__lte=models.F('low_stock_threshold'), then=models.Value('low_stock')),
+                default=models.Value('in_stock'),
+            ),
+            stock_shortfall=models.F('low_stock_threshold') - models.F('stock_quantity'),
+        )
+
+
+class Product(MaintainedFieldsMixin, SeoScoreMixin, models.Model):
     """Products available for purchase or quotation"""
+    # stock_quantity only moves through the ledger (products.stock)
+    MAINTAINED_FIELDS = ('cover_image', 'stock_quantity')
+
     PRODUCT_TYPE_CHOICES = [
         ('standard', 'Standard Product'),
         ('custom', 'Custom Product'),
@@ -87,15 +154,30 @@ class Product(models.Model):
     meta_keywords = models.CharField(max_length=200, blank=True)
     focus_keyword = models.CharField(max_length=100, blank=True)
     
+    # Card image (primary image, else first by order) - maintained by ProductImage
+    cover_image = models.ForeignKey('ProductImage', related_name='+', on_delete=models.SET_NULL, null=True, blank=True, editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['slug']),
             models.Index(fields=['category', 'is_active']),
+            # Keyset pagination seeks on (ordering column, id)
+            models.Index(fields=['is_active', 'created_at', 'id'], name='product_active_created_idx'),
+            models.Index(fields=['is_active', 'base_price', 'id'], name='product_active_price_idx'),
+            # Worst SEO offenders first
+            models.Index(fields=['is_active', 'seo_score', 'id'], name='product_active_seo_idx'),
+            # Low-stock feed: only active rows at or under their threshold, emptiest first
+            models.Index(
+                fields=['stock_quantity', 'id'], name='product_restock_idx',
+                condition=models.Q(is_active=True, stock_quantity__lte=models.F('low_stock_threshold')),
+            ),
         ]
 
     def save(self, *args, **kwargs):
@@ -103,6 +185,11 @@ class Product(models.Model):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
+    def refresh_cover_image(self):
+        cover = self.images.order_by('-is_primary', 'order', 'id').first()
+        Product.objects.filter(pk=self.pk).update(cover_image=cover)
+        self.cover_image = cover
+
     @property
     def is_in_stock(self):
         return self.stock_quantity > 0
@@ -132,6 +219,7 @@ class ProductImage(models.Model):
         if self.is_primary:
             ProductImage.objects.filter(product=self.product, is_primary=True).update(is_primary=False)
         super().save(*args, **kwargs)
+        self.product.refresh_cover_image()
 
     def __str__(self):
         return f"{self.product.name} - Image {self.order}"
@@ -176,6 +264,75 @@ class Review(models.Model):
         return f"{self.user.username} - {self.product.name} ({self.rating}★)"
 
 
+class ProductRatingSummary(models.Model):
+    """Denormalized rating totals for approved reviews, maintained by signals"""
+    product = models.OneToOneField(Product, related_name='rating_summary', on_delete=models.CASCADE, primary_key=True)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_total = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(default=0, db_index=True)
+
+    # Histogram of approved ratings
+    star_1 = models.PositiveIntegerField(default=0)
+    star_2 = models.PositiveIntegerField(default=0)
+    star_3 = models.PositiveIntegerField(default=0)
+    star_4 = models.PositiveIntegerField(default=0)
+    star_5 = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Product rating summaries'
+
+    @property
+    def histogram(self):
+        return {star: getattr(self, f'star_{star}') for star in range(1, 6)}
+
+    @classmethod
+    def apply_delta(cls, product_id, rating, sign):
+        """Add (sign=1) or remove (sign=-1) one approved rating; returns False if no summary row exists"""
+        updated = cls.objects.filter(product_id=product_id).update(**{
+            'review_count': models.F('review_count') + sign,
+            'rating_total': models.F('rating_total') + sign * rating,
+            f'star_{rating}': models.F(f'star_{rating}') + sign,
+        })
+        if not updated:
+            return False
+        cls.objects.filter(product_id=product_id).update(average_rating=Coalesce(
+            Cast('rating_total', models.FloatField()) / NullIf('review_count', 0),
+            models.Value(0.0),
+        ))
+        return True
+
+    @classmethod
+    def rebuild(cls, product_ids=None):
+        """Recompute summaries from the reviews table; returns rows written"""
+        products = Product.objects.all()
+        if product_ids is not None:
+            products = products.filter(id__in=product_ids)
+
+        approved = models.Q(reviews__is_approved=True)
+        stats = products.values('id').annotate(
+            review_count=models.Count('reviews', filter=approved),
+            rating_total=Coalesce(models.Sum('reviews__rating', filter=approved), 0),
+            **{
+                f'star_{star}': models.Count('reviews', filter=approved & models.Q(reviews__rating=star))
+                for star in range(1, 6)
+            }
+        )
+
+        written = 0
+        for row in stats:
+            product_id = row.pop('id')
+            count = row['review_count']
+            row['average_rating'] = row['rating_total'] / count if count else 0
+            cls.objects.update_or_create(product_id=product_id, defaults=row)
+            written += 1
+        return written
+
+    def __str__(self):
+        return f"{self.product.name} - {self.average_rating:.1f} ({self.review_count})"
+
+
 class QuotationRequest(models.Model):
     """Customer quotation requests"""
     STATUS_CHOICES = [
@@ -308,8 +465,10 @@ class ServiceBooking(models.Model):
         return f"Booking #{self.id} - {self.user.username} - {self.service_type}"
 
 
-class StoreService(models.Model):
+class StoreService(MaintainedFieldsMixin, SeoScoreMixin, models.Model):
     """Dynamic services offered by the company"""
+    MAINTAINED_FIELDS = ('cover_image',)
+
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True, blank=True)
     category = models.CharField(max_length=100, help_text="e.g., Construction, Fabrication, Furniture")
@@ -319,6 +478,9 @@ class StoreService(models.Model):
     is_active = models.BooleanField(default=True)
     order = models.IntegerField(default=0)
     
+    # Card image (primary gallery image, else first by order) - maintained by StoreServiceImage
+    cover_image = models.ForeignKey('StoreServiceImage', related_name='+', on_delete=models.SET_NULL, null=True, blank=True, editable=False)
+    
     # SEO
     meta_title = models.CharField(max_length=200, blank=True)
     meta_description = models.CharField(max_length=160, blank=True)
@@ -336,6 +498,11 @@ class StoreService(models.Model):
             self.slug = slugify(self.title)
         super().save(*args, **kwargs)
 
+    def refresh_cover_image(self):
+        cover = self.images.order_by('-is_primary', 'order', 'id').first()
+        StoreService.objects.filter(pk=self.pk).update(cover_image=cover)
+        self.cover_image = cover
+
     def __str__(self):
         return self.title
 
@@ -351,14 +518,21 @@ class StoreServiceImage(models.Model):
 
     class Meta:
         ordering = ['order', '-is_primary']
+
+    def save(self, *args, **kwargs):
+        # Ensure only one primary image per service
+        if self.is_primary:
+            StoreServiceImage.objects.filter(service=self.service, is_primary=True).update(is_primary=False)
+        super().save(*args, **kwargs)
+        self.service.refresh_cover_image()
     
     def __str__(self):
         return f"{self.service.title} - Image {self.order}"
 
 
 class SearchQuery(models.Model):
-    """Tracking user search behavior for analytics"""
-    query = models.CharField(max_length=255)
+    """Tracking user search behavior for analytics (one row per normalized query)"""
+    query = models.CharField(max_length=255, unique=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     count = models.PositiveIntegerField(default=1)
@@ -374,11 +548,123 @@ class SearchQuery(models.Model):
 
 
 class ProductView(models.Model):
-    """Tracking product views for analytics"""
+    """Tracking product views for analytics (raw events, written in batches by products.analytics)"""
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='views')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
-    viewed_at = models.DateTimeField(auto_now_add=True)
+    viewed_at = models.DateTimeField(default=timezone.now, db_index=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
 
     def __str__(self):
         return f"View of {self.product.name} at {self.viewed_at}"
+
+
+class ProductViewDaily(models.Model):
+    """Daily per-product view rollup read by the analytics dashboard"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_views')
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    visitor_sketch = models.BinaryField(default=bytes, editable=False, help_text="HyperLogLog of distinct visitors")
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'date'], name='unique_product_view_day'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'product']),
+        ]
+
+    def __str__(self):
+        return f"{self.product.name} - {self.date}: {self.views}"
+
+
+class ProductTrend(models.Model):
+    """
+    Exponentially decayed activity score, stored relative to a fixed epoch
+    (see products.trending) so events only ever add to it.
+    """
+    product = models.OneToOneField(Product, related_name='trend', on_delete=models.CASCADE, primary_key=True)
+    score = models.FloatField(default=0, db_index=True)
+
+    def __str__(self):
+        return f"{self.product.name} - {self.score:.3g}"
+
+
+class SiteVisitorDaily(models.Model):
+    """Site-wide daily HyperLogLog of product page visitors"""
+    date = models.DateField(unique=True)
+    visitor_sketch = models.BinaryField(default=bytes, editable=False)
+
+    class Meta:
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"Visitors on {self.date}"
+
+
+class DashboardCounter(models.Model):
+    """Incrementally maintained KPI shown on the admin overview (see products.kpis)"""
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
+class StockMovement(models.Model):
+    """
+    Append-only stock ledger. Each row is a signed change to
+    Product.stock_quantity, applied atomically by products.stock.
+    """
+    KIND_CHOICES = [
+        ('receipt', 'Receipt'),
+        ('reservation', 'Reservation'),
+        ('release', 'Reservation Released'),
+        ('adjustment', 'Adjustment'),
+    ]
+
+    product = models.ForeignKey(Product, related_name='stock_movements', on_delete=models.CASCADE)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    quantity = models.IntegerField(help_text="Signed change to stock")
+    reference = models.CharField(max_length=100, blank=True, help_text="Order, PO or quotation reference")
+    note = models.CharField(max_length=255, blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='+', on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['product', 'id'], name='stock_movement_product_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Stock movements are append-only; record a correcting movement instead")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.product.name}: {self.quantity:+d} ({self.kind})"
+
+
+class StockSnapshot(models.Model):
+    """
+    Stock of one product after every ledger movement up to last_movement_id
+    (taken by `manage.py snapshot_stock`), so as-of queries only sum the
+    movements since the nearest snapshot.
+    """
+    product = models.ForeignKey(Product, related_name='stock_snapshots', on_delete=models.CASCADE)
+    last_movement_id = models.BigIntegerField(help_text="Ledger position the snapshot includes")
+    taken_at = models.DateTimeField(help_text="Time of the last included movement")
+    quantity = models.IntegerField()
+
+    class Meta:
+        ordering = ['-last_movement_id']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'last_movement_id'], name='stock_snapshot_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['product', 'taken_at'], name='stock_snapshot_product_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product.name} @ {self.taken_at}: {self.quantity}"
@@ -0,0 +1,152 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    """Raised when a client sends a cursor we did not issue"""
+
+
+class KeysetPaginator:
+    """
+    Keyset (cursor) pagination for product listings.
+
+    Pages are addressed by the last row of the previous page instead of an
+    OFFSET, so page 500 costs the same index seek as page 1. The cursor is an
+    opaque base64 token holding the active ordering, the ordering value of the
+    last row and its id (used as the tie-breaker).
+    """
+    # ordering param -> (model field, value parser)
+    ORDERINGS = {
+        'created_at': ('created_at', datetime.fromisoformat),
+        'base_price': ('base_price', Decimal),
+        'name': ('name', str),
+        'id': ('id', int),
+        'average_rating': ('rating_summary__average_rating', float),
+    }
+    DEFAULT_ORDERING = '-created_at'
+    DEFAULT_PAGE_SIZE = 24
+    MAX_PAGE_SIZE = 100
+
+    def __init__(self, ordering=None, page_size=None, cursor=None):
+        self.ordering = ordering or self.DEFAULT_ORDERING
+        if self.ordering.lstrip('-') not in self.ORDERINGS:
+            raise InvalidCursor(f"Unsupported ordering '{self.ordering}' for cursor pagination")
+        self.descending = self.ordering.startswith('-')
+        self.field, self.parse_value = self.ORDERINGS[self.ordering.lstrip('-')]
+        self.page_size = self._clean_page_size(page_size)
+        self.position = self.decode_cursor(cursor) if cursor else None
+
+    @classmethod
+    def from_request(cls, request):
+        params = request.query_params
+        return cls(
+            ordering=params.get('ordering'),
+            page_size=params.get('page_size'),
+            cursor=params.get('cursor'),
+        )
+
+    @staticmethod
+    def is_requested(request):
+        """Cursor mode is opt-in so existing clients keep the full list"""
+        params = request.query_params
+        return 'cursor' in params or 'page_size' in params
+
+    def _clean_page_size(self, page_size):
+        if page_size in (None, ''):
+            return self.DEFAULT_PAGE_SIZE
+        try:
+            page_size = int(page_size)
+        except (TypeError, ValueError):
+            raise InvalidCursor("page_size must be an integer")
+        return max(1, min(page_size, self.MAX_PAGE_SIZE))
+
+    # ---- cursor encoding ----
+
+    def encode_cursor(self, obj):
+        value = obj
+        for attr in self.field.split('__'):
+            value = getattr(value, attr)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        payload = {'o': self.ordering, 'v': str(value), 'id': obj.pk}
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if payload['o'] != self.ordering:
+                raise InvalidCursor("Cursor was issued for a different ordering")
+            return self.parse_value(payload['v']), int(payload['id'])
+        except InvalidCursor:
+            raise
+        except (KeyError, TypeError, ValueError, InvalidOperation, binascii.Error):
+            raise InvalidCursor("Invalid pagination cursor")
+
+    # ---- querying ----
+
+    def order(self, queryset):
+        prefix = '-' if self.descending else ''
+        return queryset.order_by(f'{prefix}{self.field}', f'{prefix}id')
+
+    def seek(self, queryset):
+        """Restrict the queryset to rows strictly after the cursor position"""
+        if self.position is None:
+            return queryset
+        value, last_id = self.position
+        op = 'lt' if self.descending else 'gt'
+        return queryset.filter(
+            Q(**{f'{self.field}__{op}': value}) |
+            Q(**{self.field: value, f'id__{op}': last_id})
+        )
+
+    def paginate(self, queryset):
+        """Return (rows, next_cursor) for the requested window"""
+        rows = list(self.seek(self.order(queryset))[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        next_cursor = self.encode_cursor(rows[-1]) if has_more and rows else None
+        return rows, next_cursor
+
+
+class SeoOffenderPaginator(KeysetPaginator):
+    """Walks stored SEO scores from the worst up, through the seo_score index"""
+    ORDERINGS = {
+        'seo_score': ('seo_score', int),
+    }
+    DEFAULT_ORDERING = 'seo_score'
+    DEFAULT_PAGE_SIZE = 20
+
+
+class LowStockPaginator(KeysetPaginator):
+    """Walks the restock partial index from the emptiest product up"""
+    ORDERINGS = {
+        'stock_quantity': ('stock_quantity', int),
+    }
+    DEFAULT_ORDERING = 'stock_quantity'
+    DEFAULT_PAGE_SIZE = 50
+
+
+def estimate_count(queryset):
+    """
+    Cheap row count for pagination UIs.
+
+    On PostgreSQL the planner's row estimate is used so no scan happens; other
+    backends fall back to an exact COUNT(*).
+    """
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.order_by().values('id').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    return queryset.order_by().count()
@@ -0,0 +1,202 @@
+"""
+Full-text product search.
+
+Active products are indexed into a side table that is kept in sync by the
+signals in products.signals:
+
+* SQLite  - an FTS5 virtual table ranked with bm25()
+* PostgreSQL - a weighted tsvector column with a GIN index, ranked with ts_rank_cd()
+
+Other backends fall back to the old icontains scan.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+FTS_TABLE = 'products_product_fts'
+
+# Column order of the index; weights are relative importance of a match
+FTS_COLUMNS = ['name', 'description', 'category', 'materials', 'specifications', 'keywords']
+BM25_WEIGHTS = {
+    'name': 10.0,
+    'description': 1.0,
+    'category': 4.0,
+    'materials': 3.0,
+    'specifications': 2.0,
+    'keywords': 6.0,
+}
+# PostgreSQL only supports four weight classes
+TSVECTOR_WEIGHTS = {
+    'name': 'A',
+    'keywords': 'A',
+    'category': 'B',
+    'materials': 'B',
+    'specifications': 'C',
+    'description': 'D',
+}
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_supported(vendor=None):
+    return (vendor or connection.vendor) in ('sqlite', 'postgresql')
+
+
+# ============= SCHEMA =============
+
+def create_index_table(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        columns = ', '.join(FTS_COLUMNS)
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            f"USING fts5({columns}, tokenize='porter unicode61')"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE TABLE IF NOT EXISTS {FTS_TABLE} ("
+            f"product_id bigint PRIMARY KEY REFERENCES products_product(id) ON DELETE CASCADE "
+            f"DEFERRABLE INITIALLY DEFERRED, document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {FTS_TABLE}_document_idx ON {FTS_TABLE} USING GIN (document)"
+        )
+
+
+def drop_index_table(schema_editor):
+    if is_supported(schema_editor.connection.vendor):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+# ============= INDEXING =============
+
+def build_document(product):
+    """Flatten a product into the indexed text columns"""
+    return {
+        'name': product.name,
+        'description': product.description,
+        'category': product.category.name if product.category_id else '',
+        'materials': ' '.join(m.name for m in product.materials.all()),
+        'specifications': ' '.join(f"{s.name} {s.value}" for s in product.specifications.all()),
+        'keywords': ' '.join(filter(None, [product.meta_keywords, product.focus_keyword])),
+    }
+
+
+def index_products(product_ids):
+    """(Re)index the given products; inactive or missing ones are removed"""
+    from .models import Product
+
+    product_ids = list(product_ids)
+    if not product_ids or not is_supported():
+        return
+    products = Product.objects.filter(id__in=product_ids, is_active=True).select_related(
+        'category'
+    ).prefetch_related('materials', 'specifications')
+    documents = [(p.id, build_document(p)) for p in products]
+
+    remove_products(product_ids)
+    write_documents(documents)
+
+
+def write_documents(documents):
+    """Insert (product id, document) pairs; callers remove stale rows first"""
+    if not documents:
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            placeholders = ', '.join(['%s'] * (len(FTS_COLUMNS) + 1))
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) VALUES ({placeholders})",
+                [[pk] + [doc[col] for col in FTS_COLUMNS] for pk, doc in documents]
+            )
+        else:
+            vector = ' || '.join(
+                f"setweight(to_tsvector('english', %s), '{TSVECTOR_WEIGHTS[col]}')" for col in FTS_COLUMNS
+            )
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (product_id, document) VALUES (%s, {vector})",
+                [[pk] + [doc[col] for col in FTS_COLUMNS] for pk, doc in documents]
+            )
+
+
+def remove_products(product_ids):
+    product_ids = list(product_ids)
+    if not product_ids or not is_supported():
+        return
+    key = 'rowid' if connection.vendor == 'sqlite' else 'product_id'
+    placeholders = ', '.join(['%s'] * len(product_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE {key} IN ({placeholders})", product_ids)
+
+
+def rebuild_index(batch_size=500):
+    """Drop and repopulate the whole index; returns the number of products indexed"""
+    from .models import Product
+
+    if not is_supported():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+    ids = list(Product.objects.filter(is_active=True).values_list('id', flat=True))
+    for start in range(0, len(ids), batch_size):
+        index_products(ids[start:start + batch_size])
+    return len(ids)
+
+
+# ============= QUERYING =============
+
+def to_match_expression(query):
+    """Turn free text into a safe prefix-matching FTS5 expression"""
+    tokens = TOKEN_RE.findall(query.lower())
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search_product_ids(query, offset=0, limit=20):
+    """
+    Return (ranked product ids, total matches) for the query.
+
+    Falls back to an unranked icontains scan when the database has no
+    full-text support.
+    """
+    from .models import Product
+
+    if not is_supported():
+        products = Product.objects.filter(
+            Q(name__icontains=query) |
+            Q(description__icontains=query) |
+            Q(category__name__icontains=query) |
+            Q(materials__name__icontains=query),
+            is_active=True
+        ).distinct().order_by('-created_at').values_list('id', flat=True)
+        return list(products[offset:offset + limit]), products.count()
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            match = to_match_expression(query)
+            if not match:
+                return [], 0
+            weights = ', '.join(str(BM25_WEIGHTS[col]) for col in FTS_COLUMNS)
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s OFFSET %s",
+                [match, limit, offset]
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        else:
+            tokens = TOKEN_RE.findall(query.lower())
+            if not tokens:
+                return [], 0
+            tsquery = ' & '.join(f"{token}:*" for token in tokens)
+            cursor.execute(
+                f"SELECT product_id FROM {FTS_TABLE}, to_tsquery('english', %s) q "
+                f"WHERE document @@ q ORDER BY ts_rank_cd(document, q) DESC, product_id LIMIT %s OFFSET %s",
+                [tsquery, limit, offset]
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(
+                f"SELECT count(*) FROM {FTS_TABLE} WHERE document @@ to_tsquery('english', %s)", [tsquery]
+            )
+        total = cursor.fetchone()[0]
+    return ids, total
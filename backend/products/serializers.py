@@ -1,9 +1,12 @@
 from rest_framework import serializers
 from django.db import models
+
+from accounts.utils.fieldsets import SparseFieldsetMixin
+from . import stock
 from .models import (
     Category, Material, Product, ProductImage, Specification,
     Review, QuotationRequest, QuotationAttachment, ServiceBooking,
-    StoreService, StoreServiceImage, SearchQuery, ProductView
+    StoreService, StoreServiceImage, SearchQuery, ProductView, ProductRatingSummary, StockMovement
 )
 
 # ... (Previous code)
@@ -16,8 +19,9 @@ class StoreServiceImageSerializer(serializers.ModelSerializer):
         fields = ['id', 'image', 'alt_text', 'is_primary', 'order']
 
 
-class StoreServiceSerializer(serializers.ModelSerializer):
+class StoreServiceSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     images = StoreServiceImageSerializer(many=True, read_only=True)
+    primary_image = serializers.SerializerMethodField()
     upload_images = serializers.ListField(
         child=serializers.ImageField(),
         write_only=True,
@@ -46,11 +50,24 @@ class StoreServiceSerializer(serializers.ModelSerializer):
     class Meta:
         model = StoreService
         fields = ['id', 'title', 'slug', 'category', 'description', 
-                  'icon_name', 'image', 'images', 'upload_images', 'remove_images',
+                  'icon_name', 'image', 'images', 'primary_image', 'upload_images', 'remove_images',
                   'is_active', 'order', 
                   'meta_title', 'meta_description', 'meta_keywords', 'focus_keyword',
                   'created_at', 'updated_at']
         read_only_fields = ['slug', 'created_at', 'updated_at']
+        select_related_fields = {'primary_image': 'cover_image'}
+        prefetch_related_fields = {'images': 'images'}
+        deferrable_fields = ['description', 'meta_title', 'meta_description', 'meta_keywords', 'focus_keyword']
+
+    def get_primary_image(self, obj):
+        # cover_image is maintained by StoreServiceImage.save (select_related it)
+        cover = obj.cover_image
+        if cover and cover.image:
+            request = self.context.get('request')
+            if request:
+                return request.build_absolute_uri(cover.image.url)
+            return cover.image.url
+        return None
 
     def create(self, validated_data):
         upload_images = validated_data.pop('upload_images', [])
@@ -91,17 +108,16 @@ class StoreServiceSerializer(serializers.ModelSerializer):
         return instance
 
 
-class CategorySerializer(serializers.ModelSerializer):
-    product_count = serializers.SerializerMethodField()
+class CategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # Public count of active products, read from the stored counter
+    product_count = serializers.IntegerField(source='active_product_count', read_only=True)
     image = serializers.ImageField(required=False, allow_null=True)
 
     class Meta:
         model = Category
         fields = ['id', 'name', 'slug', 'description', 'image', 'is_active', 
                   'product_count', 'created_at']
-
-    def get_product_count(self, obj):
-        return obj.products.filter(is_active=True).count()
+        deferrable_fields = ['description']
 
 
 class MaterialSerializer(serializers.ModelSerializer):
@@ -109,8 +125,8 @@ class MaterialSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Material
-        fields = ['id', 'name', 'description', 'image', 'is_active', 'created_at', 'updated_at']
-        read_only_fields = ['created_at', 'updated_at']
+        fields = ['id', 'name', 'slug', 'description', 'image', 'is_active', 'created_at', 'updated_at']
+        read_only_fields = ['slug', 'created_at', 'updated_at']
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
@@ -169,7 +185,20 @@ class ReviewCreateSerializer(serializers.ModelSerializer):
         fields = ['rating', 'title', 'comment']
 
 
-class ProductListSerializer(serializers.ModelSerializer):
+def rating_summary_of(product):
+    """Read the denormalized rating summary (select_related('rating_summary') avoids a query)"""
+    try:
+        summary = product.rating_summary
+    except ProductRatingSummary.DoesNotExist:
+        return {'average_rating': 0, 'review_count': 0, 'histogram': {star: 0 for star in range(1, 6)}}
+    return {
+        'average_rating': round(summary.average_rating, 1),
+        'review_count': summary.review_count,
+        'histogram': summary.histogram,
+    }
+
+
+class ProductListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Simplified serializer for product listing"""
     category = serializers.CharField(source='category.name', read_only=True)
     primary_image = serializers.SerializerMethodField()
@@ -183,12 +212,31 @@ class ProductListSerializer(serializers.ModelSerializer):
                   'base_price', 'is_price_visible', 'primary_image',
                   'is_customizable', 'is_in_stock', 'is_low_stock', 'is_featured',
                   'average_rating', 'review_count', 'created_at', 'is_active']
+        # ?expand=category swaps the name for the full category
+        expandable_fields = {
+            'category': (CategorySerializer, {}),
+            'images': (ProductImageSerializer, {'many': True}),
+            'materials': (MaterialSerializer, {'many': True}),
+            'specifications': (SpecificationSerializer, {'many': True}),
+        }
+        select_related_fields = {
+            'category': 'category',
+            'primary_image': 'cover_image',
+            'average_rating': 'rating_summary',
+            'review_count': 'rating_summary',
+        }
+        prefetch_related_fields = {
+            'images': 'images',
+            'materials': 'materials',
+            'specifications': 'specifications',
+        }
+        deferrable_fields = [
+            'description', 'customization_note', 'meta_title', 'meta_description', 'meta_keywords', 'focus_keyword'
+        ]
 
     def get_primary_image(self, obj):
-        primary_img = obj.images.filter(is_primary=True).first()
-        if not primary_img:
-            primary_img = obj.images.first()
-        
+        # cover_image is maintained by ProductImage.save (select_related it)
+        primary_img = obj.cover_image
         if primary_img and primary_img.image:
             request = self.context.get('request')
             if request:
@@ -197,16 +245,13 @@ class ProductListSerializer(serializers.ModelSerializer):
         return None
 
     def get_average_rating(self, obj):
-        approved_reviews = obj.reviews.filter(is_approved=True)
-        if approved_reviews.exists():
-            return round(sum(r.rating for r in approved_reviews) / approved_reviews.count(), 1)
-        return 0
+        return rating_summary_of(obj)['average_rating']
 
     def get_review_count(self, obj):
-        return obj.reviews.filter(is_approved=True).count()
+        return rating_summary_of(obj)['review_count']
 
 
-class ProductDetailSerializer(serializers.ModelSerializer):
+class ProductDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Detailed serializer for single product view"""
     category = CategorySerializer(read_only=True)
     images = ProductImageSerializer(many=True, read_only=True)
@@ -215,6 +260,7 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     reviews = ReviewSerializer(many=True, read_only=True)
     average_rating = serializers.SerializerMethodField()
     review_count = serializers.SerializerMethodField()
+    rating_histogram = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
@@ -222,17 +268,32 @@ class ProductDetailSerializer(serializers.ModelSerializer):
                   'base_price', 'is_price_visible', 'images', 'materials',
                   'length', 'width', 'height', 'weight', 'is_customizable',
                   'customization_note', 'stock_quantity', 'is_in_stock', 'is_low_stock',
-                  'specifications', 'reviews', 'average_rating', 'review_count',
+                  'specifications', 'reviews', 'average_rating', 'review_count', 'rating_histogram',
                   'is_featured', 'meta_description', 'meta_keywords', 'created_at', 'updated_at']
+        select_related_fields = {
+            'category': 'category',
+            'average_rating': 'rating_summary',
+            'review_count': 'rating_summary',
+            'rating_histogram': 'rating_summary',
+        }
+        prefetch_related_fields = {
+            'images': 'images',
+            'materials': 'materials',
+            'specifications': 'specifications',
+            'reviews': 'reviews__user',
+        }
+        deferrable_fields = [
+            'description', 'customization_note', 'meta_title', 'meta_description', 'meta_keywords', 'focus_keyword'
+        ]
 
     def get_average_rating(self, obj):
-        approved_reviews = obj.reviews.filter(is_approved=True)
-        if approved_reviews.exists():
-            return round(sum(r.rating for r in approved_reviews) / approved_reviews.count(), 1)
-        return 0
+        return rating_summary_of(obj)['average_rating']
 
     def get_review_count(self, obj):
-        return obj.reviews.filter(is_approved=True).count()
+        return rating_summary_of(obj)['review_count']
+
+    def get_rating_histogram(self, obj):
+        return rating_summary_of(obj)['histogram']
 
 
 class ProductCreateUpdateSerializer(serializers.ModelSerializer):
@@ -391,6 +452,7 @@ class ProductCreateUpdateSerializer(serializers.ModelSerializer):
         alt_texts = validated_data.pop('alt_texts', [])
         primary_image_index = validated_data.pop('primary_image_index', None)
         materials = validated_data.pop('materials', None)
+        stock_quantity = validated_data.pop('stock_quantity', None)
         
         # Ensure alt_texts is a list
         if not isinstance(alt_texts, list):
@@ -420,6 +482,13 @@ class ProductCreateUpdateSerializer(serializers.ModelSerializer):
                 })
             raise
         
+        # Stock is only changed through the ledger; an edited value is recorded as a stocktake
+        if stock_quantity is not None:
+            request = self.context.get('request')
+            user = request.user if request and request.user.is_authenticated else None
+            stock.set_quantity(instance.pk, stock_quantity, note="Product edit", user=user)
+            instance.stock_quantity = stock_quantity
+
         # Update materials if provided (materials is now a queryset from validate())
         if materials is not None:
             instance.materials.set(materials)
@@ -447,6 +516,82 @@ class ProductCreateUpdateSerializer(serializers.ModelSerializer):
         return instance
 
 
+class CatalogImportRowSerializer(serializers.ModelSerializer):
+    """
+    One row of a bulk catalog import (validation only, no DB lookups).
+    Category and materials are IDs, slugs or names, resolved by products.catalog_import.
+    """
+    slug = serializers.SlugField(max_length=200, required=False, allow_blank=True)
+    category = serializers.CharField()
+    materials = serializers.ListField(child=serializers.CharField(), required=False)
+    specifications = serializers.ListField(child=serializers.DictField(), required=False)
+
+    class Meta:
+        model = Product
+        fields = ['name', 'slug', 'category', 'description', 'product_type', 'base_price', 'is_price_visible',
+                  'materials', 'length', 'width', 'height', 'weight', 'is_customizable', 'customization_note',
+                  'stock_quantity', 'low_stock_threshold', 'is_active', 'is_featured',
+                  'meta_title', 'meta_description', 'meta_keywords', 'focus_keyword', 'specifications']
+
+    def validate_specifications(self, value):
+        specifications, seen = [], set()
+        for spec in value:
+            name = str(spec.get('name', '')).strip()
+            spec_value = str(spec.get('value', '')).strip()
+            if not name or not spec_value:
+                raise serializers.ValidationError("Each specification needs a name and a value")
+            if len(name) > 100 or len(spec_value) > 200:
+                raise serializers.ValidationError(f'Specification "{name[:100]}" is too long')
+            if name in seen:
+                raise serializers.ValidationError(f'Duplicate specification "{name}"')
+            seen.add(name)
+            specifications.append({'name': name, 'value': spec_value})
+        return specifications
+
+
+class BulkAdjustSerializer(serializers.Serializer):
+    """Filter and change for a set-based price/stock adjustment (see products.bulk_adjust)"""
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+    category = serializers.CharField(required=False, help_text="Category ID or slug")
+    materials = serializers.ListField(child=serializers.CharField(), required=False, help_text="Material IDs or slugs")
+    materials_match = serializers.ChoiceField(choices=['any', 'all'], default='any')
+    product_type = serializers.ChoiceField(choices=Product.PRODUCT_TYPE_CHOICES, required=False)
+    active_only = serializers.BooleanField(default=False)
+
+    price_percent = serializers.DecimalField(
+        max_digits=7, decimal_places=3, min_value=-100, required=False, allow_null=True,
+        help_text="e.g. 7.5 raises prices by 7.5%"
+    )
+    price_delta = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, allow_null=True)
+    stock_delta = serializers.IntegerField(required=False)
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if not any(data.get(key) for key in ('ids', 'category', 'materials', 'product_type')):
+            raise serializers.ValidationError("Select products with ids, category, materials or product_type")
+        if data.get('price_percent') is not None and data.get('price_delta') is not None:
+            raise serializers.ValidationError("Use either price_percent or price_delta, not both")
+        if data.get('price_percent') is None and data.get('price_delta') is None and not data.get('stock_delta'):
+            raise serializers.ValidationError("Nothing to change; give price_percent, price_delta or stock_delta")
+        return data
+
+
+class StockMovementSerializer(serializers.ModelSerializer):
+    created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True, allow_null=True)
+
+    class Meta:
+        model = StockMovement
+        fields = ['id', 'kind', 'quantity', 'reference', 'note', 'created_by_name', 'created_at']
+        read_only_fields = ['created_by_name', 'created_at']
+
+    def validate(self, data):
+        if data['quantity'] == 0:
+            raise serializers.ValidationError({'quantity': 'Quantity must not be zero'})
+        if data['kind'] != 'adjustment' and data['quantity'] < 0:
+            raise serializers.ValidationError({'quantity': 'Give a positive quantity; the kind sets the direction'})
+        return data
+
+
 class QuotationAttachmentSerializer(serializers.ModelSerializer):
     file = serializers.FileField(required=False, allow_null=True)
 
@@ -459,6 +604,7 @@ class QuotationRequestSerializer(serializers.ModelSerializer):
     attachments = QuotationAttachmentSerializer(many=True, read_only=True)
     user_name = serializers.CharField(source='user.get_full_name', read_only=True, allow_null=True)
     product_name = serializers.CharField(source='product.name', read_only=True, allow_null=True)
+    service_name = serializers.CharField(source='service.title', read_only=True, allow_null=True)
     upload_files = serializers.ListField(
         child=serializers.FileField(),
         write_only=True,
@@ -0,0 +1,284 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from . import detail_cache, kpis, search, stock, suggest, trending
+from .versioning import bump_catalog_version
+from .models import (
+    Category, Material, Product, ProductImage, Specification, Review, ProductRatingSummary,
+    StoreService, StoreServiceImage, QuotationRequest
+)
+
+
+# ============= CATEGORY COUNTERS =============
+
+@receiver(pre_save, sender=Product)
+def remember_previous_category(sender, instance, **kwargs):
+    instance._previous_listing = None
+    if instance.pk:
+        instance._previous_listing = Product.objects.filter(pk=instance.pk).values(
+            'category_id', 'is_active', 'slug', 'name', 'is_featured'
+        ).first()
+
+
+@receiver(post_save, sender=Product)
+def update_category_counts_on_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_listing', None)
+    if previous:
+        if (previous['category_id'], previous['is_active']) == (instance.category_id, instance.is_active):
+            return
+        Category.adjust_product_counts(previous['category_id'], total=-1, active=-int(previous['is_active']))
+        detail_cache.invalidate_category(previous['category_id'])
+    Category.adjust_product_counts(instance.category_id, total=1, active=int(instance.is_active))
+    detail_cache.invalidate_category(instance.category_id)
+
+
+@receiver(post_delete, sender=Product)
+def update_category_counts_on_delete(sender, instance, **kwargs):
+    Category.adjust_product_counts(instance.category_id, total=-1, active=-int(instance.is_active))
+    detail_cache.invalidate_category(instance.category_id)
+
+
+# ============= RATING SUMMARY =============
+
+@receiver(post_save, sender=Product)
+def create_rating_summary(sender, instance, created, **kwargs):
+    if created:
+        ProductRatingSummary.objects.get_or_create(product=instance)
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, **kwargs):
+    """Snapshot the stored review so post_save can compute the delta"""
+    instance._previous_rating = None
+    if instance.pk:
+        instance._previous_rating = Review.objects.filter(pk=instance.pk).values(
+            'product_id', 'rating', 'is_approved'
+        ).first()
+
+
+@receiver(post_save, sender=Review)
+def update_rating_summary_on_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_rating', None)
+    current = {
+        'product_id': instance.product_id,
+        'rating': instance.rating,
+        'is_approved': instance.is_approved,
+    }
+    if previous == current:
+        return
+
+    if previous and previous['is_approved']:
+        ProductRatingSummary.apply_delta(previous['product_id'], previous['rating'], -1)
+    if instance.is_approved:
+        if not ProductRatingSummary.apply_delta(instance.product_id, instance.rating, 1):
+            ProductRatingSummary.rebuild([instance.product_id])
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_summary_on_delete(sender, instance, **kwargs):
+    if instance.is_approved:
+        ProductRatingSummary.apply_delta(instance.product_id, instance.rating, -1)
+
+
+# ============= STOCK LEDGER =============
+
+@receiver(post_save, sender=Product)
+def record_opening_stock(sender, instance, created, **kwargs):
+    # Later changes go through products.stock, which writes the ledger itself
+    if created:
+        stock.record_opening_balances([instance])
+
+
+# ============= COVER IMAGES =============
+
+@receiver(post_delete, sender=ProductImage)
+def refresh_product_cover_on_delete(sender, instance, **kwargs):
+    product = Product.objects.filter(pk=instance.product_id).first()
+    if product:
+        product.refresh_cover_image()
+
+
+@receiver(post_delete, sender=StoreServiceImage)
+def refresh_service_cover_on_delete(sender, instance, **kwargs):
+    service = StoreService.objects.filter(pk=instance.service_id).first()
+    if service:
+        service.refresh_cover_image()
+
+
+# ============= SEARCH INDEX =============
+
+@receiver(post_save, sender=Product)
+def index_product_on_save(sender, instance, **kwargs):
+    search.index_products([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_from_index(sender, instance, **kwargs):
+    search.remove_products([instance.pk])
+
+
+@receiver(post_save, sender=Specification)
+@receiver(post_delete, sender=Specification)
+def index_product_on_specification_change(sender, instance, **kwargs):
+    search.index_products([instance.product_id])
+
+
+def products_changed_by_materials(instance, action, reverse, pk_set):
+    """Product ids affected by a materials m2m change (None until the post_* action)"""
+    if action == 'pre_clear' and reverse:
+        # pk_set is not provided for clear(); remember who loses the material
+        instance._cleared_product_ids = list(instance.products.values_list('id', flat=True))
+        return None
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return None
+    if not reverse:
+        return [instance.pk]
+    if action == 'post_clear':
+        return getattr(instance, '_cleared_product_ids', [])
+    return list(pk_set or [])
+
+
+@receiver(m2m_changed, sender=Product.materials.through)
+def index_product_on_materials_change(sender, instance, action, reverse, pk_set, **kwargs):
+    product_ids = products_changed_by_materials(instance, action, reverse, pk_set)
+    if product_ids is not None:
+        search.index_products(product_ids)
+
+
+@receiver(post_save, sender=Category)
+def index_products_on_category_change(sender, instance, created, **kwargs):
+    if not created:
+        search.index_products(instance.products.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Material)
+def index_products_on_material_change(sender, instance, created, **kwargs):
+    if not created:
+        search.index_products(instance.products.values_list('id', flat=True))
+
+
+# ============= PRODUCT DETAIL CACHE =============
+
+@receiver(post_save, sender=Product)
+def invalidate_detail_on_product_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_listing', None) or {}
+    detail_cache.invalidate_slugs([instance.slug, previous.get('slug')])
+
+
+@receiver(post_delete, sender=Product)
+def invalidate_detail_on_product_delete(sender, instance, **kwargs):
+    detail_cache.invalidate_slugs([instance.slug])
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=Specification)
+@receiver(post_delete, sender=Specification)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_detail_on_related_change(sender, instance, **kwargs):
+    detail_cache.invalidate_products([instance.product_id])
+
+
+@receiver(m2m_changed, sender=Product.materials.through)
+def invalidate_detail_on_materials_change(sender, instance, action, reverse, pk_set, **kwargs):
+    product_ids = products_changed_by_materials(instance, action, reverse, pk_set)
+    if product_ids is not None:
+        detail_cache.invalidate_products(product_ids)
+
+
+@receiver(post_save, sender=Material)
+@receiver(pre_delete, sender=Material)
+def invalidate_detail_on_material_change(sender, instance, **kwargs):
+    # pre_delete: the product links are gone by post_delete
+    detail_cache.invalidate_products(instance.products.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Category)
+def invalidate_detail_on_category_change(sender, instance, **kwargs):
+    detail_cache.invalidate_category(instance.pk)
+
+
+
+# ============= TYPEAHEAD =============
+
+SUGGEST_FIELDS = ('name', 'slug', 'is_active', 'is_featured')
+
+
+@receiver(post_save, sender=Product)
+def update_suggestions_on_product_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_listing', None) or {}
+    if not created and all(previous.get(field) == getattr(instance, field) for field in SUGGEST_FIELDS):
+        return
+    product_id, slugs = instance.pk, {slug for slug in (instance.slug, previous.get('slug')) if slug}
+    transaction.on_commit(lambda: suggest.engine.product_changed(product_id, slugs))
+
+
+@receiver(post_delete, sender=Product)
+def update_suggestions_on_product_delete(sender, instance, **kwargs):
+    product_id, slugs = instance.pk, {instance.slug}
+    transaction.on_commit(lambda: suggest.engine.product_changed(product_id, slugs))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Material)
+@receiver(post_delete, sender=Material)
+def rebuild_suggestions_on_term_change(sender, **kwargs):
+    transaction.on_commit(suggest.bump_generation)
+
+# ============= TRENDING =============
+
+@receiver(post_save, sender=QuotationRequest)
+def record_quotation_activity(sender, instance, created, **kwargs):
+    if created and instance.product_id:
+        trending.record([(instance.product_id, trending.QUOTATION_WEIGHT, instance.created_at)])
+
+
+# ============= KPI COUNTERS =============
+
+def remember_previous_kpi_fields(sender, instance, **kwargs):
+    instance._previous_kpi_fields = None
+    fields = kpis.tracked_fields(sender)
+    if instance.pk and fields:
+        instance._previous_kpi_fields = sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+def update_kpi_counters_on_save(sender, instance, created, **kwargs):
+    current = {field: getattr(instance, field) for field in kpis.tracked_fields(sender)}
+    previous = None if created else (getattr(instance, '_previous_kpi_fields', None) or current)
+    kpis.adjust(kpis.deltas_for_change(sender, previous, current))
+
+
+def update_kpi_counters_on_delete(sender, instance, **kwargs):
+    current = {field: getattr(instance, field) for field in kpis.tracked_fields(sender)}
+    kpis.adjust(kpis.deltas_for_change(sender, current, None))
+
+
+for model in kpis.counted_models():
+    pre_save.connect(remember_previous_kpi_fields, sender=model, dispatch_uid=f'kpi_snapshot_{model._meta.label}')
+    post_save.connect(update_kpi_counters_on_save, sender=model, dispatch_uid=f'kpi_save_{model._meta.label}')
+    post_delete.connect(update_kpi_counters_on_delete, sender=model, dispatch_uid=f'kpi_delete_{model._meta.label}')
+
+
+# ============= CATALOG VERSION =============
+
+CATALOG_MODELS = (Category, Material, Product, ProductImage, Specification, Review, StoreService, StoreServiceImage)
+
+
+def bump_version_on_catalog_change(sender, **kwargs):
+    """After commit: an ETag computed before it would carry the new version on a body built from the old rows"""
+    transaction.on_commit(bump_catalog_version)
+
+
+# Connected per sender: a sender-less post_delete receiver would disable fast bulk deletes on every model
+for model in CATALOG_MODELS:
+    post_save.connect(bump_version_on_catalog_change, sender=model, dispatch_uid=f'catalog_version_save_{model.__name__}')
+    post_delete.connect(bump_version_on_catalog_change, sender=model, dispatch_uid=f'catalog_version_delete_{model.__name__}')
+
+
+@receiver(m2m_changed, sender=Product.materials.through)
+def bump_version_on_materials_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(bump_catalog_version)
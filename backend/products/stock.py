@@ -0,0 +1,138 @@
+"""
+Stock ledger.
+
+Every change to Product.stock_quantity is a StockMovement row plus an
+atomic `stock_quantity = stock_quantity + n` UPDATE in the same
+transaction, so concurrent edits add up instead of overwriting each other.
+Product.save() never writes stock_quantity (it is a maintained field).
+Reservations use a guarded UPDATE (`WHERE stock_quantity >= n`) and fail
+with InsufficientStock rather than going negative.
+
+Current stock is the stored column. `manage.py snapshot_stock` (run it
+daily from cron) folds the movements since the previous run into
+StockSnapshot rows, so stock as of any past moment is the nearest
+snapshot plus the movements after it, not a sum over the whole history.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Max, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from . import detail_cache
+from .models import Product, StockMovement, StockSnapshot
+from .versioning import bump_catalog_version
+
+# Receipts and releases add stock, reservations take it; adjustments are signed as given
+SIGNS = {'receipt': 1, 'release': 1, 'reservation': -1}
+OPENING_REFERENCE = 'opening'
+SETTLE_SECONDS = 60
+
+
+class InsufficientStock(Exception):
+    pass
+
+
+def signed_quantity(kind, quantity):
+    sign = SIGNS.get(kind)
+    return sign * abs(quantity) if sign else quantity
+
+
+def _changed(product_ids):
+    product_ids = list(product_ids)
+    transaction.on_commit(lambda: (detail_cache.invalidate_products(product_ids), bump_catalog_version()))
+
+
+def record(product_id, kind, quantity, reference='', note='', user=None):
+    """Append a movement and apply it to the product; returns the StockMovement"""
+    quantity = signed_quantity(kind, quantity)
+    with transaction.atomic():
+        products = Product.objects.filter(pk=product_id)
+        if kind == 'reservation':
+            products = products.filter(stock_quantity__gte=-quantity)
+        if not products.update(stock_quantity=F('stock_quantity') + quantity, updated_at=timezone.now()):
+            if Product.objects.filter(pk=product_id).exists():
+                raise InsufficientStock(f"Not enough stock to reserve {-quantity}")
+            raise Product.DoesNotExist(f"Product {product_id} does not exist")
+        movement = StockMovement.objects.create(
+            product_id=product_id, kind=kind, quantity=quantity,
+            reference=reference, note=note, created_by=user,
+        )
+        _changed([product_id])
+    return movement
+
+
+def set_quantity(product_id, quantity, reference='', note='', user=None):
+    """Stocktake: record the adjustment that brings stock to `quantity`; None if unchanged"""
+    with transaction.atomic():
+        current = Product.objects.select_for_update().values_list('stock_quantity', flat=True).get(pk=product_id)
+        if quantity == current:
+            return None
+        return record(product_id, 'adjustment', quantity - current, reference, note, user)
+
+
+def record_opening_balances(products):
+    """Ledger rows for stock written directly on insert (new or bulk-created products)"""
+    StockMovement.objects.bulk_create([
+        StockMovement(
+            product_id=product.pk, kind='adjustment', quantity=product.stock_quantity,
+            reference=OPENING_REFERENCE, note="Opening stock",
+        )
+        for product in products if product.stock_quantity
+    ])
+
+
+# ============= HISTORY =============
+
+def quantity_as_of(product_id, when):
+    """Stock of a product at a past moment: nearest snapshot plus the movements after it"""
+    snapshot = StockSnapshot.objects.filter(product_id=product_id, taken_at__lte=when).order_by(
+        '-last_movement_id'
+    ).values_list('last_movement_id', 'quantity').first()
+    last_movement_id, quantity = snapshot or (0, 0)
+    since = StockMovement.objects.filter(
+        product_id=product_id, id__gt=last_movement_id, created_at__lte=when
+    ).aggregate(total=Sum('quantity'))['total']
+    return quantity + (since or 0)
+
+
+def take_snapshots(batch_size=1000):
+    """Snapshot every product with movements since the previous run; returns snapshots written"""
+    previous_cutoff = StockSnapshot.objects.aggregate(cutoff=Max('last_movement_id'))['cutoff'] or 0
+    # Leave recent rows for the next run: ids are allocated before commit, so a
+    # slow transaction could still commit a movement below a fresh cutoff
+    settled = timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+    cutoff = StockMovement.objects.filter(id__gt=previous_cutoff, created_at__lte=settled).order_by(
+        '-id'
+    ).values_list('id', 'created_at').first()
+    if cutoff is None:
+        return 0
+    cutoff_id, taken_at = cutoff
+
+    latest = StockSnapshot.objects.filter(product_id=OuterRef('product_id')).order_by('-last_movement_id')
+    deltas = StockMovement.objects.filter(
+        id__gt=previous_cutoff, id__lte=cutoff_id
+    ).values('product_id').annotate(
+        delta=Sum('quantity'),
+        previous=Subquery(latest.values('quantity')[:1]),
+    ).order_by('product_id')
+
+    # One transaction, so a failed run never leaves some products behind the recorded cutoff
+    with transaction.atomic():
+        return _write_snapshots(deltas, cutoff_id, taken_at, batch_size)
+
+
+def _write_snapshots(deltas, cutoff_id, taken_at, batch_size):
+    written, batch = 0, []
+    for row in deltas.iterator(chunk_size=batch_size):
+        batch.append(StockSnapshot(
+            product_id=row['product_id'], last_movement_id=cutoff_id, taken_at=taken_at,
+            quantity=(row['previous'] or 0) + row['delta'],
+        ))
+        if len(batch) >= batch_size:
+            StockSnapshot.objects.bulk_create(batch)
+            written, batch = written + len(batch), []
+    if batch:
+        StockSnapshot.objects.bulk_create(batch)
+        written += len(batch)
+    return written
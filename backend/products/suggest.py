@@ -0,0 +1,229 @@
+"""
+In-process typeahead index for the catalog search box.
+
+Terms (product, category and material names plus popular search queries)
+are kept in a sorted list and looked up with bisect, so a suggestion is a
+binary search plus a short scan. Every word start of a term is indexed, so
+"gate" also finds "Sliding Gate".
+
+Product edits are applied as deltas: after commit the writing process
+drops the product's rows and re-inserts it (copy-on-write, readers never
+see a half-updated list). Each such change, and every category or
+material change, also bumps a shared suggest generation in the cache;
+other processes notice it and rebuild in a background thread while the
+old index keeps serving. Reviews, stock and prices do not touch the
+generation. Popular queries and weights are reloaded the same way once
+the index is MAX_AGE seconds old; only a cold start builds inline.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Q, Sum
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'products:suggest_generation'
+MAX_SCAN = 500           # matching keys examined per lookup
+POPULAR_QUERY_LIMIT = 1000
+MAX_AGE = 300            # seconds before popular queries are reloaded
+
+
+def normalize(text):
+    return ' '.join(text.lower().split())
+
+
+def row_key(row):
+    return row[0]
+
+
+def rows_for(entry):
+    """(key, entry) for every word start of the entry's text"""
+    words = normalize(entry[0]).split(' ')
+    return [(' '.join(words[i:]), entry) for i in range(len(words))]
+
+
+class SuggestIndex:
+    def __init__(self, entries=()):
+        """entries: iterable of (display text, kind, slug, weight)"""
+        best, self.products = {}, {}
+        for entry in entries:
+            text, kind, slug, weight = entry
+            term = normalize(text)
+            if not term:
+                continue
+            if kind == 'product':
+                # One entry per product, so it can be replaced on its own
+                self.products[slug] = entry
+                continue
+            key = (term, kind)
+            if key not in best or weight > best[key][3]:
+                best[key] = entry
+
+        rows = []
+        for entry in [*best.values(), *self.products.values()]:
+            rows.extend(rows_for(entry))
+        rows.sort(key=row_key)
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def replace_products(self, remove=(), add=()):
+        """Drop the products with slugs in `remove`, then insert the `add` entries"""
+        rows = list(self.rows)
+        for slug in remove:
+            entry = self.products.pop(slug, None)
+            if entry is None:
+                continue
+            for key, _ in rows_for(entry):
+                i = bisect_left(rows, key, key=row_key)
+                while i < len(rows) and rows[i][0] == key:
+                    if rows[i][1] is entry:
+                        del rows[i]
+                        break
+                    i += 1
+        for entry in add:
+            if not normalize(entry[0]):
+                continue
+            self.products[entry[2]] = entry
+            for row in rows_for(entry):
+                insort(rows, row, key=row_key)
+        # A single assignment: concurrent lookups see the old list or the new one
+        self.rows = rows
+
+    def suggest(self, prefix, limit=10):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        rows = self.rows
+        start = bisect_left(rows, prefix, key=row_key)
+        candidates = {}
+        for key, (text, kind, slug, weight) in rows[start:start + MAX_SCAN]:
+            if not key.startswith(prefix):
+                break
+            if weight >= candidates.get((text, kind), (-1,))[0]:
+                candidates[(text, kind)] = (weight, text, kind, slug)
+        ranked = sorted(candidates.values(), key=lambda c: (-c[0], len(c[1]), c[1]))
+        return [{'text': text, 'type': kind, 'slug': slug} for _, text, kind, slug in ranked[:limit]]
+
+
+def product_entries(queryset):
+    rows = queryset.filter(is_active=True).values_list(
+        'name', 'slug', 'is_featured', 'rating_summary__review_count'
+    )
+    for name, slug, is_featured, review_count in rows.iterator(chunk_size=2000):
+        yield name, 'product', slug, 1 + (review_count or 0) + (10 if is_featured else 0)
+
+
+def load_entries():
+    from .models import Category, Material, Product, SearchQuery
+
+    yield from product_entries(Product.objects.all())
+
+    for name, slug, count in Category.objects.filter(is_active=True).values_list(
+        'name', 'slug', 'active_product_count'
+    ):
+        yield name, 'category', slug, count
+
+    materials = Material.objects.filter(is_active=True).annotate(
+        product_count=Count('products', filter=Q(products__is_active=True))
+    ).values_list('name', 'product_count')
+    for name, count in materials:
+        yield name, 'material', None, count
+
+    popular = SearchQuery.objects.values('query').annotate(total=Sum('count')).order_by('-total')
+    for row in popular[:POPULAR_QUERY_LIMIT]:
+        yield row['query'], 'query', None, row['total']
+
+
+# ============= GENERATION =============
+
+def get_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+def bump_generation():
+    try:
+        return cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Key evicted or never set
+        cache.add(GENERATION_KEY, 1, timeout=None)
+        return cache.incr(GENERATION_KEY)
+
+
+class SuggestEngine:
+    """Process-wide holder: deltas for product edits, background rebuilds for everything else"""
+
+    def __init__(self):
+        self._index = SuggestIndex()
+        self._generation = None
+        self._built_at = 0
+        self._lock = threading.Lock()
+        self._rebuilding = False
+
+    def is_stale(self, generation):
+        return generation != self._generation or time.monotonic() - self._built_at > MAX_AGE
+
+    def get_index(self):
+        generation = get_generation()
+        if self._generation is None:
+            # Cold start: nothing to serve yet, so build inline (once)
+            with self._lock:
+                if self._generation is None:
+                    self._install(SuggestIndex(load_entries()), generation)
+        elif self.is_stale(generation):
+            self.rebuild_in_background()
+        return self._index
+
+    def _install(self, index, generation):
+        self._index = index
+        self._generation = generation
+        self._built_at = time.monotonic()
+
+    def rebuild_in_background(self):
+        with self._lock:
+            if self._rebuilding:
+                return False
+            self._rebuilding = True
+        threading.Thread(target=self._run_rebuild, name='suggest-rebuild', daemon=True).start()
+        return True
+
+    def _run_rebuild(self):
+        try:
+            # Read first: a change committing during the load bumps past it and triggers another rebuild
+            generation = get_generation()
+            index = SuggestIndex(load_entries())
+            with self._lock:
+                self._install(index, generation)
+        except Exception:
+            logger.exception("Failed to rebuild the suggest index")
+        finally:
+            self._rebuilding = False
+            connection.close()
+
+    def product_changed(self, product_id, slugs):
+        """Apply one product's edit (call after commit); slugs are the ones it was indexed under"""
+        from .models import Product
+
+        entries = list(product_entries(Product.objects.filter(pk=product_id)))
+        with self._lock:
+            if self._generation is not None:
+                self._index.replace_products(remove=slugs, add=entries)
+            generation = bump_generation()
+            # Caught up unless another change landed in between
+            if self._generation == generation - 1:
+                self._generation = generation
+
+    def suggest(self, prefix, limit=10):
+        return self.get_index().suggest(prefix, limit)
+
+
+engine = SuggestEngine()
@@ -1,3 +1,922 @@
+import json
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from unittest import mock, skipUnless
+
+from django.apps import apps
+from django.contrib.admin.sites import AdminSite
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from accounts.utils.renderers import msgpack
+from . import dashboard, facets, kpis, search, stock, suggest, trending
+from .admin import QuotationRequestAdmin, ReviewAdmin
+from .models import (
+    Category, DashboardCounter, Material, Product, ProductRatingSummary, QuotationRequest, Review, Specification,
+    ProductTrend, ProductView, StockMovement,
+)
+
+
+class CatalogTestCase(TestCase):
+    """Small catalog shared by the API tests below"""
+
+    def setUp(self):
+        cache.clear()
+        self.gates = Category.objects.create(name='Gates')
+        self.rails = Category.objects.create(name='Rails')
+        self.steel = Material.objects.create(name='Steel')
+        self.admin = CustomUser.objects.create_user('admin', 'admin@example.com', 'pw', is_staff=True)
+        self.client = APIClient()
+
+    def make_product(self, name, category=None, **fields):
+        fields.setdefault('base_price', Decimal('100.00'))
+        return Product.objects.create(name=name, category=category or self.gates, **fields)
+
+    def get_data(self, url, **extra):
+        response = self.client.get(url, **extra)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data['data']
+
+
+# ============= CURSOR PAGINATION =============
+
+class KeysetPaginationTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(25):
+            self.make_product(f'Gate {i:02d}', base_price=Decimal(i % 4) + Decimal('10.00'))
+
+    def walk(self, params):
+        seen, cursor = [], None
+        while True:
+            query = dict(params, **({'cursor': cursor} if cursor else {}))
+            data = self.get_data('/api/products/', data=query)
+            seen.extend(item['slug'] for item in data['results'])
+            cursor = data['next']
+            if not cursor:
+                return seen
+
+    def test_pages_cover_every_product_once(self):
+        for ordering in ('-created_at', 'base_price', '-base_price', 'name'):
+            with self.subTest(ordering=ordering):
+                seen = self.walk({'page_size': 4, 'ordering': ordering})
+                self.assertEqual(len(seen), 25)
+                self.assertEqual(len(set(seen)), 25)
+
+    def test_ties_on_the_ordering_column_are_not_repeated(self):
+        # Every product shares one created_at, so only the id tie-breaker separates pages
+        Product.objects.update(created_at=Product.objects.earliest('created_at').created_at)
+        seen = self.walk({'page_size': 7})
+        self.assertEqual(sorted(seen), sorted(Product.objects.values_list('slug', flat=True)))
+
+    def test_bad_cursor_is_rejected(self):
+        for cursor in ('not-a-cursor', 'eyJvIjoibmFtZSJ9'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/products/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+
+    def test_cursor_from_another_ordering_is_rejected(self):
+        cursor = self.get_data('/api/products/', data={'page_size': 5, 'ordering': 'name'})['next']
+        response = self.client.get('/api/products/', {'cursor': cursor, 'ordering': 'base_price'})
+        self.assertEqual(response.status_code, 400)
+
+
+# ============= MAINTAINED COUNTERS =============
+
+class RatingSummaryTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.make_product('Swing Gate')
+        self.customer = CustomUser.objects.create_user('customer', 'customer@example.com', 'pw')
+
+    def assertSummaryMatchesReviews(self):
+        summary = ProductRatingSummary.objects.get(product=self.product)
+        approved = list(Review.objects.filter(product=self.product, is_approved=True).values_list('rating', flat=True))
+        self.assertEqual(summary.review_count, len(approved))
+        self.assertEqual(summary.rating_total, sum(approved))
+        self.assertEqual([getattr(summary, f'star_{n}') for n in range(1, 6)],
+                         [approved.count(n) for n in range(1, 6)])
+        return summary
+
+    def test_summary_follows_review_create_edit_and_delete(self):
+        self.client.force_authenticate(self.customer)
+        response = self.client.post(f'/api/products/{self.product.slug}/reviews/', {'rating': 4, 'comment': 'Solid'})
+        self.assertEqual(response.status_code, 201)
+        review = Review.objects.get(product=self.product)
+        # Pending reviews do not count
+        self.assertEqual(self.assertSummaryMatchesReviews().review_count, 0)
+
+        review.is_approved = True
+        review.save()
+        self.assertEqual(self.assertSummaryMatchesReviews().average_rating, 4)
+
+        response = self.client.patch(f'/api/products/reviews/{review.pk}/', {'rating': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.assertSummaryMatchesReviews().average_rating, 2)
+
+        response = self.client.delete(f'/api/products/reviews/{review.pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.assertSummaryMatchesReviews().review_count, 0)
+
+    def test_admin_approval_rebuilds_the_summary(self):
+        Review.objects.create(product=self.product, user=self.customer, rating=5, comment='Great')
+        Review.objects.create(product=self.product, user=self.admin, rating=3, comment='Fine')
+        review_admin = ReviewAdmin(Review, AdminSite())
+
+        review_admin.approve_reviews(None, Review.objects.all())
+        self.assertEqual(self.assertSummaryMatchesReviews().review_count, 2)
+        review_admin.reject_reviews(None, Review.objects.filter(user=self.admin))
+        self.assertEqual(self.assertSummaryMatchesReviews().average_rating, 5)
+
+
+class CategoryCounterTests(CatalogTestCase):
+    def assertCountersMatchProducts(self):
+        for category in Category.objects.all():
+            with self.subTest(category=category.name):
+                products = Product.objects.filter(category=category)
+                self.assertEqual(category.product_count, products.count())
+                self.assertEqual(category.active_product_count, products.filter(is_active=True).count())
+
+    def test_counters_follow_product_create_edit_and_delete(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post('/api/products/', {
+            'name': 'Sliding Gate', 'category': self.gates.pk, 'description': 'Heavy duty', 'base_price': '250.00',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        slug = Product.objects.get(name='Sliding Gate').slug
+        self.assertCountersMatchProducts()
+        self.assertEqual(Category.objects.get(pk=self.gates.pk).product_count, 1)
+
+        # Move it to another category, then deactivate it
+        response = self.client.patch(f'/api/products/{slug}/', {'category': self.rails.pk}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertCountersMatchProducts()
+        response = self.client.patch(f'/api/products/{slug}/', {'category': self.rails.pk, 'is_active': False},
+                                     format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertCountersMatchProducts()
+        self.assertEqual(Category.objects.get(pk=self.rails.pk).active_product_count, 0)
+
+        response = self.client.delete(f'/api/products/{slug}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertCountersMatchProducts()
+
+    def test_stale_category_instance_does_not_overwrite_counters(self):
+        stale = Category.objects.get(pk=self.gates.pk)
+        self.make_product('Sliding Gate')
+        stale.description = 'Edited from an old form'
+        stale.save()
+        self.assertCountersMatchProducts()
+
+
+
+class KpiCounterTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        kpis.read()
+
+    def assertCountersMatchRows(self):
+        stored = dict(DashboardCounter.objects.values_list('name', 'value'))
+        for name, (label, filters) in kpis.COUNTERS.items():
+            with self.subTest(counter=name):
+                self.assertEqual(stored[name], apps.get_model(label).objects.filter(**filters).count())
+
+    def quotation(self, **fields):
+        return QuotationRequest.objects.create(project_title='Front gate', description='3m wide', **fields)
+
+    def test_counters_follow_create_status_change_and_delete(self):
+        product = self.make_product('Swing Gate')
+        first, second = self.quotation(), self.quotation()
+        self.assertCountersMatchRows()
+        self.assertEqual(kpis.read()['pending_quotations'], 2)
+
+        first.status = 'quoted'
+        first.save()
+        product.is_active = False
+        product.save()
+        self.assertCountersMatchRows()
+
+        second.delete()
+        product.delete()
+        self.assertCountersMatchRows()
+        self.assertEqual(kpis.read()['pending_quotations'], 0)
+
+    def test_admin_mark_as_reviewing_updates_pending_count(self):
+        self.quotation()
+        self.quotation()
+        QuotationRequestAdmin(QuotationRequest, AdminSite()).mark_as_reviewing(None, QuotationRequest.objects.all())
+        self.assertCountersMatchRows()
+        self.assertEqual(kpis.read()['pending_quotations'], 0)
+
+
+# ============= CONDITIONAL GET =============
+
+class ConditionalGetTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.make_product('Swing Gate')
+
+    def assertRevalidates(self, url, change):
+        """304 for the current ETag until `change` commits, then a fresh 200"""
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response
+
+    def test_product_edit_invalidates_list_and_detail(self):
+        def rename():
+            self.product.name = 'Double Swing Gate'
+            self.product.save()
+        for url in ('/api/products/', f'/api/products/{self.product.slug}/'):
+            with self.subTest(url=url):
+                self.assertRevalidates(url, rename)
+
+    def test_version_moves_only_on_commit(self):
+        url = f'/api/products/{self.product.slug}/'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.product.name = 'Double Swing Gate'
+            self.product.save()
+            self.product.materials.add(self.steel)
+        # A read racing the open transaction must not get a new ETag for the old rows
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertTrue(callbacks)
+        for callback in callbacks:
+            callback()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['name'], 'Double Swing Gate')
+
+    def test_admin_review_actions_invalidate(self):
+        customer = CustomUser.objects.create_user('customer', 'customer@example.com', 'pw')
+        Review.objects.create(product=self.product, user=customer, rating=5, comment='Great')
+        review_admin = ReviewAdmin(Review, AdminSite())
+        url = f'/api/products/{self.product.slug}/'
+
+        response = self.assertRevalidates(url, lambda: review_admin.approve_reviews(None, Review.objects.all()))
+        self.assertEqual(response.data['data']['review_count'], 1)
+        response = self.assertRevalidates(url, lambda: review_admin.reject_reviews(None, Review.objects.all()))
+        self.assertEqual(response.data['data']['review_count'], 0)
+
+    def test_audiences_get_different_etags(self):
+        url = '/api/products/'
+        public = self.client.get(url)['ETag']
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=public)
+        self.assertEqual(response.status_code, 200)
+
+
+# ============= DETAIL CACHE =============
+
+class DetailCacheTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.make_product('Swing Gate')
+        self.product.materials.add(self.steel)
+        self.url = f'/api/products/{self.product.slug}/'
+        self.client.force_authenticate(self.admin)
+
+    def warm(self):
+        # The first read learns the product's category, the second stores the payload
+        self.get_data(self.url)
+        self.get_data(self.url)
+        with self.assertNumQueries(0):
+            return self.get_data(self.url)
+
+    def edit(self, method, url, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertIn(response.status_code, (200, 201), response.content)
+
+    def test_specification_edit_invalidates(self):
+        self.assertEqual(self.warm()['specifications'], [])
+        self.edit('post', f'{self.url}specifications/', {'name': 'Gauge', 'value': '16'})
+        self.assertEqual([spec['value'] for spec in self.get_data(self.url)['specifications']], ['16'])
+
+    def test_material_edit_invalidates(self):
+        self.warm()
+        self.edit('patch', f'/api/products/materials/{self.steel.pk}/', {'name': 'Stainless Steel'})
+        self.assertEqual([m['name'] for m in self.get_data(self.url)['materials']], ['Stainless Steel'])
+
+    def test_category_edit_invalidates(self):
+        self.warm()
+        self.edit('patch', f'/api/products/categories/{self.gates.pk}/', {'name': 'Garden Gates'})
+        self.assertEqual(self.get_data(self.url)['category']['name'], 'Garden Gates')
+
+    def test_category_counts_follow_other_products(self):
+        self.assertEqual(self.warm()['category']['product_count'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_product('Sliding Gate')
+        self.assertEqual(self.get_data(self.url)['category']['product_count'], 2)
+
+    def test_invalidation_waits_for_commit(self):
+        self.warm()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.product.name = 'Double Swing Gate'
+            self.product.save()
+        # Not committed yet: the cached payload still stands
+        self.assertEqual(self.get_data(self.url)['name'], 'Swing Gate')
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.get_data(self.url)['name'], 'Double Swing Gate')
+
+
+# ============= BULK ADJUST =============
+
+class BulkAdjustTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cheap = self.make_product('Swing Gate', base_price=Decimal('100.00'), stock_quantity=5)
+        self.dear = self.make_product('Sliding Gate', base_price=Decimal('250.00'), stock_quantity=1)
+        self.other = self.make_product('Hand Rail', category=self.rails, base_price=Decimal('80.00'), stock_quantity=3)
+        self.client.force_authenticate(self.admin)
+
+    def adjust(self, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/products/bulk-adjust/', data, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data['data']
+
+    def snapshot(self):
+        return list(Product.objects.order_by('pk').values_list('base_price', 'stock_quantity'))
+
+    def test_dry_run_previews_without_writing(self):
+        before = self.snapshot()
+        movements = StockMovement.objects.count()
+        data = self.adjust(category=self.gates.slug, price_percent='10', stock_delta=-2, dry_run=True)
+
+        self.assertTrue(data['dry_run'])
+        self.assertEqual(data['totals']['matched'], 2)
+        self.assertEqual(data['totals']['base_price_after'], Decimal('385.00'))
+        self.assertEqual(data['totals']['stock_quantity_after'], 3)
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(StockMovement.objects.count(), movements)
+
+    def test_apply_updates_prices_stock_and_ledger(self):
+        data = self.adjust(category=self.gates.slug, price_percent='10', stock_delta=-2)
+
+        self.assertEqual(data['updated'], 2)
+        self.cheap.refresh_from_db()
+        self.dear.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.cheap.base_price, self.cheap.stock_quantity), (Decimal('110.00'), 3))
+        # Stock is clamped at zero and the ledger records the change actually applied
+        self.assertEqual((self.dear.base_price, self.dear.stock_quantity), (Decimal('275.00'), 0))
+        self.assertEqual((self.other.base_price, self.other.stock_quantity), (Decimal('80.00'), 3))
+        movements = StockMovement.objects.filter(reference='bulk-adjust')
+        self.assertEqual(
+            sorted(movements.values_list('product_id', 'quantity', 'created_by_id')),
+            [(self.cheap.pk, -2, self.admin.pk), (self.dear.pk, -1, self.admin.pk)],
+        )
+        for product in (self.cheap, self.dear, self.other):
+            self.assertEqual(stock.quantity_as_of(product.pk, timezone.now()), product.stock_quantity)
+
+    def test_apply_refreshes_cached_detail(self):
+        url = f'/api/products/{self.cheap.slug}/'
+        for _ in range(2):
+            self.get_data(url)
+        self.adjust(ids=[self.cheap.pk], price_delta='5.00')
+        self.assertEqual(Decimal(self.get_data(url)['base_price']), Decimal('105.00'))
+
+
+# ============= STOCK LEDGER =============
+
+class StockLedgerTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.make_product('Swing Gate', stock_quantity=3)
+        self.url = f'/api/products/{self.product.slug}/stock/'
+        self.client.force_authenticate(self.admin)
+
+    def move(self, kind, quantity):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, {'kind': kind, 'quantity': quantity}, format='json')
+
+    def stored_quantity(self):
+        return Product.objects.values_list('stock_quantity', flat=True).get(pk=self.product.pk)
+
+    def test_reservation_beyond_stock_conflicts(self):
+        response = self.move('reservation', 2)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['data']['stock_quantity'], 1)
+
+        movements = StockMovement.objects.count()
+        response = self.move('reservation', 2)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.stored_quantity(), 1)
+        self.assertEqual(StockMovement.objects.count(), movements)
+
+    def test_stale_save_keeps_stock(self):
+        stale = Product.objects.get(pk=self.product.pk)
+        self.assertEqual(self.move('receipt', 10).status_code, 201)
+        stale.name = 'Double Swing Gate'
+        stale.save()
+        self.assertEqual(self.stored_quantity(), 13)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).name, 'Double Swing Gate')
+
+    def test_ledger_replays_to_stored_quantity(self):
+        self.move('receipt', 10)
+        self.move('reservation', 4)
+        stock.set_quantity(self.product.pk, 7)
+        self.assertEqual(self.stored_quantity(), 7)
+        self.assertEqual(stock.quantity_as_of(self.product.pk, timezone.now()), 7)
+
+        # Snapshots fold settled movements; later movements are replayed on top
+        StockMovement.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(stock.take_snapshots(), 1)
+        self.move('release', 2)
+        self.assertEqual(stock.quantity_as_of(self.product.pk, timezone.now()), 9)
+        self.assertEqual(stock.quantity_as_of(self.product.pk, timezone.now() - timedelta(minutes=10)), 0)
+
+
+class LowStockFeedTests(CatalogTestCase):
+    url = '/api/products/low-stock/'
+
+    def setUp(self):
+        super().setUp()
+        self.empty = self.make_product('Swing Gate', stock_quantity=0)
+        self.low = self.make_product('Sliding Gate', stock_quantity=2)
+        self.edge = self.make_product('Folding Gate', stock_quantity=5)
+        self.stocked = self.make_product('Garden Gate', stock_quantity=6)
+        self.rail = self.make_product('Hand Rail', category=self.rails, stock_quantity=1, low_stock_threshold=3)
+        self.make_product('Old Gate', stock_quantity=0, is_active=False)
+        self.client.force_authenticate(self.admin)
+
+    def test_needs_restock_includes_the_threshold(self):
+        self.assertEqual(
+            set(Product.objects.needs_restock().filter(is_active=True)),
+            {self.empty, self.low, self.edge, self.rail},
+        )
+
+    def test_with_stock_status(self):
+        rows = {
+            product.pk: (product.stock_status, product.stock_shortfall)
+            for product in Product.objects.filter(is_active=True).with_stock_status()
+        }
+        self.assertEqual(rows[self.empty.pk], ('out_of_stock', 5))
+        self.assertEqual(rows[self.low.pk], ('low_stock', 3))
+        self.assertEqual(rows[self.edge.pk], ('low_stock', 0))
+        self.assertEqual(rows[self.stocked.pk], ('in_stock', -1))
+        self.assertEqual(rows[self.rail.pk], ('low_stock', 2))
+
+    def test_feed_is_emptiest_first(self):
+        data = self.get_data(self.url)
+        self.assertEqual([row['slug'] for row in data['results']],
+                         [self.empty.slug, self.rail.slug, self.low.slug, self.edge.slug])
+        self.assertEqual(data['counts'], {'out_of_stock': 1, 'low_stock': 3})
+        self.assertEqual(data['results'][0]['status'], 'out_of_stock')
+
+    def test_counts_follow_the_category_filter(self):
+        response = self.client.get(self.url, {'category': self.rails.slug})
+        self.assertEqual([row['slug'] for row in response.data['data']['results']], [self.rail.slug])
+        self.assertEqual(response.data['data']['counts'], {'out_of_stock': 0, 'low_stock': 1})
+        self.assertEqual(response.data['message'], "1 low and 0 out of stock")
+
+    def test_counts_ignore_the_status_filter(self):
+        data = self.get_data(self.url, data={'status': 'out'})
+        self.assertEqual([row['slug'] for row in data['results']], [self.empty.slug])
+        self.assertEqual(data['counts'], {'out_of_stock': 1, 'low_stock': 3})
+        self.assertEqual(self.client.get(self.url, {'status': 'gone'}).status_code, 400)
+
+    def test_staff_only(self):
+        self.client.force_authenticate(CustomUser.objects.create_user('customer', 'customer@example.com', 'pw'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+# ============= MAINTAINED FIELDS =============
+
+class MaintainedFieldsTests(CatalogTestCase):
+    def test_clone_inserts_a_new_row(self):
+        product = self.make_product('Swing Gate', stock_quantity=4)
+        product.pk = None
+        product.slug = 'swing-gate-copy'
+        product.save()
+        self.assertEqual(Product.objects.count(), 2)
+        clone = Product.objects.get(slug='swing-gate-copy')
+        self.assertEqual(clone.stock_quantity, 4)
+        self.assertEqual(stock.quantity_as_of(clone.pk, timezone.now()), 4)
+
+
+# ============= SEO SCORE =============
+
+class SeoScoreTests(CatalogTestCase):
+    def test_score_flags_description_and_meta_fields(self):
+        product = self.make_product('Swing Gate', description='Galvanised steel swing gate. ' * 5,
+                                    meta_description='Steel swing gates', meta_keywords='gate, steel')
+        self.assertEqual((product.seo_score, product.seo_missing_labels), (100, []))
+
+        product.meta_keywords = ''
+        product.description = 'Too short'
+        product.save()
+        product.refresh_from_db()
+        self.assertEqual(product.seo_missing_labels, ['Meta Keywords', 'Deep Content'])
+        self.assertLess(product.seo_score, 100)
+
+
+# ============= FILTERS & FACETS =============
+
+class MaterialFilterTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.numeric = Material.objects.create(name='304 Stainless', slug='304')
+        self.swing = self.make_product('Swing Gate')
+        self.swing.materials.add(self.steel)
+        self.rail = self.make_product('Hand Rail', category=self.rails)
+        self.rail.materials.add(self.numeric)
+
+    def slugs(self, **params):
+        return sorted(item['slug'] for item in self.get_data('/api/products/', data=params)['results'])
+
+    def test_ids_and_slugs(self):
+        self.assertEqual(self.slugs(materials=str(self.steel.pk)), [self.swing.slug])
+        self.assertEqual(self.slugs(materials='steel'), [self.swing.slug])
+        self.assertEqual(self.slugs(materials=f'steel,{self.numeric.pk}'), [self.rail.slug, self.swing.slug])
+        self.assertEqual(self.slugs(materials='steel,304', materials_match='all'), [])
+
+    def test_numeric_slug(self):
+        self.assertEqual(self.slugs(materials='304'), [self.rail.slug])
+
+
+class FacetTests(CatalogTestCase):
+    def test_counts_follow_the_filters(self):
+        for i, price in enumerate(('500.00', '1500.00', '1500.00')):
+            product = self.make_product(f'Gate {i}', base_price=Decimal(price), stock_quantity=i)
+            product.materials.add(self.steel)
+        self.make_product('Hand Rail', category=self.rails, base_price=Decimal('60000.00'))
+
+        counts = self.get_data('/api/products/', data={'facets': 'true', 'materials': 'steel'})['facets']
+        self.assertEqual([(c['slug'], c['count']) for c in counts['category']], [('gates', 3)])
+        self.assertEqual([(m['id'], m['slug'], m['count']) for m in counts['material']], [(self.steel.pk, 'steel', 3)])
+        self.assertEqual(counts['in_stock'], {'true': 2, 'false': 1})
+        self.assertEqual([(b['min'], b['count']) for b in counts['price']], [(Decimal(0), 1), (Decimal(1000), 2)])
+
+        counts = self.get_data('/api/products/', data={'facets': 'true'})['facets']
+        self.assertEqual({c['slug']: c['count'] for c in counts['category']}, {'gates': 3, 'rails': 1})
+
+    def test_all_facets_in_one_query(self):
+        self.make_product('Swing Gate').materials.add(self.steel)
+        with self.assertNumQueries(1):
+            counts = facets.engine.count(Product.objects.filter(is_active=True))
+        self.assertEqual(set(counts), {'category', 'material', 'product_type', 'in_stock', 'price'})
+
+    def test_material_facet_round_trips_into_the_filter(self):
+        self.make_product('Swing Gate').materials.add(self.steel)
+        self.make_product('Hand Rail', category=self.rails)
+        material = self.get_data('/api/products/', data={'facets': 'true'})['facets']['material'][0]
+        results = self.get_data('/api/products/', data={'materials': material['slug']})['results']
+        self.assertEqual(len(results), material['count'])
+
+
+
+# ============= TYPEAHEAD =============
+
+class SuggestTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.make_product('Sliding Gate', is_featured=True)
+        self.make_product('Gate Hinge')
+        engine = mock.patch.object(suggest, 'engine', suggest.SuggestEngine())
+        self.engine = engine.start()
+        self.addCleanup(engine.stop)
+
+    def suggestions(self, q):
+        results = self.get_data('/api/products/search/suggest/', data={'q': q})['results']
+        return [(item['text'], item['type']) for item in results]
+
+    def commit(self, change):
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+
+    def test_word_starts_ranked_by_weight(self):
+        # Featured product, then the category (two products), then a plain product
+        self.assertEqual(self.suggestions('gate'), [
+            ('Sliding Gate', 'product'), ('Gates', 'category'), ('Gate Hinge', 'product'),
+        ])
+        self.assertEqual(self.suggestions('sli'), [('Sliding Gate', 'product')])
+        self.assertEqual(self.suggestions('  '), [])
+
+    def test_product_edits_apply_as_deltas(self):
+        self.suggestions('gate')
+
+        def rename():
+            self.product.name = 'Sliding Railing'
+            self.product.save()
+        self.commit(rename)
+        # No rebuild: the delta already caught the index up
+        with mock.patch.object(self.engine, 'rebuild_in_background') as rebuild:
+            self.assertEqual(self.suggestions('railing'), [('Sliding Railing', 'product')])
+            self.assertNotIn(('Sliding Gate', 'product'), self.suggestions('gate'))
+            rebuild.assert_not_called()
+
+        def deactivate():
+            self.product.is_active = False
+            self.product.save()
+        self.commit(deactivate)
+        self.assertEqual(self.suggestions('railing'), [])
+        self.commit(lambda: self.make_product('Garden Railing'))
+        self.assertEqual(self.suggestions('railing'), [('Garden Railing', 'product')])
+        self.commit(lambda: Product.objects.get(name='Garden Railing').delete())
+        self.assertEqual(self.suggestions('railing'), [])
+
+    def test_unrelated_writes_keep_the_index(self):
+        self.suggestions('gate')
+        self.commit(lambda: stock.record(self.product.pk, 'receipt', 5))
+        customer = CustomUser.objects.create_user('customer', 'customer@example.com', 'pw')
+        self.commit(lambda: Review.objects.create(product=self.product, user=customer, rating=5, comment='Great'))
+        with mock.patch.object(self.engine, 'rebuild_in_background') as rebuild, self.assertNumQueries(0):
+            self.suggestions('gate')
+        rebuild.assert_not_called()
+
+    def test_category_change_rebuilds_in_background(self):
+        self.suggestions('gate')
+        self.commit(lambda: Category.objects.create(name='Fences'))
+        with mock.patch.object(self.engine, 'rebuild_in_background') as rebuild:
+            # The previous index keeps serving until the rebuild lands
+            self.assertEqual(self.suggestions('fen'), [])
+        rebuild.assert_called_once_with()
+
+
+class SuggestIndexTests(TestCase):
+    def test_replace_products_matches_a_fresh_build(self):
+        entries = [('Sliding Gate', 'product', 'sliding-gate', 1), ('Gates', 'category', 'gates', 2),
+                   ('Gate Hinge', 'product', 'gate-hinge', 1)]
+        index = suggest.SuggestIndex(entries)
+        index.replace_products(remove=['sliding-gate'], add=[('Sliding Door', 'product', 'sliding-door', 3)])
+        fresh = suggest.SuggestIndex([entries[1], entries[2], ('Sliding Door', 'product', 'sliding-door', 3)])
+        self.assertEqual([row[0] for row in index.rows], [row[0] for row in fresh.rows])
+        self.assertEqual(index.suggest('door'), [{'text': 'Sliding Door', 'type': 'product', 'slug': 'sliding-door'}])
+
+
+# ============= RESPONSE FORMATS =============
+
+class ResponseFormatTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.make_product('Swing Gate')
+        self.client.force_authenticate(self.admin)
+
+    @skipUnless(msgpack, "msgpack is not installed")
+    def test_msgpack_map_keys_are_strings(self):
+        response = self.client.get(f'/api/products/{self.product.slug}/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, 200)
+        data = msgpack.unpackb(response.content)['data']
+        self.assertEqual(data['rating_histogram'], {'1': 0, '2': 0, '3': 0, '4': 0, '5': 0})
+
+    def test_streaming_is_opt_in(self):
+        Specification.objects.create(product=self.product, name='Gauge', value='16')
+        url = '/api/products/specifications/'
+        response = self.client.get(url)
+        self.assertFalse(response.streaming)
+        regular = response.json()
+
+        response = self.client.get(url, {'stream': 'true'})
+        self.assertTrue(response.streaming)
+        streamed = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(streamed['data']['results'], regular['data']['results'])
+
+
+# ============= DASHBOARD =============
+
+class AnalyticsDashboardTests(CatalogTestCase):
+    url = '/api/products/analytics/dashboard/'
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.admin)
+
+    def test_refresh_goes_through_the_background_refresher(self):
+        computed_at = self.get_data(self.url)['computed_at']
+        with mock.patch.object(dashboard.analytics_dashboard, 'refresh_in_background') as refresh:
+            data = self.get_data(self.url, data={'refresh': 'true'})
+        refresh.assert_called_once_with()
+        # The current entry is served while the refresh runs
+        self.assertEqual(data['computed_at'], computed_at)
+
+    def test_refresh_is_claimed_once(self):
+        self.get_data(self.url)
+        with mock.patch('products.dashboard.threading.Thread') as thread:
+            self.get_data(self.url, data={'refresh': 'true'})
+            self.get_data(self.url, data={'refresh': 'true'})
+        self.assertEqual(thread.call_count, 1)
+
+    def test_summary_reads_the_kpi_counters(self):
+        self.make_product("Sliding Gate")
+        self.make_product("Hidden Gate", is_active=False)
+        self.assertEqual(dashboard.compute_analytics()['summary']['total_products'], 2)
+
+        counters = dict(kpis.read(), total_products=7, total_services=3)
+        with mock.patch.object(kpis, 'read', return_value=counters):
+            summary = dashboard.compute_analytics()['summary']
+        self.assertEqual((summary['total_products'], summary['total_services']), (7, 3))
+
+    def test_staff_only(self):
+        self.client.force_authenticate(CustomUser.objects.create_user('customer', 'customer@example.com', 'pw'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+# ============= TRENDING =============
+
+class TrendingTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.half_life = timedelta(hours=72)  # TRENDING_HALF_LIFE_HOURS default
+        self.swing = self.make_product('Swing Gate')
+        self.sliding = self.make_product('Sliding Gate')
+
+    def scores(self):
+        return {
+            product_id: trending.decayed(score, self.now)
+            for product_id, score in ProductTrend.objects.values_list('product_id', 'score')
+        }
+
+    def test_record_adds_to_the_stored_score(self):
+        trending.record([(self.swing.pk, 1.0, self.now), (self.swing.pk, 2.0, self.now)])
+        trending.record([(self.swing.pk, 1.0, self.now), (self.sliding.pk, 1.0, self.now)])
+        scores = self.scores()
+        self.assertAlmostEqual(scores[self.swing.pk], 4.0)
+        self.assertAlmostEqual(scores[self.sliding.pk], 1.0)
+
+    def test_score_halves_every_half_life(self):
+        trending.record([(self.swing.pk, 8.0, self.now - 2 * self.half_life)])
+        self.assertAlmostEqual(self.scores()[self.swing.pk], 2.0)
+        # Stored relative to the epoch, so reading later only divides
+        stored = ProductTrend.objects.get(pk=self.swing.pk).score
+        self.assertAlmostEqual(trending.decayed(stored, self.now + self.half_life), 1.0)
+        self.assertAlmostEqual(stored, 8.0 * trending.growth(self.now - 2 * self.half_life))
+
+    def test_recent_activity_outranks_older_activity(self):
+        trending.record([(self.swing.pk, 3.0, self.now - 2 * self.half_life), (self.sliding.pk, 1.0, self.now)])
+        top = trending.TopK(k=5)
+        self.assertEqual([product_id for product_id, _ in top.get(5)], [self.sliding.pk, self.swing.pk])
+
+    def test_quotation_requests_count_as_activity(self):
+        QuotationRequest.objects.create(product=self.swing, project_title='Front gate', description='3m wide')
+        self.assertAlmostEqual(self.scores()[self.swing.pk], trending.QUOTATION_WEIGHT, places=3)
+
+    def test_rebuild_replays_recent_events(self):
+        ProductView.objects.create(product=self.swing, viewed_at=self.now - self.half_life)
+        ProductView.objects.create(product=self.sliding, viewed_at=self.now - timedelta(days=40))
+        trending.record([(self.sliding.pk, 100.0, self.now)])
+        self.assertEqual(trending.rebuild(days=30), 1)
+        self.assertAlmostEqual(self.scores()[self.swing.pk], 0.5)
+
+    def test_top_k_serves_a_snapshot_until_stale(self):
+        trending.record([(self.swing.pk, 1.0, self.now)])
+        top = trending.TopK(k=1)
+        self.assertEqual([product_id for product_id, _ in top.get(5)], [self.swing.pk])
+
+        trending.record([(self.sliding.pk, 5.0, self.now)])
+        Product.objects.filter(pk=self.swing.pk).update(is_active=False)
+        with self.assertNumQueries(0):
+            self.assertEqual([product_id for product_id, _ in top.get(5)], [self.swing.pk])
+
+        with mock.patch.object(trending.time, 'monotonic', return_value=time.monotonic() + top.max_age + 1):
+            self.assertEqual([product_id for product_id, _ in top.get(5)], [self.sliding.pk])
+
+
+# ============= CATALOG IMPORT =============
+
+class CatalogImportTests(CatalogTestCase):
+    url = '/api/products/import/'
+
+    CSV = (
+        "name,category,description,base_price,materials,specifications,stock_quantity,is_active,meta_keywords\n"
+        "Swing Gate,gates,Double leaf gate,250.00,Steel|Aluminium,Width: 3m|Finish: powder coat,4,true,gate\n"
+        "Hand Rail,Rails,Stair rail,80.00,steel,,0,true,\n"
+        "Old Rail,rails,Retired rail,60.00,,,2,false,\n"
+    )
+    JSONL = (
+        '{"name": "Swing Gate", "category": "gates", "description": "Double leaf gate", "base_price": "250.00",'
+        ' "materials": ["Steel", "Aluminium"], "specifications": {"Width": "3m", "Finish": "powder coat"},'
+        ' "stock_quantity": 4, "is_active": true, "meta_keywords": "gate"}\n'
+        '{"name": "Hand Rail", "category": "Rails", "description": "Stair rail", "base_price": "80.00",'
+        ' "materials": "steel", "stock_quantity": 0}\n'
+        '{"name": "Old Rail", "category": "rails", "description": "Retired rail", "base_price": "60.00",'
+        ' "stock_quantity": 2, "is_active": false}\n'
+    )
+
+    def setUp(self):
+        super().setUp()
+        self.aluminium = Material.objects.create(name='Aluminium')
+        self.client.force_authenticate(self.admin)
+
+    def upload(self, content, filename, **data):
+        upload = SimpleUploadedFile(filename, content.encode(), content_type='text/plain')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'file': upload, **data}, format='multipart')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data['data']
+
+    def create_like_import(self):
+        """The CSV/JSONL rows above, written one at a time through the ORM"""
+        with self.captureOnCommitCallbacks(execute=True):
+            swing = self.make_product('Swing Gate', description='Double leaf gate', base_price=Decimal('250.00'),
+                                      stock_quantity=4, meta_keywords='gate')
+            swing.materials.set([self.steel, self.aluminium])
+            Specification.objects.create(product=swing, name='Width', value='3m', order=0)
+            Specification.objects.create(product=swing, name='Finish', value='powder coat', order=1)
+            rail = self.make_product('Hand Rail', category=self.rails, description='Stair rail',
+                                     base_price=Decimal('80.00'))
+            rail.materials.set([self.steel])
+            self.make_product('Old Rail', category=self.rails, description='Retired rail',
+                              base_price=Decimal('60.00'), stock_quantity=2, is_active=False)
+
+    def fts_document(self, product_id):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f"SELECT {', '.join(search.FTS_COLUMNS)} FROM {search.FTS_TABLE} WHERE rowid = %s",
+                               [product_id])
+            else:
+                cursor.execute(f"SELECT document::text FROM {search.FTS_TABLE} WHERE product_id = %s", [product_id])
+            return cursor.fetchone()
+
+    def snapshot(self):
+        """Everything the model signals maintain, keyed by names so ids can differ"""
+        return {
+            'categories': {
+                c.name: (c.product_count, c.active_product_count) for c in Category.objects.order_by('name')
+            },
+            'products': {
+                p.name: {
+                    'slug': p.slug,
+                    'stock_quantity': p.stock_quantity,
+                    'seo': (p.seo_score, p.seo_missing),
+                    'rating_summary': ProductRatingSummary.objects.filter(product=p).exists(),
+                    'movements': list(p.stock_movements.values_list('kind', 'quantity', 'reference')),
+                    'fts': self.fts_document(p.pk),
+                }
+                for p in Product.objects.all()
+            },
+            'kpis': {name: value for name, value in kpis.read().items() if name.endswith('products')},
+        }
+
+    def assertImportMatchesCreate(self, content, filename):
+        data = self.upload(content, filename)
+        self.assertEqual((data['created'], data['error_count']), (3, 0), data['errors'])
+        imported = self.snapshot()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.all().delete()
+        self.create_like_import()
+        self.assertEqual(imported, self.snapshot())
+        # The inactive row is counted but not indexed
+        self.assertEqual(imported['categories']['Rails'], (2, 1))
+        self.assertIsNone(imported['products']['Old Rail']['fts'])
+
+    def test_csv_import_matches_model_create(self):
+        self.assertImportMatchesCreate(self.CSV, 'catalog.csv')
+
+    def test_jsonl_import_matches_model_create(self):
+        self.assertImportMatchesCreate(self.JSONL, 'catalog.jsonl')
+
+    def test_slug_collisions_get_suffixes(self):
+        self.make_product('Swing Gate')
+        content = "name,category,description,base_price,slug\n" + "".join(
+            f"{name},gates,Steel gate,100.00,{slug}\n"
+            for name, slug in [('Swing Gate', ''), ('Swing Gate', ''), ('Gate', 'swing-gate'), ('Gate', '')]
+        )
+        self.assertEqual(self.upload(content, 'catalog.csv')['created'], 4)
+        self.assertEqual(
+            sorted(Product.objects.values_list('slug', flat=True)),
+            ['gate', 'swing-gate', 'swing-gate-2', 'swing-gate-3', 'swing-gate-4'],
+        )
+
+    def test_error_report_names_each_bad_line(self):
+        content = "\n".join([
+            '{"name": "Swing Gate", "category": "gates", "description": "Steel gate", "base_price": "100.00"}',
+            '{"name": "Broken", ',
+            '["not", "an", "object"]',
+            '',
+            '{"name": "Lost Gate", "category": "doors", "description": "Door", "base_price": "100.00"}',
+            '{"name": "Odd Gate", "category": "gates", "description": "Odd", "base_price": "100.00",'
+            ' "materials": ["Unobtainium"]}',
+            '{"category": "gates", "description": "Nameless", "base_price": "100.00"}',
+        ]) + "\n"
+        data = self.upload(content, 'catalog.jsonl')
+        self.assertEqual((data['rows'], data['valid'], data['created'], data['error_count']), (6, 1, 1, 5))
+        errors = {error['line']: error['errors'] for error in data['errors']}
+        self.assertEqual(sorted(errors), [2, 3, 5, 6, 7])
+        self.assertIn('Invalid JSON', errors[2]['row'][0])
+        self.assertEqual(errors[3]['row'], ['Expected a JSON object'])
+        self.assertIn('doors', str(errors[5]['category'][0]))
+        self.assertIn('Unobtainium', str(errors[6]['materials'][0]))
+        self.assertIn('name', errors[7])
+        self.assertEqual(list(Product.objects.values_list('name', flat=True)), ['Swing Gate'])
 
-# Create your tests here.
+    def test_dry_run_writes_nothing(self):
+        data = self.upload(self.CSV, 'catalog.csv', dry_run='true')
+        self.assertEqual((data['valid'], data['created']), (3, 0))
+        self.assertFalse(Product.objects.exists())
+        self.assertEqual(Category.objects.get(pk=self.gates.pk).product_count, 0)
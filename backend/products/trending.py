@@ -0,0 +1,124 @@
+"""
+Trending products ranked by exponentially decayed activity.
+
+An event with weight w at time t contributes w * 2 ** (-(now - t) / half_life)
+to a product's score. Because every score decays by the same factor, we can
+store w * 2 ** ((t - EPOCH) / half_life) instead: ranking is unchanged, the
+update is a plain addition (no read-modify-write), and the decayed value is
+recovered at read time. At a 72h half-life the stored values stay within
+float range for about eight years after EPOCH; move EPOCH forward and run
+`manage.py rebuild_trending_scores` well before then.
+"""
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+VIEW_WEIGHT = 1.0
+QUOTATION_WEIGHT = 5.0
+TOP_K = 50
+
+
+def half_life_seconds():
+    return getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 72) * 3600
+
+
+def growth(at):
+    """Stored weight of one unit of activity at time `at`"""
+    return 2.0 ** ((at - EPOCH).total_seconds() / half_life_seconds())
+
+
+def decayed(stored_score, now=None):
+    return stored_score / growth(now or timezone.now())
+
+
+def record(events):
+    """Add activity; events is an iterable of (product_id, weight, timestamp)"""
+    from .models import ProductTrend
+
+    increments = defaultdict(float)
+    for product_id, weight, at in events:
+        increments[product_id] += weight * growth(at)
+    if not increments:
+        return
+
+    if connection.vendor in ('sqlite', 'postgresql'):
+        table = ProductTrend._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {table} (product_id, score) VALUES (%s, %s) "
+                f"ON CONFLICT (product_id) DO UPDATE SET score = {table}.score + excluded.score",
+                list(increments.items())
+            )
+        return
+
+    for product_id, increment in increments.items():
+        trend, created = ProductTrend.objects.get_or_create(product_id=product_id, defaults={'score': increment})
+        if not created:
+            ProductTrend.objects.filter(pk=product_id).update(score=F('score') + increment)
+
+
+def rebuild(days=30):
+    """Recompute scores from raw views and quotation requests of the last N days"""
+    from .models import ProductTrend, ProductView, QuotationRequest
+
+    since = timezone.now() - timedelta(days=days)
+    ProductTrend.objects.all().delete()
+    views = ProductView.objects.filter(viewed_at__gte=since).values_list('product_id', 'viewed_at')
+    record((product_id, VIEW_WEIGHT, at) for product_id, at in views.iterator(chunk_size=5000))
+    quotes = QuotationRequest.objects.filter(created_at__gte=since, product__isnull=False).values_list(
+        'product_id', 'created_at'
+    )
+    record((product_id, QUOTATION_WEIGHT, at) for product_id, at in quotes.iterator(chunk_size=5000))
+    return ProductTrend.objects.count()
+
+
+class TopK:
+    """
+    Process-wide snapshot of the K highest scores. The indexed score column
+    makes a refresh one short index scan; between refreshes requests are
+    served from memory.
+    """
+
+    def __init__(self, k=TOP_K):
+        self.k = k
+        self._entries = []
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def max_age(self):
+        return getattr(settings, 'TRENDING_REFRESH_SECONDS', 30)
+
+    def is_stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age
+
+    def refresh(self):
+        from .models import ProductTrend
+
+        rows = ProductTrend.objects.filter(product__is_active=True, score__gt=0).order_by(
+            '-score'
+        ).values_list('product_id', 'score')[:self.k]
+        now = timezone.now()
+        self._entries = [(product_id, decayed(score, now)) for product_id, score in rows]
+        self._loaded_at = time.monotonic()
+
+    def get(self, limit):
+        if self.is_stale():
+            # First caller refreshes; concurrent callers reuse the previous snapshot
+            if self._lock.acquire(blocking=self._loaded_at is None):
+                try:
+                    if self.is_stale():
+                        self.refresh()
+                finally:
+                    self._lock.release()
+        return self._entries[:limit]
+
+
+top_k = TopK()
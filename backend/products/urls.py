@@ -1,16 +1,17 @@
 from django.urls import path
 from .views import (
     CategoryListCreateView, CategoryDetailView,
-    ProductListCreateView, ProductDetailView, FeaturedProductsView,
+    ProductListCreateView, ProductDetailView, FeaturedProductsView, TrendingProductsView,
     ProductReviewListCreateView, ProductReviewDetailView,
     QuotationRequestListCreateView, QuotationRequestDetailView,
     ServiceBookingListCreateView, ServiceBookingDetailView,
-    SearchView, MaterialListCreateView, MaterialDetailView,
+    SearchView, SearchSuggestView, MaterialListCreateView, MaterialDetailView,
     SpecificationListCreateView, SpecificationDetailView,
     ProductSpecificationListCreateView, ProductSpecificationDetailView,
     ProductMaterialListCreateView, ProductMaterialDetailView,
     StoreServiceListCreateView, StoreServiceDetailView, 
-    AnalyticsDashboardView, DashboardOverviewView
+    AnalyticsDashboardView, DashboardOverviewView, SeoOffendersView, CatalogImportView,
+    CatalogExportView, BulkAdjustView, ProductStockView, LowStockFeedView
 )
 
 app_name = 'products'
@@ -41,6 +42,13 @@ urlpatterns = [
     # ============= SEARCH =============
     # MUST come before <slug:slug>/ pattern
     path('search/', SearchView.as_view(), name='search'),
+    path('search/suggest/', SearchSuggestView.as_view(), name='search-suggest'),
+
+    # ============= CATALOG IMPORT / EXPORT =============
+    # MUST come before <slug:slug>/ pattern
+    path('import/', CatalogImportView.as_view(), name='catalog-import'),
+    path('export/', CatalogExportView.as_view(), name='catalog-export'),
+    path('bulk-adjust/', BulkAdjustView.as_view(), name='bulk-adjust'),
     
     # ============= PRODUCTS - LIST & CREATE =============
     path('', ProductListCreateView.as_view(), name='product-list-create'),
@@ -48,6 +56,8 @@ urlpatterns = [
     # ============= FEATURED PRODUCTS =============
     # MUST come before <slug:slug>/ pattern
     path('featured/', FeaturedProductsView.as_view(), name='featured-products'),
+    path('trending/', TrendingProductsView.as_view(), name='trending-products'),
+    path('low-stock/', LowStockFeedView.as_view(), name='low-stock-feed'),
     
     # ============= PRODUCT MATERIALS (Product-Specific) =============
     # MUST come before <slug:slug>/ pattern (more specific)
@@ -59,6 +69,10 @@ urlpatterns = [
     path('<slug:slug>/specifications/', ProductSpecificationListCreateView.as_view(), name='product-specifications-list'),
     path('<slug:slug>/specifications/<int:spec_id>/', ProductSpecificationDetailView.as_view(), name='product-specification-detail'),
     
+    # ============= PRODUCT STOCK LEDGER =============
+    # MUST come before <slug:slug>/ pattern (more specific)
+    path('<slug:slug>/stock/', ProductStockView.as_view(), name='product-stock'),
+
     # ============= PRODUCT REVIEWS (Product-Specific) =============
     # MUST come before <slug:slug>/ pattern (more specific)
     path('<slug:slug>/reviews/', ProductReviewListCreateView.as_view(), name='product-reviews'),
@@ -66,6 +80,7 @@ urlpatterns = [
     # ============= ANALYTICS & OVERVIEW =============
     path('overview/', DashboardOverviewView.as_view(), name='dashboard-overview'),
     path('analytics/dashboard/', AnalyticsDashboardView.as_view(), name='analytics-dashboard'),
+    path('seo/offenders/', SeoOffendersView.as_view(), name='seo-offenders'),
 
     # ============= STORE SERVICES =============
     path('store-services/', StoreServiceListCreateView.as_view(), name='store-services'),
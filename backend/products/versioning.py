@@ -0,0 +1,81 @@
+"""
+Catalog version counter.
+
+Every write that changes what the public catalog looks like bumps a single
+integer in the cache. In-process structures (typeahead index, rendered
+payloads, ETags) compare against it instead of re-querying the database.
+Point CACHES at a shared backend (Redis/Memcached) when running more than
+one worker so all processes see the same version.
+"""
+import hashlib
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import condition
+
+CATALOG_VERSION_KEY = 'products:catalog_version'
+CATALOG_MODIFIED_KEY = 'products:catalog_modified'
+
+
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, 1, timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY, 1)
+    return version
+
+
+def get_catalog_last_modified():
+    modified = cache.get(CATALOG_MODIFIED_KEY)
+    if modified is None:
+        # Unknown (cold cache): claim "now" so clients revalidate from here on
+        cache.add(CATALOG_MODIFIED_KEY, timezone.now().replace(microsecond=0), timeout=None)
+        modified = cache.get(CATALOG_MODIFIED_KEY)
+    return modified
+
+
+def bump_catalog_version():
+    cache.set(CATALOG_MODIFIED_KEY, timezone.now().replace(microsecond=0), timeout=None)
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        # Key evicted or never set
+        cache.add(CATALOG_VERSION_KEY, 1, timeout=None)
+        return cache.incr(CATALOG_VERSION_KEY)
+
+
+# ============= CONDITIONAL GET =============
+
+def catalog_etag(request, *args, **kwargs):
+    """
+    Strong ETag for a catalog read: the catalog version plus a digest of the
+    URL and audience (staff see inactive items, so their payloads differ).
+    """
+    user = request.user
+    audience = 'staff' if user.is_authenticated and (user.is_staff or user.is_superuser) else 'public'
+    variant = f"{request.get_full_path()}|{audience}|{request.META.get('HTTP_ACCEPT', '')}"
+    digest = hashlib.blake2b(variant.encode(), digest_size=8).hexdigest()
+    return f'{get_catalog_version()}-{digest}'
+
+
+def catalog_last_modified(request, *args, **kwargs):
+    return get_catalog_last_modified()
+
+
+def catalog_conditional(view_method):
+    """
+    Answer If-None-Match / If-Modified-Since with 304 before the view runs,
+    and stamp ETag / Last-Modified on full responses. Use with
+    method_decorator on APIView.get.
+    """
+    conditional = condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)(view_method)
+
+    @wraps(view_method)
+    def wrapper(request, *args, **kwargs):
+        response = conditional(request, *args, **kwargs)
+        patch_vary_headers(response, ('Authorization', 'Accept'))
+        return response
+
+    return wrapper
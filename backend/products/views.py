@@ -1,28 +1,42 @@
+import io
+
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db import models
-from django.db.models import Q, Sum, Count
-from django.db.models.functions import Length
+from django.db.models import Q, Count
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 
+from accounts.utils.fieldsets import Fieldset
 from accounts.utils.responses import success_response, error_response
+from accounts.utils.streaming import stream_success_response, wants_streaming
+from portfolio.models import PortfolioProject
 
 from .models import (
     Category, Product, Review, QuotationRequest, ServiceBooking, Material, Specification,
-    StoreService, SearchQuery, ProductView
+    StoreService
 )
 from .serializers import (
     CategorySerializer, ProductListSerializer, ProductDetailSerializer,
     ProductCreateUpdateSerializer, ReviewSerializer, ReviewCreateSerializer, 
     QuotationRequestSerializer, ServiceBookingSerializer, MaterialSerializer, SpecificationSerializer,
-    StoreServiceSerializer, SearchQuerySerializer, ProductViewSerializer
+    StoreServiceSerializer, SearchQuerySerializer, ProductViewSerializer, BulkAdjustSerializer,
+    StockMovementSerializer
+)
+from .filters import ProductFilter, filter_by_materials, filter_by_material_name
+from . import (
+    analytics, bulk_adjust, catalog_export, catalog_import, dashboard, detail_cache, facets, kpis, search,
+    stock, suggest, trending
 )
-from .filters import ProductFilter
+from .versioning import catalog_conditional
+from .pagination import KeysetPaginator, LowStockPaginator, SeoOffenderPaginator, InvalidCursor, estimate_count
 
 
 # ============= HELPER FUNCTION =============
@@ -32,6 +46,19 @@ def is_admin_or_staff(user):
     return user and user.is_authenticated and (user.is_staff or user.is_superuser)
 
 
+def seo_offender(obj, name):
+    """Dashboard row for an object with a stored SEO score"""
+    missing = obj.seo_missing_labels
+    return {
+        "id": obj.id,
+        "name": name,
+        "slug": obj.slug,
+        "seo_score": obj.seo_score,
+        "missing": missing,
+        "severity": "high" if len(missing) > 1 else "medium"
+    }
+
+
 # ============= CATEGORY VIEWS =============
 
 class CategoryListCreateView(APIView):
@@ -39,9 +66,11 @@ class CategoryListCreateView(APIView):
     permission_classes = [AllowAny]
     parser_classes = [JSONParser, MultiPartParser, FormParser]
 
+    @method_decorator(catalog_conditional)
     def get(self, request, *args, **kwargs):
-        categories = Category.objects.all()
-        serializer = CategorySerializer(categories, many=True, context={'request': request})
+        fieldset = Fieldset.from_request(request)
+        categories = fieldset.optimize(Category.objects.all(), CategorySerializer)
+        serializer = CategorySerializer(categories, many=True, context={'request': request}, fieldset=fieldset)
         return success_response("Categories retrieved", {'results': serializer.data})
 
     def post(self, request, *args, **kwargs):
@@ -65,9 +94,11 @@ class CategoryDetailView(APIView):
     permission_classes = [AllowAny]
     parser_classes = [JSONParser, MultiPartParser, FormParser]
 
+    @method_decorator(catalog_conditional)
     def get(self, request, pk, *args, **kwargs):
-        category = get_object_or_404(Category, pk=pk)
-        serializer = CategorySerializer(category, context={'request': request})
+        fieldset = Fieldset.from_request(request)
+        category = get_object_or_404(fieldset.optimize(Category.objects.all(), CategorySerializer), pk=pk)
+        serializer = CategorySerializer(category, context={'request': request}, fieldset=fieldset)
         return success_response("Category retrieved", serializer.data)
 
     def put(self, request, pk, *args, **kwargs):
@@ -122,13 +153,16 @@ class ProductListCreateView(APIView):
     permission_classes = [AllowAny]
     parser_classes = [JSONParser, MultiPartParser, FormParser]
 
+    @method_decorator(catalog_conditional)
     def get(self, request, *args, **kwargs):
         if is_admin_or_staff(request.user):
             queryset = Product.objects.all()
         else:
             queryset = Product.objects.filter(is_active=True)
         
-        queryset = queryset.select_related('category').prefetch_related('images', 'materials', 'reviews')
+        # Only join, prefetch and load what ?fields= / ?expand= ask for
+        fieldset = Fieldset.from_request(request)
+        queryset = fieldset.optimize(queryset, ProductListSerializer)
         
         # Filter by category slug
         category = request.query_params.get('category')
@@ -145,6 +179,20 @@ class ProductListCreateView(APIView):
         if product_type:
             queryset = queryset.filter(product_type=product_type)
         
+        # Filter by materials: ?materials=<id|slug>,... with ?materials_match=any|all
+        materials = request.query_params.get('materials')
+        if materials:
+            match = request.query_params.get('materials_match', 'any')
+            if match not in ('any', 'all'):
+                return error_response("materials_match must be 'any' or 'all'")
+            values = [value.strip() for value in materials.split(',') if value.strip()]
+            queryset = filter_by_materials(queryset, values, match)
+        
+        # Free-text material match (fallback)
+        material = request.query_params.get('material')
+        if material:
+            queryset = filter_by_material_name(queryset, material)
+        
         # Filter by price range
         min_price = request.query_params.get('min_price')
         max_price = request.query_params.get('max_price')
@@ -156,7 +204,7 @@ class ProductListCreateView(APIView):
         # Filter by in stock
         in_stock = request.query_params.get('in_stock')
         if in_stock and in_stock.lower() == 'true':
-            queryset = queryset.filter(stock_quantity__gt=0)
+            queryset = queryset.in_stock()
         
         # Search
         search_query = request.query_params.get('search')
@@ -166,14 +214,42 @@ class ProductListCreateView(APIView):
                 Q(description__icontains=search_query)
             )
         
-        # Ordering
+        # Facet counts for the current filter set (opt-in via ?facets=true)
+        facet_counts = None
+        show_facets = request.query_params.get('facets')
+        if show_facets and show_facets.lower() == 'true':
+            facet_counts = facets.engine.count(queryset)
+
+        # Keyset pagination (opt-in via ?cursor= or ?page_size=)
+        if KeysetPaginator.is_requested(request):
+            try:
+                paginator = KeysetPaginator.from_request(request)
+            except InvalidCursor as e:
+                return error_response(str(e))
+
+            products, next_cursor = paginator.paginate(queryset)
+            serializer = ProductListSerializer(products, many=True, context={'request': request}, fieldset=fieldset)
+            data = {'results': serializer.data, 'next': next_cursor}
+            include_total = request.query_params.get('include_total')
+            if include_total and include_total.lower() == 'true':
+                data['estimated_total'] = estimate_count(queryset)
+            if facet_counts is not None:
+                data['facets'] = facet_counts
+            return success_response(f"Found {len(products)} products", data)
+
+        # Ordering (average_rating sorts on the denormalized rating summary)
         ordering = request.query_params.get('ordering', '-created_at')
+        if ordering.lstrip('-') == 'average_rating':
+            ordering = ordering.replace('average_rating', 'rating_summary__average_rating')
         queryset = queryset.order_by(ordering)
         
-        serializer = ProductListSerializer(queryset, many=True, context={'request': request})
+        serializer = ProductListSerializer(queryset, many=True, context={'request': request}, fieldset=fieldset)
+        data = {'results': serializer.data}
+        if facet_counts is not None:
+            data['facets'] = facet_counts
         return success_response(
             f"Found {len(serializer.data)} products",
-            {'results': serializer.data}
+            data
         )
 
     def post(self, request, *args, **kwargs):
@@ -197,19 +273,27 @@ class ProductDetailView(APIView):
     permission_classes = [AllowAny]
     parser_classes = [JSONParser, MultiPartParser, FormParser]
 
+    @method_decorator(catalog_conditional)
     def get(self, request, slug, *args, **kwargs):
+        staff = is_admin_or_staff(request.user)
+        fieldset = Fieldset.from_request(request)
+        # Key and generations are captured before the read (see detail_cache.Lookup)
+        lookup = detail_cache.Lookup(request, slug, staff, fieldset.signature)
+        cached = lookup.get()
+        if cached is not None:
+            product_id, data = cached
+            analytics.product_views.track(request, product_id)
+            return success_response("Product retrieved", data)
+
         queryset = Product.objects.all()
-        if not is_admin_or_staff(request.user):
+        if not staff:
             queryset = queryset.filter(is_active=True)
 
-        product = get_object_or_404(
-            queryset.select_related('category').prefetch_related(
-                'images', 'materials', 'specifications', 'reviews__user'
-            ),
-            slug=slug
-        )
-        serializer = ProductDetailSerializer(product, context={'request': request})
-        return success_response("Product retrieved", serializer.data)
+        product = get_object_or_404(fieldset.optimize(queryset, ProductDetailSerializer), slug=slug)
+        analytics.product_views.track(request, product.pk)
+        data = ProductDetailSerializer(product, context={'request': request}, fieldset=fieldset).data
+        lookup.store(product, data)
+        return success_response("Product retrieved", data)
 
     def put(self, request, slug, *args, **kwargs):
         # Only admin/staff can update
@@ -273,18 +357,50 @@ class FeaturedProductsView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request, *args, **kwargs):
-        products = Product.objects.filter(
+        fieldset = Fieldset.from_request(request)
+        products = fieldset.optimize(Product.objects.filter(
             is_active=True, 
             is_featured=True
-        ).select_related('category').prefetch_related('images')[:8]
+        ), ProductListSerializer)[:8]
         
-        serializer = ProductListSerializer(products, many=True, context={'request': request})
+        serializer = ProductListSerializer(products, many=True, context={'request': request}, fieldset=fieldset)
         return success_response(
             f"Found {len(serializer.data)} featured products",
             {'results': serializer.data}
         )
 
 
+# ============= TRENDING PRODUCTS VIEW =============
+
+class TrendingProductsView(APIView):
+    """Products ranked by recent views and quotation requests (public)"""
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 8)), trending.TOP_K))
+        except ValueError:
+            return error_response("limit must be an integer")
+
+        entries = trending.top_k.get(limit)
+        products = Product.objects.filter(
+            id__in=[product_id for product_id, _ in entries], is_active=True
+        ).select_related('category', 'rating_summary', 'cover_image').in_bulk()
+
+        results = []
+        for product_id, score in entries:
+            product = products.get(product_id)
+            if product is None:
+                continue
+            data = ProductListSerializer(product, context={'request': request}).data
+            data['trending_score'] = round(score, 4)
+            results.append(data)
+        return success_response(
+            f"Found {len(results)} trending products",
+            {'results': results}
+        )
+
+
 # ============= PRODUCT REVIEW VIEWS =============
 
 class ProductReviewListCreateView(APIView):
@@ -403,12 +519,23 @@ class QuotationRequestListCreateView(APIView):
             )
         
         if is_admin_or_staff(request.user):
-            quotations = QuotationRequest.objects.all().select_related('product', 'user').prefetch_related('attachments')
+            quotations = QuotationRequest.objects.all().select_related(
+                'product', 'service', 'user'
+            ).prefetch_related('attachments')
         else:
             quotations = QuotationRequest.objects.filter(
                 user=request.user
-            ).select_related('product').prefetch_related('attachments')
-        
+            ).select_related('product', 'service').prefetch_related('attachments')
+
+        if wants_streaming(request):
+            # Streamed in chunks; attachments are prefetched once per chunk
+            return stream_success_response(
+                f"Found {quotations.count()} quotation requests",
+                quotations,
+                QuotationRequestSerializer,
+                context={'request': request},
+            )
+
         serializer = QuotationRequestSerializer(quotations, many=True, context={'request': request})
         return success_response(
             f"Found {len(serializer.data)} quotation requests",
@@ -636,8 +763,10 @@ class ServiceBookingDetailView(APIView):
 # ============= SEARCH VIEW =============
 
 class SearchView(APIView):
-    """Global search across products (public)"""
+    """Global ranked full-text search across products (public)"""
     permission_classes = [AllowAny]
+    DEFAULT_PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 100
 
     def get(self, request, *args, **kwargs):
         query = request.query_params.get('q', '')
@@ -645,19 +774,50 @@ class SearchView(APIView):
         if len(query) < 2:
             return error_response("Search query must be at least 2 characters")
         
-        products = Product.objects.filter(
-            Q(name__icontains=query) |
-            Q(description__icontains=query) |
-            Q(category__name__icontains=query) |
-            Q(materials__name__icontains=query),
-            is_active=True
-        ).distinct()[:20]
+        analytics.search_queries.add(query)
+        
+        try:
+            page = max(1, int(request.query_params.get('page', 1)))
+            page_size = int(request.query_params.get('page_size', self.DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return error_response("page and page_size must be integers")
+        page_size = max(1, min(page_size, self.MAX_PAGE_SIZE))
+        
+        ids, total = search.search_product_ids(query, offset=(page - 1) * page_size, limit=page_size)
+        products = Product.objects.filter(id__in=ids).select_related('category', 'rating_summary', 'cover_image')
+        # Keep the relevance order from the index
+        by_id = {p.id: p for p in products}
+        products = [by_id[pk] for pk in ids if pk in by_id]
         
         serializer = ProductListSerializer(products, many=True, context={'request': request})
         
         return success_response(
-            f"Found {len(serializer.data)} results",
-            {'results': serializer.data, 'query': query}
+            f"Found {total} results",
+            {
+                'results': serializer.data,
+                'query': query,
+                'page': page,
+                'page_size': page_size,
+                'total': total,
+            }
+        )
+
+class SearchSuggestView(APIView):
+    """Typeahead suggestions for the search box (public)"""
+    permission_classes = [AllowAny]
+    MAX_LIMIT = 20
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), self.MAX_LIMIT)
+        except ValueError:
+            return error_response("limit must be an integer")
+
+        suggestions = suggest.engine.suggest(query, limit=max(1, limit))
+        return success_response(
+            f"Found {len(suggestions)} suggestions",
+            {'results': suggestions, 'query': query}
         )
 
 # ============= MATERIAL VIEWS =============
@@ -762,6 +922,12 @@ class SpecificationListCreateView(APIView):
     def get(self, request, *args, **kwargs):
         """Get all specifications (public)"""
         specifications = Specification.objects.all()
+        if wants_streaming(request):
+            return stream_success_response(
+                f"Found {specifications.count()} specifications",
+                specifications,
+                SpecificationSerializer,
+            )
         serializer = SpecificationSerializer(specifications, many=True)
         return success_response(
             f"Found {len(serializer.data)} specifications",
@@ -1049,9 +1215,17 @@ class MaterialListCreateView(APIView):
     permission_classes = []
     parser_classes = [JSONParser, MultiPartParser, FormParser]
 
+    @method_decorator(catalog_conditional)
     def get(self, request, *args, **kwargs):
         """Get all materials (public)"""
         materials = Material.objects.all()
+        if wants_streaming(request):
+            return stream_success_response(
+                f"Found {materials.count()} materials",
+                materials,
+                MaterialSerializer,
+                context={'request': request},
+            )
         serializer = MaterialSerializer(materials, many=True, context={'request': request})
         return success_response(
             f"Found {len(serializer.data)} materials",
@@ -1079,6 +1253,7 @@ class MaterialDetailView(APIView):
     permission_classes = []
     parser_classes = [JSONParser, MultiPartParser, FormParser]
 
+    @method_decorator(catalog_conditional)
     def get(self, request, pk, *args, **kwargs):
         """Get specific material (public)"""
         material = get_object_or_404(Material, pk=pk)
@@ -1137,12 +1312,15 @@ class StoreServiceListCreateView(APIView):
     permission_classes = [AllowAny]
     parser_classes = [JSONParser, MultiPartParser, FormParser]
 
+    @method_decorator(catalog_conditional)
     def get(self, request, *args, **kwargs):
         if is_admin_or_staff(request.user):
             services = StoreService.objects.all()
         else:
             services = StoreService.objects.filter(is_active=True)
-        serializer = StoreServiceSerializer(services, many=True, context={'request': request})
+        fieldset = Fieldset.from_request(request)
+        services = fieldset.optimize(services, StoreServiceSerializer)
+        serializer = StoreServiceSerializer(services, many=True, context={'request': request}, fieldset=fieldset)
         return success_response("Services retrieved", {'results': serializer.data})
 
     def post(self, request, *args, **kwargs):
@@ -1162,8 +1340,9 @@ class StoreServiceDetailView(APIView):
     parser_classes = [JSONParser, MultiPartParser, FormParser]
 
     def get(self, request, pk, *args, **kwargs):
-        service = get_object_or_404(StoreService, pk=pk)
-        serializer = StoreServiceSerializer(service, context={'request': request})
+        fieldset = Fieldset.from_request(request)
+        service = get_object_or_404(fieldset.optimize(StoreService.objects.all(), StoreServiceSerializer), pk=pk)
+        serializer = StoreServiceSerializer(service, context={'request': request}, fieldset=fieldset)
         return success_response("Service retrieved", serializer.data)
 
     def put(self, request, pk, *args, **kwargs):
@@ -1195,95 +1374,286 @@ class DashboardOverviewView(APIView):
             return error_response("Admin access required", status_code=status.HTTP_403_FORBIDDEN)
 
         # Recent Quotations
-        recent_quotations = QuotationRequest.objects.all().order_by('-created_at')[:5]
+        recent_quotations = QuotationRequest.objects.select_related(
+            'user', 'product', 'service'
+        ).prefetch_related('attachments').order_by('-created_at')[:5]
         quotation_serializer = QuotationRequestSerializer(recent_quotations, many=True, context={'request': request})
 
-        # SEO Health (All products for admin diagnostic)
-        seo_alerts = []
-        thin_products = Product.objects.all().annotate(
-            desc_len=Length('description')
-        ).filter(
-            Q(meta_description='') | Q(meta_keywords='') | Q(desc_len__lt=100)
-        )[:10]
-        
-        for p in thin_products:
-            missing = []
-            if not p.meta_description: missing.append("Meta Description")
-            if not p.meta_keywords: missing.append("Meta Keywords")
-            if p.description and len(p.description) < 100: missing.append("Deep Content")
-            elif not p.description: missing.append("Description")
-            seo_alerts.append({
-                "id": p.id,
-                "name": p.name,
-                "slug": p.slug,
-                "missing": missing,
-                "severity": "high" if len(missing) > 1 else "medium"
-            })
+        # SEO Health (All products for admin diagnostic), worst stored scores first
+        thin_products = Product.objects.filter(seo_score__lt=100).order_by(
+            'seo_score', 'id'
+        ).only('id', 'name', 'slug', 'seo_score', 'seo_missing')[:10]
+        seo_alerts = [seo_offender(p, p.name) for p in thin_products]
 
         data = {
             "recent_quotations": quotation_serializer.data,
             "seo_alerts": seo_alerts,
-            "stats": {
-                "total_products": Product.objects.count(),
-                "total_services": StoreService.objects.count(),
-                "pending_quotations": QuotationRequest.objects.filter(status='pending').count(),
-                "staff_count": StaffProfile.objects.count()
-            }
+            # Maintained counters: one indexed read however large the tables get
+            "stats": kpis.read()
         }
 
         return success_response("Overview metrics retrieved", data)
 
+class SeoOffendersView(APIView):
+    """Every product, service or portfolio project with SEO gaps, worst first (admin/staff only)"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        if not is_admin_or_staff(request.user):
+            return error_response("Admin access required", status_code=status.HTTP_403_FORBIDDEN)
+
+        kind = request.query_params.get('type', 'product')
+        if kind == 'product':
+            queryset, name_field = Product.objects.all(), 'name'
+        elif kind == 'service':
+            queryset, name_field = StoreService.objects.all(), 'title'
+        elif kind == 'portfolio':
+            queryset, name_field = PortfolioProject.objects.all(), 'title'
+        else:
+            return error_response("type must be one of: product, service, portfolio")
+
+        try:
+            paginator = SeoOffenderPaginator(
+                page_size=request.query_params.get('page_size'),
+                cursor=request.query_params.get('cursor'),
+            )
+        except InvalidCursor as exc:
+            return error_response(str(exc))
+
+        rows, next_cursor = paginator.paginate(
+            queryset.filter(seo_score__lt=100).only('id', name_field, 'slug', 'seo_score', 'seo_missing')
+        )
+        return success_response(
+            f"Found {len(rows)} SEO offenders",
+            {
+                'results': [seo_offender(obj, getattr(obj, name_field)) for obj in rows],
+                'next': next_cursor,
+            }
+        )
+
 # ============= ANALYTICS VIEWS =============
 
 class AnalyticsDashboardView(APIView):
-    """Consolidated analytics for the admin dashboard"""
+    """Consolidated analytics for the admin dashboard, served stale-while-revalidate"""
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
         if not is_admin_or_staff(request.user):
             return error_response("Admin access required", status_code=status.HTTP_403_FORBIDDEN)
 
-        # Most searched queries
-        top_searches = SearchQuery.objects.values('query').annotate(
-            search_count=models.Sum('count')
-        ).order_by('-search_count')[:10]
-
-        # Most viewed products (all for diagnostic)
-        top_views = ProductView.objects.all().values('product__name').annotate(
-            view_count=models.Count('id')
-        ).order_by('-view_count')[:10]
-
-        # SEO Suggestions (Only for active products)
-        seo_suggestions = []
-        low_seo_products = Product.objects.filter(is_active=True).annotate(
-            desc_len=Length('description')
-        ).filter(
-            Q(meta_description='') | Q(meta_keywords='') | Q(desc_len__lt=100)
-        )[:10]
-        
-        for p in low_seo_products:
-            missing = []
-            if not p.meta_description: missing.append("Meta Description")
-            if not p.meta_keywords: missing.append("Meta Keywords")
-            if len(p.description) < 100: missing.append("Deep Content")
-            
-            seo_suggestions.append({
-                "id": p.id,
-                "name": p.name,
-                "slug": p.slug,
-                "missing": missing,
-                "suggestion": f"Enhance {', '.join(missing)} to improve organic discoverability."
-            })
-
-        data = {
-            "top_searches": top_searches,
-            "top_views": top_views,
-            "seo_suggestions": seo_suggestions,
-            "summary": {
-                "total_products": Product.objects.count(),
-                "total_services": StoreService.objects.count(),
-                "total_queries": SearchQuery.objects.aggregate(total=models.Sum('count'))['total'] or 0
-            }
-        }
+        # ?refresh=true queues the same locked background refresh; the current entry is returned
+        revalidate = request.query_params.get('refresh', '').lower() == 'true'
+        entry = dashboard.analytics_dashboard.get(revalidate=revalidate)
 
+        data = dict(entry['data'])
+        data['computed_at'] = entry['computed_at']
+        data['is_stale'] = dashboard.analytics_dashboard.is_stale(entry)
         return success_response("Analytics retrieved", data)
+
+
+# ============= CATALOG IMPORT =============
+
+class CatalogImportView(APIView):
+    """Bulk import products from an uploaded CSV or JSONL file (admin only)"""
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request, *args, **kwargs):
+        if not is_admin_or_staff(request.user):
+            return error_response("Admin access required", status_code=status.HTTP_403_FORBIDDEN)
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return error_response("Upload a CSV or JSONL file as 'file'")
+        fmt = request.data.get('format') or catalog_import.detect_format(upload.name)
+        if fmt not in catalog_import.FORMATS:
+            return error_response("Unknown format; use 'csv' or 'jsonl'")
+        try:
+            batch_size = max(1, min(int(request.data.get('batch_size', catalog_import.DEFAULT_BATCH_SIZE)), 5000))
+        except ValueError:
+            return error_response("batch_size must be an integer")
+        dry_run = str(request.data.get('dry_run', '')).lower() == 'true'
+
+        # Read the upload as text without loading it into memory
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            report = catalog_import.import_catalog(stream, fmt, batch_size=batch_size, dry_run=dry_run)
+        except UnicodeDecodeError:
+            return error_response("File must be UTF-8 encoded")
+        finally:
+            stream.detach()
+
+        if dry_run:
+            message = f"Validated {report.rows} rows: {report.valid} valid, {report.error_count} errors"
+        else:
+            message = f"Imported {report.created} of {report.rows} rows"
+        return success_response(message, report.as_dict())
+
+
+# ============= CATALOG EXPORT =============
+
+class CatalogExportView(APIView):
+    """Stream the whole catalog as CSV, JSONL or columnar JSONL, gzipped by default (admin only)"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        if not is_admin_or_staff(request.user):
+            return error_response("Admin access required", status_code=status.HTTP_403_FORBIDDEN)
+
+        # `format` is taken by DRF's content negotiation
+        fmt = request.query_params.get('export_format', 'csv')
+        if fmt not in catalog_export.FORMATS:
+            return error_response(f"Unknown format; use one of {', '.join(catalog_export.FORMATS)}")
+        compress = request.query_params.get('gzip', 'true').lower() != 'false'
+        queryset = catalog_export.export_queryset(
+            active_only=request.query_params.get('active_only', '').lower() == 'true',
+            category=request.query_params.get('category'),
+        )
+
+        response = StreamingHttpResponse(
+            catalog_export.export_catalog(fmt, queryset, compress=compress),
+            content_type='application/gzip' if compress else catalog_export.CONTENT_TYPES[fmt],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{catalog_export.filename(fmt, compress)}"'
+        return response
+
+
+# ============= BULK ADJUSTMENTS =============
+
+class BulkAdjustView(APIView):
+    """Adjust price and/or stock for a filtered set of products in one UPDATE (admin only)"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        if not is_admin_or_staff(request.user):
+            return error_response("Admin access required", status_code=status.HTTP_403_FORBIDDEN)
+
+        serializer = BulkAdjustSerializer(data=request.data)
+        if not serializer.is_valid():
+            return error_response("Invalid adjustment", serializer.errors)
+        data = serializer.validated_data
+        queryset = bulk_adjust.target_queryset(data)
+
+        if data['dry_run']:
+            result = bulk_adjust.preview(queryset, data)
+            return success_response(
+                f"{result['totals']['matched']} products would be updated", dict(result, dry_run=True)
+            )
+
+        updated = bulk_adjust.apply(queryset, data, user=request.user)
+        return success_response(f"{updated} products updated", {'updated': updated, 'dry_run': False})
+
+
+# ============= STOCK LEDGER =============
+
+class ProductStockView(APIView):
+    """Stock level, as-of lookups and ledger movements for one product (admin/staff only)"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, slug, *args, **kwargs):
+        if not is_admin_or_staff(request.user):
+            return error_response("Admin access required", status_code=status.HTTP_403_FORBIDDEN)
+
+        product = get_object_or_404(Product.objects.only('id', 'slug', 'stock_quantity'), slug=slug)
+        data = {'product': product.slug, 'stock_quantity': product.stock_quantity}
+
+        as_of = request.query_params.get('as_of')
+        if as_of:
+            when = parse_datetime(as_of)
+            if when is None:
+                return error_response("as_of must be an ISO 8601 datetime")
+            if timezone.is_naive(when):
+                when = timezone.make_aware(when)
+            data['as_of'] = when
+            data['quantity_as_of'] = stock.quantity_as_of(product.pk, when)
+
+        # Newest first; pass the last id seen as ?before= for the next page
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+            before = int(request.query_params.get('before', 0))
+        except ValueError:
+            return error_response("limit and before must be integers")
+        movements = product.stock_movements.select_related('created_by').order_by('-id')
+        if before:
+            movements = movements.filter(id__lt=before)
+        data['movements'] = StockMovementSerializer(movements[:limit], many=True).data
+        return success_response("Stock retrieved", data)
+
+    def post(self, request, slug, *args, **kwargs):
+        if not is_admin_or_staff(request.user):
+            return error_response("Admin access required", status_code=status.HTTP_403_FORBIDDEN)
+
+        product = get_object_or_404(Product.objects.only('id'), slug=slug)
+        serializer = StockMovementSerializer(data=request.data)
+        if not serializer.is_valid():
+            return error_response("Invalid stock movement", serializer.errors)
+        try:
+            movement = stock.record(product.pk, user=request.user, **serializer.validated_data)
+        except stock.InsufficientStock as exc:
+            return error_response(str(exc), status_code=status.HTTP_409_CONFLICT)
+
+        product.refresh_from_db(fields=['stock_quantity'])
+        data = StockMovementSerializer(movement).data
+        data['stock_quantity'] = product.stock_quantity
+        return success_response("Stock movement recorded", data, status.HTTP_201_CREATED)
+
+
+# ============= LOW STOCK =============
+
+class LowStockFeedView(APIView):
+    """Active products at or under their low-stock threshold, emptiest first (admin/staff only)"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        if not is_admin_or_staff(request.user):
+            return error_response("Admin access required", status_code=status.HTTP_403_FORBIDDEN)
+
+        # Matches the product_restock_idx partial index, so pages and counts never scan the table
+        queryset = Product.objects.filter(is_active=True).needs_restock()
+        category = request.query_params.get('category')
+        if category:
+            queryset = queryset.filter(category__slug=category)
+        # Counted before the status filter so both tabs stay visible
+        counts = queryset.aggregate(
+            out_of_stock=Count('id', filter=Q(stock_quantity__lte=0)),
+            low_stock=Count('id', filter=Q(stock_quantity__gt=0)),
+        )
+
+        status_filter = request.query_params.get('status')
+        if status_filter == 'out':
+            queryset = queryset.filter(stock_quantity__lte=0)
+        elif status_filter == 'low':
+            queryset = queryset.filter(stock_quantity__gt=0)
+        elif status_filter:
+            return error_response("status must be 'low' or 'out'")
+
+        try:
+            paginator = LowStockPaginator(
+                page_size=request.query_params.get('page_size'),
+                cursor=request.query_params.get('cursor'),
+            )
+        except InvalidCursor as exc:
+            return error_response(str(exc))
+
+        rows, next_cursor = paginator.paginate(
+            queryset.with_stock_status().select_related('category').only(
+                'id', 'name', 'slug', 'stock_quantity', 'low_stock_threshold', 'category__name'
+            )
+        )
+        results = [
+            {
+                'id': product.id,
+                'name': product.name,
+                'slug': product.slug,
+                'category': product.category.name,
+                'stock_quantity': product.stock_quantity,
+                'low_stock_threshold': product.low_stock_threshold,
+                'shortfall': product.stock_shortfall,
+                'status': product.stock_status,
+            }
+            for product in rows
+        ]
+        return success_response(
+            f"{counts['low_stock']} low and {counts['out_of_stock']} out of stock",
+            {'counts': counts, 'results': results, 'next': next_cursor}
+        )